@@ -0,0 +1,62 @@
+"""
+Progress and cancellation of an online run, offline with MockBackend: a
+timer cancels half way through, we measure how long the translator takes
+to return after that and how much of the output is already translated.
+
+    python -m benchmarks.bench_cancel --lines 2000 --latency 0.2 --cancel-after 1.0
+"""
+import argparse
+import threading
+import time
+
+from src.utils.fake_backend import MockBackend
+from src.utils.progress import Progress, ProgressTracker
+from src.utils.scheduler import TokenBucket
+from src.utils.translator import MyTranslator2
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--max-length", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cancel-after", type=float, default=1.0, help="seconds")
+    args = parser.parse_args()
+
+    lines = [f"line number {i}" for i in range(args.lines)]
+    translator = MyTranslator2(dest = "zh-TW", max_length = args.max_length,
+                               backends = [MockBackend("mock", latency = args.latency)])
+    translator.concurrency = args.concurrency
+    translator.limiter = TokenBucket(rate = 1000, capacity = args.concurrency)
+
+    reports : list[Progress] = []
+    tracker = ProgressTracker(callback = reports.append, interval = 0)
+    cancelled_at : list[float] = []
+
+    def cancel():
+        cancelled_at.append(time.perf_counter())
+        tracker.cancel.cancel()
+
+    timer = threading.Timer(args.cancel_after, cancel)
+    start = time.perf_counter()
+    timer.start()
+    output = translator.translate_lines(lines, tracker)
+    end = time.perf_counter()
+    timer.cancel()
+
+    translated = sum(each.startswith("[zh-TW]") for each in output)
+    assert len(output) == len(lines)
+    assert all(each == line for each, line in zip(output, lines) if not each.startswith("[zh-TW]"))
+    last = reports[-1]
+    print(f"blocks {last.done} / {last.total} done, {len(reports)} progress reports")
+    print(f"rate {last.rate:.1f} blocks/s, last eta {last.eta if last.eta is None else round(last.eta, 2)} s")
+    print(f"lines translated {translated} / {len(lines)}, the rest kept as is; report {translator.report}")
+    if cancelled_at:
+        print(f"cancel -> return {(end - cancelled_at[0]) * 1000:.0f} ms (one request is {args.latency * 1000:.0f} ms)")
+    else:
+        print(f"finished in {end - start:.2f}s before the cancel")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Wall-clock time of MyTranslator2.translate_block against concurrency,
+using the offline FakeTranslator (fixed latency, 429 above max_rps).
+
+    python -m benchmarks.bench_concurrency --blocks 40 --latency 0.3 --max-rps 8
+"""
+import argparse
+import time
+
+from src.utils.fake_backend import MockBackend
+from src.utils.scheduler import TokenBucket
+from src.utils.translator import MyTranslator2
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--max-rps", type=float, default=8)
+    parser.add_argument("--rate", type=float, default=4.0, help="initial token bucket rate")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    blocks = [f"block {i}\nline two" for i in range(args.blocks)]
+    print(f"sequential with the old sleep(3): ~{args.blocks * (args.latency + 3):.1f}s")
+    for level in args.levels:
+        backend = MockBackend("fake", latency = args.latency, jitter = args.jitter, max_rps = args.max_rps)
+        fake = backend.fake
+        translator = MyTranslator2(dest = "zh-TW", backends = [backend])
+        translator.concurrency = level
+        translator.limiter = TokenBucket(rate = args.rate, capacity = level)
+
+        start = time.perf_counter()
+        result = translator.translate_block(blocks)
+        elapsed = time.perf_counter() - start
+        assert result.split("\n")[::2] == [f"[zh-TW]block {i}" for i in range(args.blocks)]
+        print(
+            f"concurrency {level:>3}  {elapsed:>6.2f}s  "
+            f"calls {fake.calls:>4}  429s {fake.throttled:>3}  final rate {translator.limiter.rate:.2f}/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
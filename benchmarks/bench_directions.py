@@ -0,0 +1,152 @@
+"""
+Every direction the GUI dispatches (src.utils.lang.DIRECTIONS) on generated
+SRT corpora of several sizes. Online backends are MockBackend with a fixed
+latency, so runs are deterministic and offline. Output is JSON, one entry
+per (direction, size): throughput, p50/p99 run latency, peak Python memory
+(tracemalloc, a separate run) and the per stage times of src.utils.timing.
+
+    python -m benchmarks.bench_directions --sizes 16 256 1024 --repeat 5 -o before.json
+    python -m benchmarks.bench_directions -o after.json --baseline before.json
+"""
+import argparse
+import contextlib
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import EN_WORDS, make_srt, unique_lines
+from src.utils.fake_backend import MockBackend
+from src.utils.lang import DIRECTION_LANGS, DIRECTIONS, Lang, create_translator, is_local, opencc_mode
+from src.utils.progress import ProgressTracker
+from src.utils.scheduler import TokenBucket
+from src.utils.timing import timings
+from src.utils.translator import MyTranslator2, get_opencc
+
+def make_corpus(language : Lang, size : int) -> str:
+    if language == Lang.EN:
+        return make_srt(size, unique_lines(5000, EN_WORDS))
+    text = make_srt(size, unique_lines(5000))
+    mode = opencc_mode(Lang.CN, language)
+    return get_opencc(mode).convert(text) if mode else text
+
+
+def percentile(values : list[float], fraction : float) -> float:
+    """
+    Nearest rank percentile.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def build(direction : str, args):
+    if is_local(direction):
+        return create_translator(direction)
+    backends = [MockBackend("fake", dest = "fake", latency = args.latency, jitter = args.jitter)]
+    translator = create_translator(direction, backends = backends)
+    for each in [translator, *getattr(translator, "stages", [])]:
+        if isinstance(each, MyTranslator2):
+            each.concurrency = args.concurrency
+            each.limiter = TokenBucket(rate = args.rate, capacity = args.concurrency)
+    return translator
+
+
+def translate(translator, text : str) -> str:
+    # a tracker without callback keeps the console bar out of the timings
+    return translator.do_translate(text, progress = ProgressTracker())
+
+
+def measure(direction : str, text : str, args) -> dict:
+    translator = build(direction, args)
+    translate(translator, text)    # warm up: dictionaries, event loop, imports
+
+    timings.reset()
+    latencies : list[float] = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        translate(translator, text)
+        latencies.append(time.perf_counter() - start)
+    stages = {
+        name : round(each["seconds"] / args.repeat, 6) for name, each in timings.report().items()
+    }
+
+    tracemalloc.start()
+    translate(translator, text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    p50 = percentile(latencies, 0.5)
+    return {
+        "direction"       : direction,
+        "chars"           : len(text),
+        "lines"           : text.count("\n") + 1,
+        "repeat"          : args.repeat,
+        "p50_s"           : round(p50, 6),
+        "p99_s"           : round(percentile(latencies, 0.99), 6),
+        "chars_per_s"     : round(len(text) / p50),
+        "lines_per_s"     : round((text.count("\n") + 1) / p50),
+        "peak_python_mb"  : round(peak / (1 << 20), 2),
+        "stages_s"        : stages,
+    }
+
+
+def compare(results : list[dict], baseline_path : str) -> None:
+    with open(baseline_path, "r", encoding = "utf-8") as file:
+        baseline = {(each["direction"], each["chars"]) : each for each in json.load(file)["results"]}
+    for each in results:
+        old = baseline.get((each["direction"], each["chars"]))
+        if old is None:
+            continue
+        change = each["chars_per_s"] / old["chars_per_s"] - 1
+        print(f"{each['direction']:<11} {each['chars']:>9} chars  {change:+7.1%} throughput  "
+              f"p99 {old['p99_s']:.3f}s -> {each['p99_s']:.3f}s", file = sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--directions", nargs="+", default=list(DIRECTIONS), choices=list(DIRECTIONS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 256, 1024], help="corpus sizes in KB")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per fake request (seeded)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests per second allowed by the limiter")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="earlier JSON output to compare with (printed to stderr)")
+    args = parser.parse_args()
+
+    timings.enable()
+    corpora : dict[tuple[str, int], str] = {}
+    results : list[dict] = []
+    # translators log to stdout, keep it for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        for direction in args.directions:
+            for size in args.sizes:
+                key = (DIRECTION_LANGS[direction][0], size)
+                if key not in corpora:
+                    corpora[key] = make_corpus(key[0], size << 10)
+                results.append(measure(direction, corpora[key], args))
+                last = results[-1]
+                print(f"{direction:<11} {size:>5} KB  p50 {last['p50_s']:.3f}s  {last['chars_per_s']:>12,} chars/s")
+
+    output = {
+        "python"   : platform.python_version(),
+        "platform" : platform.platform(),
+        "time"     : time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args"     : vars(args),
+        "results"  : results,
+    }
+    text = json.dumps(output, ensure_ascii = False, indent = 2)
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
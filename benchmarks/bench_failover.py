@@ -0,0 +1,56 @@
+"""
+Cost of a failing primary backend, offline with MockBackend: the old
+try/except chain paid a full failed round trip on every block, the
+circuit breaker only on the first few.
+
+    python -m benchmarks.bench_failover --blocks 40 --latency 0.2 --timeout 1.0
+"""
+import argparse
+import time
+
+from src.utils.backends import BackendPool
+from src.utils.fake_backend import MockBackend
+from src.utils.scheduler import TokenBucket
+from src.utils.translator import MyTranslator2
+
+
+def run(blocks : list[str], backends : list[MockBackend], concurrency : int, threshold : int):
+    translator = MyTranslator2(dest = "zh-TW", backends = backends)
+    translator.backends = BackendPool(backends, threshold = threshold, cooldown = 60)
+    translator.concurrency = concurrency
+    translator.limiter = TokenBucket(rate = 1000, capacity = concurrency)
+    start = time.perf_counter()
+    result = translator.translate_block(blocks)
+    elapsed = time.perf_counter() - start
+    assert result.split("\n")[::2] == [f"[zh-TW]block {i}" for i in range(len(blocks))]
+    return elapsed, translator.backends.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request of the healthy backend")
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds before the failing backend errors")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    blocks = [f"block {i}\nline two" for i in range(args.blocks)]
+    cases = {
+        "healthy primary"            : (False, 3),
+        "primary down, no breaker"   : (True, 10 ** 9),
+        "primary down, breaker at 3" : (True, 3),
+    }
+    for label, (down, threshold) in cases.items():
+        backends = [
+            MockBackend("primary", down = down, latency = args.timeout if down else args.latency),
+            MockBackend("fallback", latency = args.latency),
+        ]
+        elapsed, stats = run(blocks, backends, args.concurrency, threshold)
+        print(
+            f"{label:<28} {elapsed:>6.2f}s  primary calls {backends[0].fake.calls:>3}  "
+            f"fallback calls {backends[1].fake.calls:>3}  primary {stats['primary']['state']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+GUI responsiveness of the large document mode, offscreen: a file is
+dropped on TranslateWidget and the gaps between event loop turns are
+measured until the right pane is filled. Prints p50 / p99 / worst gap and
+when the first translated line showed up. Online directions use
+MockBackend. The translator is built beforehand, as TranslateWidget does
+while idle. Fails when the worst gap is over --max-gap ms.
+
+    python -m benchmarks.bench_large_view --size 50 --direction local
+    python -m benchmarks.bench_large_view --size 10 --direction online --latency 0.2
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+from benchmarks.corpus import EN_WORDS, make_srt, unique_lines
+from src.gui.large_text import SWITCH_INTERVAL
+from src.gui.translate_gui import TranslateWidget
+from src.utils.fake_backend import MockBackend
+from src.utils.lang import Lang, create_translator, get_direction
+from src.utils.scheduler import TokenBucket
+from src.utils.translator import MyTranslator2
+
+# a frame at 20 fps
+MAX_GAP_MS : float = 50
+
+
+def online_translator(direction : str, latency : float):
+    translator = create_translator(direction, backends = [MockBackend("fake", dest = "zh-CN", latency = latency)])
+    for stage in getattr(translator, "stages", [translator]):
+        if isinstance(stage, MyTranslator2):
+            stage.concurrency = 8
+            stage.limiter = TokenBucket(rate = 1000.0, capacity = 8)
+    return translator
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50, help="file size in MB")
+    parser.add_argument("--direction", choices=["local", "online"], default="local")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake request")
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP_MS, help="allowed worst event loop gap in ms")
+    args = parser.parse_args()
+
+    sys.setswitchinterval(SWITCH_INTERVAL)    # as main.py
+    app    = QApplication(sys.argv)
+    widget = TranslateWidget()
+    widget.show()
+    if args.direction == "online":
+        text = make_srt(args.size << 20, unique_lines(50000, EN_WORDS))
+        direction = get_direction(Lang.EN, Lang.TW)
+        widget.translators._translators[direction] = online_translator(direction, args.latency)
+        widget.combo_left.setCurrentText("英文")
+    else:
+        text = make_srt(args.size << 20)
+    # what TranslateWidget.warm_up does while the window is idle: the
+    # one-off dictionary load is not part of showing a file
+    widget.translators.for_langs(Lang.from_str(widget.combo_left.currentText()),
+                                 Lang.from_str(widget.combo_right.currentText()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "input.srt")
+        with open(path, "w", encoding = "utf-8") as file:
+            file.write(text)
+        del text
+
+        ticks : list[float] = []
+        first : list[float] = []
+        timer = QTimer()
+        timer.setInterval(1)
+
+        def tick():
+            ticks.append(time.perf_counter())
+            if not first and widget.right_view.model().rowCount():
+                first.append(ticks[-1])
+        timer.timeout.connect(tick)
+
+        def start():
+            ticks.append(time.perf_counter())
+            widget.process_file(path)
+            widget.feeders[1].finished.connect(app.quit)
+        timer.start()
+        QTimer.singleShot(0, start)
+        app.exec()
+        timer.stop()
+        for thread in widget.large_threads:
+            thread.wait()
+
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+    p99  = gaps[min(len(gaps) - 1, int(len(gaps) * 0.99))]
+    print(
+        f"{args.size} MB {args.direction}: {widget.right_view.model().rowCount():,} lines in {ticks[-1] - ticks[0]:.2f}s, "
+        f"first translated line after {(first[0] - ticks[0]) * 1000 if first else float('nan'):.0f} ms\n"
+        f"event loop gap p50 {statistics.median(gaps):.1f} ms  p99 {p99:.1f} ms  worst {gaps[-1]:.1f} ms"
+    )
+    assert gaps[-1] <= args.max_gap, f"worst event loop gap {gaps[-1]:.1f} ms, over {args.max_gap} ms"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Characters and requests sent for a styled subtitle corpus with and without
+masking, and how many lines come back with their markup intact when the
+backend mangles markup the way online translators do.
+
+    python -m benchmarks.bench_masking --size 200000
+"""
+import argparse
+import re
+
+from benchmarks.corpus import STYLED_LINES, make_srt
+from src.utils.fake_backend import MockBackend
+from src.utils.srt import load_document
+from src.utils.translator import MyTranslator2
+
+
+class ManglingBackend(MockBackend):
+    """
+    Adds spaces inside tags, override blocks and placeholders, like the
+    online services do with text they do not understand.
+    """
+    async def translate_async(self, text : str) -> str:
+        result = await super().translate_async(text)
+        result = re.sub(r"<(/?)(\w+)", r"< \1 \2", result)
+        result = result.replace("{\\", "{ \\")
+        return re.sub(r"\{(\d+)\}", r"{ \1 }", result)
+
+
+def run(content : str, mask : bool, max_length : int):
+    translator = MyTranslator2(dest = "zh-TW", backends = [ManglingBackend("fake")], max_length = max_length)
+    translator.mask = mask
+    result = translator.do_translate(content)
+    # the fake only prefixes [zh-TW], so removing it must give the input back
+    original = load_document(content.strip()).lines()
+    returned = [each.replace("[zh-TW]", "") for each in load_document(result).lines()]
+    intact   = sum(a == b for a, b in zip(original, returned))
+    return translator.report, intact, len(original)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000, help="corpus size in characters")
+    parser.add_argument("--max-length", type=int, default=500, help="characters per request, small so the request count shows")
+    args = parser.parse_args()
+
+    content = make_srt(args.size, lines = STYLED_LINES)
+    for mask in (False, True):
+        report, intact, total = run(content, mask, args.max_length)
+        print(
+            f"mask {'on ' if mask else 'off'}  chars {report['chars']:>9,}  requests {report['requests']:>5}  "
+            f"lines intact {intact:>6,}/{total:,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+OpenCC throughput: per-line conversion (the old MyTranslator.translate loop)
+against the chunked bulk path.
+
+    python -m benchmarks.bench_opencc_bulk --sizes 1 10 100
+"""
+import argparse
+import time
+
+from opencc import OpenCC
+
+from benchmarks.corpus import make_srt
+from src.utils.translator import MyTranslator
+
+
+def per_line(cc : OpenCC, content : str) -> str:
+    new_text = ""
+    for each_line in content.split("\n"):
+        new_text += cc.convert(each_line) + "\n"
+    return new_text
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="input sizes in MB")
+    parser.add_argument("--skip-per-line", action="store_true")
+    args = parser.parse_args()
+
+    translator = MyTranslator()
+    for size_mb in args.sizes:
+        content = make_srt(size_mb << 20)
+        lines = content.count("\n") + 1
+
+        start = time.perf_counter()
+        bulk = translator.translate(content, show_progress = False)
+        bulk_time = time.perf_counter() - start
+        print(f"{size_mb:>4} MB  bulk     {lines / bulk_time:>14,.0f} lines/s  ({bulk_time:.2f}s)")
+
+        if args.skip_per_line:
+            continue
+        start = time.perf_counter()
+        legacy = per_line(translator.cc, content)
+        legacy_time = time.perf_counter() - start
+        print(f"{size_mb:>4} MB  per-line {lines / legacy_time:>14,.0f} lines/s  ({legacy_time:.2f}s)")
+        assert legacy == bulk, "bulk output differs from per-line output"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+OpenCC throughput with a user phrase dictionary of growing size, against
+plain OpenCC, plus the cost of compiling the dictionary and of loading it
+back from the disk cache.
+
+    python -m benchmarks.bench_phrases --entries 0 1000 10000 50000 --size 10
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.corpus import make_srt
+from src.utils.phrases import PhraseDictionary
+from src.utils.translator import MyTranslator
+
+
+def make_phrases(path : str, entries : int, seed : int = 0) -> None:
+    """
+    Random 2-5 character CJK entries, plus a few that hit the corpus.
+    """
+    rng   = random.Random(seed)
+    chars = [chr(code) for code in range(0x4E00, 0x4E00 + 20000)]
+    lines = {"鼠标" : "滑鼠", "网络" : "網路", "视频" : "影片"}
+    while len(lines) < entries:
+        word = "".join(rng.choices(chars, k = rng.randint(2, 5)))
+        lines[word] = word[::-1]
+    with open(path, "w", encoding = "utf-8") as file:
+        file.writelines(f"{key}\t{value}\n" for key, value in list(lines.items())[:entries])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, nargs="+", default=[0, 1000, 10000, 50000])
+    parser.add_argument("--size", type=int, default=10, help="input size in MB")
+    args = parser.parse_args()
+
+    content = make_srt(args.size << 20)
+    plain = MyTranslator()
+    start = time.perf_counter()
+    plain.translate(content, show_progress = False)
+    base = time.perf_counter() - start
+    print(f"plain OpenCC        {args.size / base:>7.2f} MB/s  ({base:.2f}s)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for entries in args.entries:
+            path  = os.path.join(directory, f"phrases_{entries}.txt")
+            cache = os.path.join(directory, "cache")
+            make_phrases(path, entries)
+
+            start = time.perf_counter()
+            PhraseDictionary(path, cache_dir = cache)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            phrases = PhraseDictionary(path, cache_dir = cache)
+            load = time.perf_counter() - start
+
+            translator = MyTranslator(phrases = phrases)
+            start = time.perf_counter()
+            translator.translate(content, show_progress = False)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{entries:>7,} entries  {args.size / elapsed:>7.2f} MB/s  ({elapsed:.2f}s, "
+                f"{elapsed / base:.2f}x plain)  build {build * 1000:.0f} ms  cached load {load * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
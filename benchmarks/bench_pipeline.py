@@ -0,0 +1,64 @@
+"""
+MyTranslator3 as a pipeline against running its stages one after the
+other, offline with MockBackend. Prints each stage alone, their sum (the
+old sequential cost) and the pipeline, whose output must be identical.
+
+    python -m benchmarks.bench_pipeline --size 1024 --latency 0.2
+"""
+import argparse
+import time
+
+from opencc import OpenCC
+
+from benchmarks.corpus import EN_WORDS, make_srt, unique_lines
+from src.utils.fake_backend import MockBackend
+from src.utils.progress import ProgressTracker
+from src.utils.scheduler import TokenBucket
+from src.utils.translator import MyTranslator, MyTranslator2, MyTranslator3
+
+
+def online(source : str, dest : str, args) -> MyTranslator2:
+    translator = MyTranslator2(source = source, dest = dest,
+                               backends = [MockBackend("fake", dest = dest, latency = args.latency)])
+    translator.concurrency = args.concurrency
+    translator.limiter = TokenBucket(rate = args.rate, capacity = args.concurrency)
+    return translator
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1024, help="corpus size in KB")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake request")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    chains = {
+        "en2tw" : (make_srt(args.size << 10, unique_lines(50000, EN_WORDS)),
+                   lambda: [online("en", "zh-CN", args), MyTranslator("s2twp")]),
+        "tw2en" : (OpenCC("s2twp").convert(make_srt(args.size << 10, unique_lines(50000))),
+                   lambda: [MyTranslator("tw2s"), online("zh-CN", "en", args)]),
+    }
+    for name, (text, make_stages) in chains.items():
+        first, second = make_stages()
+        middle, t1 = timed(first.do_translate, text, ProgressTracker())
+        sequential, t2 = timed(second.do_translate, middle, ProgressTracker())
+        pipeline = MyTranslator3(stages = make_stages())
+        result, total = timed(pipeline.do_translate, text, ProgressTracker())
+        assert result == sequential.strip(), f"{name}: pipeline output differs"
+        piped = [each.report["requests"] for each in pipeline.stages if isinstance(each, MyTranslator2)]
+        alone = [each.report["requests"] for each in (first, second) if isinstance(each, MyTranslator2)]
+        print(
+            f"{name}  stage 1 {t1:6.2f}s  stage 2 {t2:6.2f}s  sum {t1 + t2:6.2f}s  "
+            f"pipeline {total:6.2f}s  requests {piped[0]} (sequential {alone[0]})"
+        )
+
+
+if __name__ == "__main__":
+    main()
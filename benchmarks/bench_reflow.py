@@ -0,0 +1,86 @@
+"""
+Reflow throughput on a large SRT where a share of the cues (--long) has
+machine translated lines several times wider than a subtitle line (3-6 s
+cues, the rest fit already). Prints chars/s for OpenCC alone, OpenCC with
+reflow in the same pass, the write back of an online translation
+(fill_lines) with and without reflow, and how many cues were rewrapped
+and split.
+
+    python -m benchmarks.bench_reflow --size 32 --width 32 --split --long 0.2
+"""
+import argparse
+import random
+import time
+
+from benchmarks.corpus import unique_lines
+from src.utils.reflow import Reflow
+from src.utils.srt import format_ms, load_document
+from src.utils.translator import MyTranslator
+
+
+def make_corpus(size : int, long : float = 1.0, seed : int = 0) -> str:
+    rng   = random.Random(seed)
+    lines = ["".join(each.split()) for each in unique_lines(5000)]
+    parts : list[str] = []
+    total : int = 0
+    start : int = 0
+    index : int = 1
+    while total < size:
+        length = rng.randint(3000, 6000)
+        joined = rng.randint(2, 4) if rng.random() < long else 1
+        text   = "\n".join("，".join(rng.choice(lines) for _ in range(joined)) for _ in range(rng.randint(1, 2)))
+        cue    = f"{index}\n{format_ms(start)} --> {format_ms(start + length)}\n{text}\n\n"
+        parts.append(cue)
+        total += len(cue)
+        start += length + 200
+        index += 1
+    return "".join(parts)
+
+
+def best(func, repeat : int) -> tuple[object, float]:
+    times : list[float] = []
+    for _ in range(repeat):
+        start  = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=32, help="corpus size in MB")
+    parser.add_argument("--width", type=int, default=32)
+    parser.add_argument("--max-lines", type=int, default=2)
+    parser.add_argument("--split", action="store_true")
+    parser.add_argument("--long", type=float, default=0.2, help="share of cues with over-long lines")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text   = make_corpus(args.size << 20, args.long)
+    reflow = Reflow(args.width, args.max_lines, args.split)
+    plain  = MyTranslator("s2twp")
+    fused  = MyTranslator("s2twp", reflow = reflow)
+    document = load_document(text)
+    lines    = document.lines()
+
+    converted, t_plain = best(lambda: plain.do_translate(text), args.repeat)
+    result, t_fused    = best(lambda: fused.do_translate(text), args.repeat)
+    _, t_fill          = best(lambda: document.fill_lines(lines), args.repeat)
+    _, t_fill_reflow   = best(lambda: reflow.apply(document, document.fill_texts(lines)), args.repeat)
+    assert result == reflow(converted)[0]
+
+    output   = load_document(result)
+    rewraped = sum(reflow.lines(document.text(cue)) is not None for cue in document)
+    print(f"{len(text) / (1 << 20):.1f} MB, {len(document):,} cues: {rewraped:,} rewrapped, "
+          f"{len(output) - len(document):,} cues added by splits")
+    for name, seconds in [
+        ("OpenCC s2twp",               t_plain),
+        ("OpenCC s2twp + reflow",      t_fused),
+        ("fill_lines (online output)", t_fill),
+        ("fill_lines + reflow",        t_fill_reflow),
+    ]:
+        print(f"{name:<28} {seconds:7.3f}s  {len(text) / seconds:>14,.0f} chars/s")
+
+
+if __name__ == "__main__":
+    main()
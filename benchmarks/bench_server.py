@@ -0,0 +1,121 @@
+"""
+Load test for src.server on localhost: `connections` keep-alive clients
+post batches of subtitle lines for `duration` seconds. Prints requests/s,
+texts/s, p50/p99 latency and the status counts (503 = back-pressure).
+Starts its own server unless --port points at a running one.
+
+    python -m benchmarks.bench_server --connections 32 --batch 50 --duration 10
+    python -m benchmarks.bench_server --port 8765 --source en --dest tw    # running server
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.corpus import EN_WORDS, unique_lines
+
+
+async def request(reader, writer, method : str, path : str, body : bytes = b"") -> tuple[int, bytes]:
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status = int(head.split(" ", 2)[1])
+    length = next(int(line.split(":", 1)[1]) for line in head.split("\r\n") if line.lower().startswith("content-length"))
+    return status, await reader.readexactly(length)
+
+
+async def wait_ready(port : int, timeout : float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            status, _ = await request(reader, writer, "GET", "/health")
+            writer.close()
+            if status == 200:
+                return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError("server did not start")
+        await asyncio.sleep(0.2)
+
+
+async def client(port : int, bodies : list[bytes], deadline : float, latencies : list[float], statuses : Counter) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    i = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, "POST", "/translate", bodies[i % len(bodies)])
+        statuses[status] += 1
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        elif status == 503:
+            await asyncio.sleep(0.01)
+        i += 1
+    writer.close()
+
+
+async def run(args) -> None:
+    await wait_ready(args.port)
+    words = EN_WORDS if args.source == "en" else None
+    lines = unique_lines(args.batch * 20, words) if words else unique_lines(args.batch * 20)
+    bodies = [
+        json.dumps({"source" : args.source, "dest" : args.dest, "texts" : lines[i:i + args.batch]}, ensure_ascii = False).encode("utf-8")
+        for i in range(0, len(lines), args.batch)
+    ]
+    latencies : list[float] = []
+    statuses  : Counter = Counter()
+    start    = time.perf_counter()
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(*(client(args.port, bodies, deadline, latencies, statuses) for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    done = statuses[200]
+    def percentile(fraction : float) -> float:
+        return latencies[max(0, math.ceil(fraction * len(latencies)) - 1)] * 1000 if latencies else float("nan")
+    print(
+        f"{args.source}->{args.dest}  {args.connections} connections, batch {args.batch}: "
+        f"{done / elapsed:,.0f} req/s  {done * args.batch / elapsed:,.0f} texts/s  "
+        f"p50 {percentile(0.5):.1f} ms  p99 {percentile(0.99):.1f} ms  statuses {dict(statuses)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=None, help="a running server; default start one")
+    parser.add_argument("--source", default="cn")
+    parser.add_argument("--dest", default="tw")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--batch", type=int, default=50, help="texts per request")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes of the started server")
+    parser.add_argument("--max-pending", type=int, default=64)
+    args = parser.parse_args()
+
+    server = None
+    if args.port is None:
+        args.port = 18765
+        server = subprocess.Popen(
+            [sys.executable, "-m", "src.server", "--port", str(args.port), "-j", str(args.jobs),
+             "--max-pending", str(args.max_pending), "--no-cache"],
+            stdout = subprocess.DEVNULL,
+        )
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
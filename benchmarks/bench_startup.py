@@ -0,0 +1,60 @@
+"""
+Startup cost of the GUI: import time of the window module and time until
+the first window has been shown. Each run is a fresh interpreter.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --widget translate   # without the TTS tab
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+if {widget!r} == "main":
+    from src.mygui import MainWindow as Window
+else:
+    from src.gui.translate_gui import TranslateWidget as Window
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+window = Window()
+window.show()
+shown = {{}}
+def first_frame():
+    shown["t"] = time.perf_counter()
+    app.quit()
+QTimer.singleShot(0, first_frame)
+app.exec()
+print(json.dumps({{"import" : imported - start, "first_window" : shown["t"] - start}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--widget", choices=["main", "translate"], default="main")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    samples : dict[str, list[float]] = {"import" : [], "first_window" : []}
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD.format(widget = args.widget)],
+            capture_output = True, text = True, check = True, env = env,
+        ).stdout.strip().splitlines()[-1]
+        for key, value in json.loads(out).items():
+            samples[key].append(value)
+
+    for key, values in samples.items():
+        print(f"{key:<13} median {statistics.median(values) * 1000:>7.1f} ms  min {min(values) * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Peak RSS of MyTranslator.convert_file for growing inputs.
+Each size runs in its own process so ru_maxrss is not shared. Fails when
+the peak grows with the input by more than --max-growth MB.
+
+    python -m benchmarks.bench_stream_memory --sizes 10 50 200
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import make_srt
+
+# peak RSS may grow this much from the smallest to the largest input: a few
+# chunks in flight plus allocator noise, far below the input size
+MAX_GROWTH_MB : float = 16
+
+
+def child(src : str, dst : str, chunk_size : int):
+    from src.utils.translator import MyTranslator
+
+    translator = MyTranslator()
+    start = time.perf_counter()
+    translator.convert_file(src, dst, chunk_size = chunk_size)
+    elapsed = time.perf_counter() - start
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, elapsed)
+
+
+def measure(sizes : list[int], chunk_size : int, directory : str) -> list[tuple[int, int, float]]:
+    """
+    :return: (size in MB, peak RSS in KB, seconds) per size, smallest first
+    """
+    src = os.path.join(directory, "input.srt")
+    dst = os.path.join(directory, "output.srt")
+    block = make_srt(1 << 20)
+    written = 0
+    results : list[tuple[int, int, float]] = []
+    for size_mb in sorted(sizes):
+        # grow the same input file instead of regenerating it
+        with open(src, "a", encoding = "utf-8", newline = "") as file:
+            while written < size_mb:
+                file.write(block)
+                written += 1
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_stream_memory",
+             "--chunk-size", str(chunk_size), "--child", src, dst],
+            capture_output = True, text = True, check = True,
+        ).stdout.split()
+        results.append((size_mb, int(out[0]), float(out[1])))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="input sizes in MB")
+    parser.add_argument("--chunk-size", type=int, default=1 << 20)
+    parser.add_argument("--max-growth", type=float, default=MAX_GROWTH_MB, help="allowed peak RSS growth in MB")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, chunk_size = args.chunk_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = measure(args.sizes, args.chunk_size, tmp)
+    for size_mb, peak_kb, elapsed in results:
+        print(f"{size_mb:>5} MB  peak RSS {peak_kb / 1024:>8.1f} MB  {size_mb / elapsed:>7.1f} MB/s")
+
+    growth = (results[-1][1] - results[0][1]) / 1024
+    print(f"peak RSS growth across sizes: {growth:.1f} MB")
+    assert growth <= args.max_growth, f"peak RSS grew {growth:.1f} MB with the input, more than {args.max_growth} MB"
+
+
+if __name__ == "__main__":
+    main()
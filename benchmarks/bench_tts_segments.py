@@ -0,0 +1,46 @@
+"""
+Segment cache, concurrency and time to first audio of SegmentSynthesizer
+with the offline FakeTTS: full synthesis, then the same text with one
+sentence edited.
+
+    python -m benchmarks.bench_tts_segments --sentences 200 --latency 0.2
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from src.utils.fake_backend import FakeTTS
+from src.utils.tts_segments import SegmentSynthesizer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    for level in args.levels:
+        sentences = [f"這是第{i}句話。" for i in range(args.sentences)]
+        with tempfile.TemporaryDirectory() as tmp:
+            fake = FakeTTS(latency = args.latency)
+            synthesizer = SegmentSynthesizer(tmp, stream = fake.stream, concurrency = level)
+
+            start = time.perf_counter()
+            asyncio.run(synthesizer.save("".join(sentences), "voice", 0, 0, f"{tmp}/out.mp3"))
+            full = time.perf_counter() - start
+            first_audio = synthesizer.report["first_audio_ms"]
+
+            sentences[len(sentences) // 2] = "改過的一句話。"
+            start = time.perf_counter()
+            asyncio.run(synthesizer.save("".join(sentences), "voice", 0, 0, f"{tmp}/out.mp3"))
+            edited = time.perf_counter() - start
+            print(
+                f"concurrency {level:>3}  full {full:>6.2f}s  first audio {first_audio:>6.0f} ms  "
+                f"after one edit {edited:>6.3f}s  synthesized {synthesizer.report['synthesized']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
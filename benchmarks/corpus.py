@@ -0,0 +1,73 @@
+"""
+Synthetic subtitle corpora for the benchmarks.
+"""
+import random
+
+from src.utils.srt import format_ms
+
+CN_LINES = [
+    "这个软件的信息已经更新了",
+    "我们去吃饭吧",
+    "打印机的内存不够用",
+    "你的鼠标坏了吗",
+    "头发剪短了以后好看多了",
+    "他在网络上发布了一个视频",
+]
+
+# styled subtitles: HTML tags, ASS override blocks, numbers and URLs
+STYLED_TEMPLATES = [
+    "{{\\an8}}<i>{}</i>",
+    "<font color=\"#ffff00\">{}</font>",
+    "<b>{}</b>，还剩 2048 MB",
+    "{{\\i1}}{}{{\\i0}}",
+    "第 2019 年<i>{}</i>",
+    "{} https://example.com/news/2019/05",
+    "- {}\\N- 是吗",
+]
+STYLED_LINES = [each.format(line) for each in STYLED_TEMPLATES for line in CN_LINES] + ["<i>♪ ♪</i>", "1234567"]
+
+# words for corpora with mostly distinct lines, so online runs are not all dedup / cache hits
+CN_WORDS = [
+    "我们", "这个", "软件", "信息", "已经", "更新", "吃饭", "打印机", "内存", "鼠标",
+    "头发", "网络", "发布", "视频", "学习", "电脑", "手机", "程序", "数据", "服务器",
+    "今天", "明天", "为什么", "怎么", "没有", "觉得", "应该", "可以", "朋友", "老师",
+]
+EN_WORDS = [
+    "we", "this", "software", "message", "already", "updated", "dinner", "printer", "memory", "mouse",
+    "hair", "network", "posted", "video", "learn", "computer", "phone", "program", "data", "server",
+    "today", "tomorrow", "why", "how", "never", "think", "should", "could", "friend", "teacher",
+]
+
+
+def unique_lines(count : int, words : list[str] = CN_WORDS, seed : int = 0) -> list[str]:
+    """
+    :return: `count` lines of 3 to 8 random words, nearly all distinct
+    """
+    rng = random.Random(seed)
+    separator = " " if words is EN_WORDS else ""
+    return [separator.join(rng.choices(words, k = rng.randint(3, 8))) for _ in range(count)]
+
+
+def make_srt(size : int, lines : list[str] = CN_LINES, seed : int = 0) -> str:
+    """
+    Build an SRT document of about `size` characters.
+
+    :param size: Target length in characters
+    :param lines: Subtitle lines to sample from
+    :return: SRT text
+    """
+    rng = random.Random(seed)
+    parts : list[str] = []
+    total : int = 0
+    index : int = 1
+    while total < size:
+        start = index * 2000
+        cue = (
+            f"{index}\n{format_ms(start)} --> {format_ms(start + 1500)}\n"
+            + "\n".join(rng.choice(lines) for _ in range(rng.randint(1, 2)))
+            + "\n\n"
+        )
+        parts.append(cue)
+        total += len(cue)
+        index += 1
+    return "".join(parts)
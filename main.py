@@ -1,9 +1,16 @@
+from src.gui.large_text import SWITCH_INTERVAL
 from src.mygui import MainWindow
 
 if __name__ == "__main__":
+    import multiprocessing
     import sys
     from PyQt6.QtWidgets import QApplication
 
+    # the job queue uses worker processes, needed for the pyinstaller exe
+    multiprocessing.freeze_support()
+    # worker threads hand the GIL back to the GUI thread sooner
+    sys.setswitchinterval(SWITCH_INTERVAL)
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,158 @@
+"""
+Headless batch conversion.
+
+    cn2tw -s 簡體 -d 繁體 subtitles/ "season1/*.srt" extra.txt
+"""
+from __future__ import annotations
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from src.utils.batch import convert_local
+from src.utils.lang import Lang, create_translator, get_direction, is_local, output_path
+from src.utils.reflow import Reflow
+from src.utils.textio import read_text, write_text
+
+SUFFIXES : tuple[str, ...] = (".srt", ".txt")
+
+def convert_online(translator, src : str, dst : str, encoding : str = "utf-8") -> tuple[str, int]:
+    """
+    :param encoding: Output encoding, the input's when None
+    """
+    decoded = read_text(src)
+    result  = translator.do_translate(decoded.text)
+    write_text(dst, result, encoding or decoded.encoding, decoded.newline)
+    return dst, len(result)
+
+
+def collect_files(patterns : list[str], dest : Lang) -> list[Path]:
+    """
+    Expand files, globs and directories into .srt / .txt files.
+    Files that already look like our output for `dest` are skipped when
+    they come from a directory or a glob.
+    """
+    files : dict[Path, None] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_file():
+            files[path] = None
+            continue
+        if path.is_dir():
+            found = [each for each in path.rglob("*") if each.is_file()]
+        else:
+            found = [Path(each) for each in glob.glob(pattern, recursive = True) if os.path.isfile(each)]
+        if not found:
+            print(f"[!] {pattern} 找不到任何文件", file = sys.stderr)
+        for each in sorted(found):
+            if each.suffix in SUFFIXES and not each.stem.endswith(dest.value):
+                files[each] = None
+    return list(files)
+
+
+def main(argv : list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog = "cn2tw", description = "簡繁英字幕批次轉換")
+    parser.add_argument("paths", nargs = "+", help = "files, globs or directories")
+    parser.add_argument("-s", "--source", default = "簡體", help = "簡體 / 繁體 / 英文 / 香港繁體 / 標準繁體 / 日文漢字 (or cn / tw / en / hk / hant / jp)")
+    parser.add_argument("-d", "--dest", default = "繁體", help = "as --source, plus 繁體 (不轉用詞) (tw-chars)")
+    parser.add_argument("-o", "--output-dir", default = None, help = "write outputs here instead of next to the inputs")
+    parser.add_argument("-j", "--jobs", type = int, default = os.cpu_count(), help = "worker processes for OpenCC directions")
+    parser.add_argument("-p", "--phrases", default = None, help = "phrase file (source<TAB>replacement per line) applied around OpenCC")
+    parser.add_argument("-e", "--encoding", default = "utf-8", help = "output encoding, e.g. utf-8, utf-8-sig, big5, gb18030; 'same' keeps the input's")
+    parser.add_argument("-w", "--width", type = int, default = None, help = "rewrap cue lines wider than this many columns (CJK counts two), e.g. 32")
+    parser.add_argument("--max-lines", type = int, default = 2, help = "lines per cue when rewrapping")
+    parser.add_argument("--split", action = "store_true", help = "split rewrapped cues over --max-lines into several cues, timed by reading speed")
+    args = parser.parse_args(argv)
+    encoding = None if args.encoding == "same" else args.encoding
+    reflow   = Reflow(args.width, args.max_lines, args.split) if args.width else None
+
+    source = Lang.from_str(args.source)
+    dest   = Lang.from_str(args.dest)
+    direction = get_direction(source, dest)
+    if direction is None:
+        parser.error("source and dest are the same language")
+
+    if args.phrases:
+        from src.utils.phrases import PhraseDictionary
+
+        # compiled once here, the workers find it in the on-disk cache
+        for number, line in PhraseDictionary(args.phrases).skipped:
+            print(f"[!] {args.phrases} line {number} skipped: {line!r}", file = sys.stderr)
+
+    files = collect_files(args.paths, dest)
+    if not files:
+        return 1
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok = True)
+    jobs = [(str(each), str(output_path(each, dest, args.output_dir))) for each in files]
+
+    start  = time.perf_counter()
+    failed : int = 0
+    if is_local(direction):
+        with ProcessPoolExecutor(max_workers = max(1, min(args.jobs, len(jobs)))) as pool:
+            futures = {pool.submit(convert_local, direction, src, dst, args.phrases, encoding, reflow) : src for src, dst in jobs}
+            for future in as_completed(futures):
+                try:
+                    dst, _ = future.result()
+                    print(f"[*] {futures[future]} -> {dst}")
+                except Exception as e:
+                    failed += 1
+                    print(f"[!] {futures[future]}: {e}", file = sys.stderr)
+    else:
+        # online directions are network bound, the translator already keeps
+        # several requests in flight, so files go one after another
+        from src.utils.translation_memory import TranslationMemory
+
+        translator = create_translator(direction, cache = TranslationMemory(), phrases = args.phrases, reflow = reflow)
+        for src, dst in jobs:
+            try:
+                convert_online(translator, src, dst, encoding)
+                print(f"[*] {src} -> {dst} {translator.report}")
+            except Exception as e:
+                failed += 1
+                print(f"[!] {src}: {e}", file = sys.stderr)
+
+    print(f"[*] {len(jobs) - failed}/{len(jobs)} files, {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+def dub_main(argv : list[str] = None) -> int:
+    """
+    cn2tw-dub: voice an SRT file into one MP3 track aligned to the cue times.
+    """
+    import asyncio
+    import tempfile
+
+    from src.utils.audio_cache import AudioCache
+    from src.utils.srt_audio import format_report, render_srt
+    from src.utils.tts_segments import SegmentSynthesizer
+
+    parser = argparse.ArgumentParser(prog = "cn2tw-dub", description = "字幕配音: 每句字幕依時間軸合成語音")
+    parser.add_argument("srt", help = "input .srt file")
+    parser.add_argument("-o", "--output", default = None, help = "output .mp3, default <stem>.mp3 next to the input")
+    parser.add_argument("--voice", default = "zh-TW-HsiaoChenNeural")
+    parser.add_argument("--rate", type = int, default = 0, help = "-100 to 100 (%%)")
+    parser.add_argument("--pitch", type = int, default = 0, help = "-100 to 100 (Hz)")
+    parser.add_argument("-j", "--jobs", type = int, default = 8, help = "cues synthesized at the same time")
+    args = parser.parse_args(argv)
+
+    src    = Path(args.srt)
+    output = args.output or str(src.with_suffix(".mp3"))
+    cache  = AudioCache(os.path.join(tempfile.gettempdir(), "tts_cache"))
+    synthesizer = SegmentSynthesizer(cache, concurrency = args.jobs)
+
+    start = time.perf_counter()
+    track, report = asyncio.run(render_srt(read_text(src).text, synthesizer, args.voice, args.rate, args.pitch))
+    Path(output).write_bytes(track)
+
+    for line in format_report(report):
+        print(f"[!] {line}")
+    print(f"[*] {len(report)} cues -> {output}, {synthesizer.report}, {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from src.utils.batch import translate_file
+from src.utils.lang import is_local
+from src.utils.registry import TranslatorRegistry
+from src.utils.textio import read_text
+
+
+def _translate_online(translator, path : str) -> str:
+    return translator.do_translate(read_text(path).text)
+
+
+class JobQueue(QObject):
+    """
+    Translate many files with a bounded pool: OpenCC directions run in worker
+    processes (one per core), online directions in a few threads sharing one
+    translator. Results are kept per file and reported through signals on
+    the GUI thread.
+    """
+    job_finished = pyqtSignal(str, str)   # path, result
+    job_failed   = pyqtSignal(str, str)   # path, error
+    all_done     = pyqtSignal()
+
+    # futures call back from pool threads, this signal moves them to the GUI thread
+    _completed   = pyqtSignal(str, object, object)
+
+    def __init__(self, registry : TranslatorRegistry, max_workers : int = None, online_workers : int = 2) -> None:
+        super().__init__()
+        self.registry       = registry
+        self.max_workers    = max_workers or os.cpu_count() or 1
+        self.online_workers = online_workers
+        self.pending        : int = 0
+        self.results        : dict[str, str] = {}
+        self.errors         : dict[str, str] = {}
+        self._process_pool  : ProcessPoolExecutor = None
+        self._thread_pool   : ThreadPoolExecutor  = None
+        self._completed.connect(self._on_completed)
+
+    def _processes(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers = self.max_workers)
+        return self._process_pool
+
+    def _threads(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers = self.online_workers)
+        return self._thread_pool
+
+    def submit(self, paths : list[str], direction : str) -> None:
+        """
+        :param paths: Files to translate
+        :param direction: A key of src.utils.lang.DIRECTIONS
+        """
+        for path in paths:
+            path = str(path)
+            self.results.pop(path, None)
+            self.errors.pop(path, None)
+            self.pending += 1
+            if is_local(direction):
+                future = self._processes().submit(translate_file, direction, path, self.registry.phrases)
+            else:
+                future = self._threads().submit(_translate_online, self.registry.get(direction), path)
+            future.add_done_callback(partial(self._on_future_done, path))
+
+    def _on_future_done(self, path : str, future : Future) -> None:
+        try:
+            self._completed.emit(path, future.result(), None)
+        except Exception as e:
+            self._completed.emit(path, None, e)
+
+    def _on_completed(self, path : str, result : str, error : Exception) -> None:
+        self.pending -= 1
+        if error is None:
+            self.results[path] = result
+            self.job_finished.emit(path, result)
+        else:
+            self.errors[path] = str(error)
+            self.job_failed.emit(path, str(error))
+        if self.pending == 0:
+            self.all_done.emit()
+
+    def shutdown(self) -> None:
+        for pool in (self._process_pool, self._thread_pool):
+            if pool is not None:
+                pool.shutdown(wait = False, cancel_futures = True)
+        self._process_pool = self._thread_pool = None
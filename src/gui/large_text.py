@@ -0,0 +1,198 @@
+"""
+Read-only, virtualized view of very large texts. Only the line offsets are
+indexed; the view asks for the lines it shows, so a 50 MB file costs the
+same to scroll as a small one. Text is appended in chunks, each small
+enough to keep the GUI thread responsive.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate, repeat
+from operator import add
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QPainter, QPalette
+from PyQt6.QtWidgets import QAbstractScrollArea
+
+from src.utils.translator import iter_line_chunks
+
+# files bigger than this (bytes) are shown in the large document mode
+LARGE_FILE_SIZE : int = 2 << 20
+# characters indexed per event loop turn, under 10 ms
+FEED_CHUNK_SIZE : int = 128 << 10
+# characters per OpenCC call in a worker, which holds the GIL through each;
+# the GUI thread waits up to that long every time it needs the GIL back
+CONVERT_SLICE   : int = 16 << 10
+# ms after startup before the selected direction's translator is built
+WARM_UP_DELAY   : int = 1000
+# s, sys.setswitchinterval of the GUI process (Python's default is 5 ms):
+# how long the GUI thread may wait for a worker to drop the GIL, per call
+SWITCH_INTERVAL : float = 0.001
+
+
+class LineModel(QObject):
+    """
+    Lines of a text kept as the appended chunks plus, per chunk, the
+    offsets of its line starts.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, parent : QObject = None) -> None:
+        super().__init__(parent)
+        self.clear()
+
+    def clear(self) -> None:
+        self._chunks  : list[str] = []
+        self._offsets : list[array] = []
+        self._starts  : list[int] = []     # first row of each chunk
+        self._rows    : int = 0
+        self._rest    : str = ""           # unfinished last line
+        self.changed.emit()
+
+    def _add(self, chunk : str, count : int) -> None:
+        self._chunks.append(chunk)
+        self._offsets.append(array("q", accumulate(map(add, map(len, chunk.split("\n")), repeat(1)), initial = 0)))
+        self._starts.append(self._rows)
+        self._rows += count
+        self.changed.emit()
+
+    def append(self, text : str) -> None:
+        """
+        Add text; complete lines show up at once, a trailing partial line
+        waits for the next append or finish().
+        """
+        data = self._rest + text
+        cut  = data.rfind("\n") + 1
+        self._rest = data[cut:]
+        if cut:
+            self._add(data[:cut], data.count("\n", 0, cut))
+
+    def finish(self) -> None:
+        if self._rest:
+            rest, self._rest = self._rest, ""
+            self._add(rest, rest.count("\n") + 1)
+
+    def text(self) -> str:
+        return "".join(self._chunks) + self._rest
+
+    def chunks(self) -> list[str]:
+        """
+        The text as appended, without joining it (a copy of a large text
+        would hold the GUI thread).
+        """
+        return self._chunks + ([self._rest] if self._rest else [])
+
+    def rowCount(self) -> int:
+        return self._rows
+
+    def line(self, row : int) -> str:
+        chunk   = bisect_right(self._starts, row) - 1
+        offsets = self._offsets[chunk]
+        local   = row - self._starts[chunk]
+        return self._chunks[chunk][offsets[local]:offsets[local + 1] - 1]
+
+
+class LineView(QAbstractScrollArea):
+    """
+    Draws only the lines in sight, the scroll bar counts lines. Nothing is
+    laid out per line, so appending to a model of millions of lines costs
+    the same as to an empty one (item views walk every row on insert).
+    """
+    MARGIN : int = 4
+
+    def __init__(self, parent = None) -> None:
+        super().__init__(parent)
+        self._model : LineModel = None
+        self.setModel(LineModel(self))
+        self.horizontalScrollBar().setSingleStep(20)
+
+    def model(self) -> LineModel:
+        return self._model
+
+    def setModel(self, model : LineModel) -> None:
+        if self._model is not None:
+            self._model.changed.disconnect(self._update_range)
+        self._model = model
+        model.changed.connect(self._update_range)
+        self._update_range()
+
+    def _page(self) -> int:
+        return max(1, (self.viewport().height() - self.MARGIN) // self.fontMetrics().lineSpacing())
+
+    def _update_range(self) -> None:
+        page = self._page()
+        bar  = self.verticalScrollBar()
+        bar.setPageStep(page)
+        bar.setRange(0, max(0, self._model.rowCount() - page))
+        self.viewport().update()
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self._update_range()
+
+    def scrollContentsBy(self, dx : int, dy : int) -> None:
+        self.viewport().update()
+
+    def paintEvent(self, event) -> None:
+        painter = QPainter(self.viewport())
+        painter.setPen(self.palette().color(QPalette.ColorRole.Text))
+        metrics = self.fontMetrics()
+        first   = self.verticalScrollBar().value()
+        last    = min(self._model.rowCount(), first + self._page() + 1)
+        left    = self.MARGIN - self.horizontalScrollBar().value()
+        widest  = 0
+        for i, row in enumerate(range(first, last)):
+            line = self._model.line(row)
+            widest = max(widest, metrics.horizontalAdvance(line))
+            painter.drawText(left, self.MARGIN + i * metrics.lineSpacing() + metrics.ascent(), line)
+        painter.end()
+        # horizontal range follows the widest line in sight
+        bar = self.horizontalScrollBar()
+        bar.setPageStep(self.viewport().width())
+        bar.setRange(0, max(bar.value(), widest + 2 * self.MARGIN - self.viewport().width(), 0))
+
+
+class ChunkFeeder(QObject):
+    """
+    Append text to a LineModel one chunk per event loop turn. Text can be
+    pushed while earlier chunks are still pending (e.g. translated blocks
+    arriving from a worker); close() marks the end. Big texts should be cut
+    by the worker and handed over with extend(), cutting them here would
+    block the GUI thread.
+    """
+    finished = pyqtSignal()
+
+    def __init__(self, model : LineModel, chunk_size : int = FEED_CHUNK_SIZE) -> None:
+        super().__init__(model)
+        self.model      = model
+        self.chunk_size = chunk_size
+        self.pending    : deque[str] = deque()
+        self.closed     : bool = False
+        self.timer      = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._step)
+
+    def push(self, text : str) -> None:
+        self.extend(iter_line_chunks(text, self.chunk_size))
+
+    def extend(self, chunks : list[str]) -> None:
+        self.pending.extend(chunks)
+        self.timer.start()
+
+    def close(self) -> None:
+        self.closed = True
+        self.timer.start()
+
+    def stop(self) -> None:
+        self.timer.stop()
+        self.pending.clear()
+
+    def _step(self) -> None:
+        if self.pending:
+            self.model.append(self.pending.popleft())
+            return
+        self.timer.stop()
+        if self.closed:
+            self.model.finish()
+            self.finished.emit()
@@ -1,32 +1,44 @@
 from __future__ import annotations
+import threading
+from functools import partial
 from pathlib import Path
 
-from PyQt6.QtWidgets import QLabel, QFileDialog, QVBoxLayout, QWidget, QHBoxLayout, QTextEdit, QComboBox
-from PyQt6.QtCore    import Qt, QUrl, QThread, pyqtSignal
-from PyQt6.QtGui     import QDragEnterEvent, QMouseEvent
-
-from src.utils.translator import MyTranslator, MyTranslator2, MyTranslator3
-from enum import Enum
-
-class Lang(Enum):
-    EN = 'en'
-    TW = 'zh-TW'
-    CN = 'zh-CN'
-
-    @classmethod
-    def from_str(cls, string : str) -> Lang:
-        if string == "英文":
-            return Lang.EN
-
-        if string == "繁體":
-            return Lang.TW
+from PyQt6.QtWidgets import QLabel, QFileDialog, QVBoxLayout, QWidget, QHBoxLayout, QTextEdit, QComboBox, QListWidget, QListWidgetItem, QProgressBar
+from PyQt6.QtCore    import Qt, QUrl, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui     import QDragEnterEvent, QMouseEvent, QTextCursor
+
+from src.utils.translator import MyTranslator, iter_line_chunks
+from src.utils.progress import CancelToken, Progress, ProgressTracker
+from src.utils.translation_memory import TranslationMemory
+from src.utils.registry import TranslatorRegistry
+from src.utils.lang import Lang, get_direction, output_path
+from src.utils.phrases import default_path
+from src.utils.textio import iter_text, sniff, write_text
+from src.gui.job_queue import JobQueue
+from src.utils.incremental import IncrementalTranslator, Patch
+from src.gui.large_text import CONVERT_SLICE, FEED_CHUNK_SIZE, LARGE_FILE_SIZE, WARM_UP_DELAY, ChunkFeeder, LineView
+
+class ProgressThread(QThread):
+    """
+    A worker whose translator reports through self.tracker: progress_signal
+    carries Progress snapshots to the GUI thread, cancel() is safe to call
+    from the GUI thread.
+    """
+    progress_signal = pyqtSignal(object)   # Progress
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.cancel_token = CancelToken()
+        self.tracker      = ProgressTracker(callback = self.progress_signal.emit, cancel = self.cancel_token)
 
-        if string == "簡體":
-            return Lang.CN
+    def cancel(self) -> None:
+        self.cancel_token.cancel()
 
-        raise Exception("Unsupport language")
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_token.cancelled
 
-class TranslateThread(QThread):
+class TranslateThread(ProgressThread):
     trans_signal = pyqtSignal(str)
 
     def __init__(self, func , text : str, *args, **kwargs) -> None:
@@ -35,9 +47,35 @@ class TranslateThread(QThread):
         self.text = text
 
     def run(self):
-        result = self.func(self.text)
+        result = self.func(self.text, progress = self.tracker)
         self.trans_signal.emit(result)
 
+class LargeTranslateThread(ProgressThread):
+    """
+    Read (when given a path) and translate a large document. The input and
+    the translation are sent already cut into FEED_CHUNK_SIZE pieces, as
+    lists of str objects (no copy into QString), so the GUI thread only
+    indexes them. The document is never held as one str: it is read,
+    translated and cut piece by piece, each step short enough not to hold
+    the GIL for a frame.
+    """
+    loaded_signal = pyqtSignal(object)   # input chunks
+    chunk_signal  = pyqtSignal(object)   # translated chunks
+    done_signal   = pyqtSignal()
+
+    def __init__(self, func, chunks : list[str] = None, path : str = None, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.func   = func
+        self.chunks = chunks
+        self.path   = path
+
+    def run(self):
+        chunks = self.chunks if self.path is None else list(iter_text(self.path, FEED_CHUNK_SIZE))
+        self.loaded_signal.emit(chunks)
+        for result in self.func(chunks, self.tracker):
+            self.chunk_signal.emit(list(iter_line_chunks(result, FEED_CHUNK_SIZE)))
+        self.done_signal.emit()
+
 class TranslateWidget(QWidget):
     LABEL_SYTLE = "border: 2px solid white; border-radius: 5px;font-size: 20px;"
     def __init__(self):
@@ -45,15 +83,25 @@ class TranslateWidget(QWidget):
 
         self.final_filepath = "translated.srt"
         self.is_translating = False
-        self.mytrans_cn2tw  = MyTranslator()
-        self.mytrans_tw2cn  = MyTranslator(mode = "tw2s")
-        self.mytrans_2cn    = MyTranslator2(dest = "zh-CN")
-        self.mytrans_2en    = MyTranslator2(source = 'zh-CN',dest = "en")
-        self.mytrans_en2tw  = MyTranslator3(source = 'en', dest = 'zh-TW')
-        self.mytrans_tw2en  = MyTranslator3(dest = 'en', source= 'zh-TW')
+        # translators are built on first use, see TranslatorRegistry
+        # phrases.txt next to the program holds the user's own fixed translations
+        self.translators    = TranslatorRegistry(cache_factory = TranslationMemory, phrases = default_path())
 
         self.this_end = ""
+        self.incremental     = IncrementalTranslator()
+        self.pending_patches = None
+        self.jobs            = JobQueue(self.translators)
+        self.job_items       : dict[str, QListWidgetItem] = {}
+        self.job_dest        : dict[str, Lang] = {}
+        # 大檔案模式: 兩邊改用唯讀的 LineView, 只排版看得到的行
+        self.large_mode      = False
+        self.large_run       : int = 0
+        self.feeders         : list[ChunkFeeder] = []
+        self.large_threads   : list[LargeTranslateThread] = []
+        # 正在跑的翻譯, 取消按鈕用
+        self.active_thread   : ProgressThread = None
         self.setup_gui()
+        QTimer.singleShot(WARM_UP_DELAY, self.warm_up)
 
     def setup_gui(self):
         self.central_widget = self
@@ -72,10 +120,14 @@ class TranslateWidget(QWidget):
         self._layout.addWidget(self.label)
 
         self.combo_left = QComboBox()
-        self.combo_left.addItems(["簡體","繁體","英文" ])
+        self.combo_left.addItems(["簡體","繁體","英文", "香港繁體", "標準繁體", "日文漢字"])
 
         self.combo_right = QComboBox()
-        self.combo_right.addItems(["繁體","英文", "簡體"])
+        self.combo_right.addItems(["繁體","英文", "簡體", "香港繁體", "繁體 (不轉用詞)", "標準繁體", "日文漢字"])
+
+        # 換了語言就先在背景載入字典
+        self.combo_left.currentIndexChanged.connect(self.warm_up)
+        self.combo_right.currentIndexChanged.connect(self.warm_up)
 
         h_layout = QHBoxLayout()
         h_layout.addWidget(self.combo_left)
@@ -97,6 +149,15 @@ class TranslateWidget(QWidget):
         self.right_input.setPlaceholderText("得到繁體")
         self.input_layout.addWidget(self.right_input)
 
+        self.left_view  = LineView()
+        self.right_view = LineView()
+        self.input_layout.insertWidget(1, self.left_view)
+        self.input_layout.addWidget(self.right_view)
+        self.left_view.hide()
+        self.right_view.hide()
+        self.left_view.verticalScrollBar().valueChanged.connect(self.right_view.verticalScrollBar().setValue)
+        self.right_view.verticalScrollBar().valueChanged.connect(self.left_view.verticalScrollBar().setValue)
+
         # 設置輸入框的滾動條同步
         self.right_input.verticalScrollBar().valueChanged.connect(self.left_input.verticalScrollBar().setValue)
         self.right_input.horizontalScrollBar().valueChanged.connect(self.left_input.horizontalScrollBar().setValue)
@@ -131,6 +192,20 @@ class TranslateWidget(QWidget):
         # label client event
         self._layout.addLayout(self.clear_convert_button)
 
+        # 翻譯進度和取消, 取消後保留已經翻好的部分
+        self.progress_layout = QHBoxLayout()
+        self.trans_progress = QProgressBar()
+        self.trans_progress.hide()
+        self.progress_layout.addWidget(self.trans_progress)
+        self.cancel_button = QLabel("取消")
+        self.cancel_button.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.cancel_button.setStyleSheet(self.LABEL_SYTLE)
+        self.cancel_button.mousePressEvent   = self.cancel_button_press
+        self.cancel_button.mouseReleaseEvent = self.cancel_button_click_event
+        self.cancel_button.hide()
+        self.progress_layout.addWidget(self.cancel_button)
+        self._layout.addLayout(self.progress_layout)
+
 
 
         self.button_layout = QHBoxLayout()
@@ -141,8 +216,31 @@ class TranslateWidget(QWidget):
         # label client event
         self.save_button.mousePressEvent   = self.save_button_press_event
         self.save_button.mouseReleaseEvent = self.save_button_click_event
+        # 多檔案: 全部保存到資料夾
+        self.save_all_button = QLabel("全部保存")
+        self.save_all_button.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.save_all_button.setStyleSheet(self.LABEL_SYTLE)
+        self.button_layout.addWidget(self.save_all_button)
+        self.save_all_button.mousePressEvent   = self.save_all_button_press_event
+        self.save_all_button.mouseReleaseEvent = self.save_all_button_click_event
+        self.save_all_button.hide()
         self._layout.addLayout(self.button_layout)
 
+        # 多檔案處理進度, 點擊檔案可以查看結果
+        self.job_progress = QProgressBar()
+        self.job_progress.setFormat("%v / %m")
+        self.job_progress.hide()
+        self._layout.addWidget(self.job_progress)
+        self.job_list = QListWidget()
+        self.job_list.setMaximumHeight(150)
+        self.job_list.itemClicked.connect(self.job_item_clicked)
+        self.job_list.hide()
+        self._layout.addWidget(self.job_list)
+
+        self.jobs.job_finished.connect(self.job_finished)
+        self.jobs.job_failed.connect(self.job_failed)
+        self.jobs.all_done.connect(self.jobs_all_done)
+
     def switch_button_press(self, event : QMouseEvent):
         self.switch_button.setStyleSheet(self.LABEL_SYTLE + "color: #d3b08d;")
 
@@ -151,6 +249,10 @@ class TranslateWidget(QWidget):
         # check if mouse release event is in label area
         if not self.switch_button.rect().contains(event.pos()):
             return
+        if self.large_mode:
+            left, right = self.left_view.model(), self.right_view.model()
+            self.left_view.setModel(right)
+            self.right_view.setModel(left)
         temp = self.right_input.toPlainText()
         self.right_input.setText(self.left_input.toPlainText())
         self.left_input.setText(temp)
@@ -169,6 +271,21 @@ class TranslateWidget(QWidget):
             return
         self.left_input.clear()
         self.right_input.clear()
+        self.incremental.reset()
+        self.set_large_mode(False)
+
+    def cancel_button_press(self, event : QMouseEvent):
+        self.cancel_button.setStyleSheet(self.LABEL_SYTLE + "color: #d3b08d;")
+
+    def cancel_button_click_event(self, event : QMouseEvent):
+        self.cancel_button.setStyleSheet(self.LABEL_SYTLE + "color: white;")
+        # check if mouse release event is in label area
+        if not self.cancel_button.rect().contains(event.pos()):
+            return
+        if self.active_thread is None or not self.active_thread.isRunning():
+            return
+        self.active_thread.cancel()
+        self.label.setText("取消中 ...\n正在送出的部分翻完就會停止")
 
     def convert_button_press(self, event : QMouseEvent):
         self.convert_button.setStyleSheet(self.LABEL_SYTLE + "color: #d3b08d;")
@@ -186,7 +303,7 @@ class TranslateWidget(QWidget):
         # check if mouse release event is in label area
         if not self.label.rect().contains(event.pos()):
             return
-        save_content = self.right_input.toPlainText()
+        save_content = self.right_view.model().text() if self.large_mode else self.right_input.toPlainText()
         if save_content == "":
             return
         self.save_file(content = save_content, original_name = self.final_filepath)
@@ -205,10 +322,8 @@ class TranslateWidget(QWidget):
         choose_file, _ = QFileDialog.getOpenFileNames(self, "選擇文件", "", "Text Files (*.txt *.srt);;All Files (*)")
         if not choose_file:
             return
-        
-        for each in choose_file:
-            self.process_file(each)
-        self.label.setText(f"已全部處理完畢\n\n你可以繼續拖放其他文件\nor\n點擊這裡來選擇檔案")
+
+        self.process_paths(choose_file)
 
     def label_dragEnterEvent(self, event : QDragEnterEvent):
         if event.mimeData().hasUrls():
@@ -218,6 +333,7 @@ class TranslateWidget(QWidget):
 
     def label_dropEvent(self, event : QDragEnterEvent):
         Qurl_list : list[QUrl] = event.mimeData().urls()# [0].toLocalFile()
+        file_list : list[Path] = []
         for each in Qurl_list:
             file_path =  Path(each.toLocalFile())
             if file_path.suffix not in [".txt", ".srt"]:
@@ -227,57 +343,219 @@ class TranslateWidget(QWidget):
             if not file_path.exists():
                 print(f"文件 {file_path} 不存在 !\n請選擇其他文件")
                 continue
-            self.process_file(file_path)
-        self.label.setText(f"已全部處理完畢\n\n你可以繼續拖放其他文件\nor\n點擊這裡來選擇檔案")
+            file_list.append(file_path)
         self.label.setStyleSheet(self.LABEL_SYTLE)
+        if file_list:
+            self.process_paths(file_list)
+
+    def process_paths(self, file_list : list):
+        """
+        One file goes to the panes as before, several go to the job queue.
+        """
+        if len(file_list) == 1:
+            self.process_file(file_list[0])
+            return
+        self.process_files([str(each) for each in file_list])
 
-    def do_translate(self, raw_text : str = None) -> str:
+    def process_files(self, file_list : list[str]):
         source : Lang = Lang.from_str(self.combo_left.currentText())
         dest   : Lang = Lang.from_str(self.combo_right.currentText())
-        print(f"[*] {source=} {dest=}")
-        if source == dest:
+        direction = get_direction(source, dest)
+        if direction is None:
+            self.label.setText("來源和目標語言相同 !\n請選擇其他語言")
+            return
+
+        self.job_list.show()
+        self.job_progress.show()
+        self.save_all_button.show()
+        if self.jobs.pending == 0:
+            self.job_progress.setMaximum(0)
+            self.job_progress.setValue(0)
+        self.job_progress.setMaximum(self.job_progress.maximum() + len(file_list))
+        for each in file_list:
+            if each not in self.job_items:
+                self.job_items[each] = QListWidgetItem()
+                self.job_list.addItem(self.job_items[each])
+            self.job_items[each].setText(f"等待中  {each}")
+            self.job_dest[each] = dest
+        self.jobs.submit(file_list, direction)
+        self.label.setText(f"處理 {len(file_list)} 個文件中 ...")
+
+    def job_finished(self, path : str, result : str):
+        self.job_items[path].setText(f"完成    {path}")
+        self.job_progress.setValue(self.job_progress.value() + 1)
+
+    def job_failed(self, path : str, error : str):
+        self.job_items[path].setText(f"失敗    {path}  ({error})")
+        self.job_progress.setValue(self.job_progress.value() + 1)
+
+    def jobs_all_done(self):
+        self.label.setText(f"已全部處理完畢 ({len(self.jobs.results)} 完成, {len(self.jobs.errors)} 失敗)\n\n可以點選文件查看結果或全部保存\nor\n點擊這裡來選擇檔案")
+
+    def job_item_clicked(self, item : QListWidgetItem):
+        path = next((key for key, value in self.job_items.items() if value is item), None)
+        if path is None or path not in self.jobs.results:
+            return
+        self.final_filepath = path
+        self.this_end       = self.job_dest[path].value
+        self.incremental.reset()
+        if len(self.jobs.results[path]) > LARGE_FILE_SIZE:
+            self.show_large(path, self.jobs.results[path])
+            return
+        self.set_large_mode(False)
+        self.left_input.setText(MyTranslator.read_file(path))
+        self.right_input.setText(self.jobs.results[path])
+
+    def save_all_button_press_event(self, event : QMouseEvent):
+        self.save_all_button.setStyleSheet(self.LABEL_SYTLE + "color: #d3b08d;")
+
+    def save_all_button_click_event(self, event : QMouseEvent):
+        self.save_all_button.setStyleSheet(self.LABEL_SYTLE + "color: white;")
+        if not self.save_all_button.rect().contains(event.pos()):
+            return
+        if not self.jobs.results:
+            return
+        directory = QFileDialog.getExistingDirectory(self, "選擇保存的資料夾")
+        if not directory:
+            return
+        for path, result in self.jobs.results.items():
+            # 保留原檔的換行 (CRLF / LF)
+            write_text(output_path(path, self.job_dest[path], directory), result, newline = sniff(path)[1])
+        self.label.setText(f"{len(self.jobs.results)} 個文件已保存到: {directory}\n\n你可以繼續拖放其他文件\nor\n點擊這裡來選擇檔案")
+
+    def do_translate_incremental(self, raw_text : str, base_output : str = None, progress : ProgressTracker = None) -> str:
+        """
+        Translate with the selected direction; only the lines changed since
+        the last run go through the translator. The patches for the right
+        pane are kept in self.pending_patches.
+        """
+        source : Lang = Lang.from_str(self.combo_left.currentText())
+        dest   : Lang = Lang.from_str(self.combo_right.currentText())
+        translator = self.translators.for_langs(source, dest)
+        if translator is None:
+            self.incremental.reset()
             return raw_text
-        if Lang.EN in (source, dest):
-            if dest == Lang.EN:
-                if source == Lang.TW:
-                    return self.mytrans_tw2en.do_translate(raw_text)
-                return self.mytrans_2en.do_translate(raw_text)
-            if dest == Lang.CN:
-                return self.mytrans_2cn.do_translate(raw_text)
-            if dest == Lang.TW:
-                return self.mytrans_en2tw.do_translate(raw_text)
-
-        if dest == Lang.CN:
-            return self.mytrans_tw2cn.do_translate(raw_text)
-        elif dest == Lang.TW:
-            return self.mytrans_cn2tw.do_translate(raw_text)
-
-        assert False, f"Error, unkown translate {dest=} and {source=}"
-
-    def register_do_translate(self, raw_text : str):
+        text, self.pending_patches = self.incremental.translate(
+            (source, dest), raw_text, partial(translator.do_translate, progress = progress), base_output = base_output,
+        )
+        return text
+
+    def register_do_translate(self, raw_text : str, base_output : str = None):
         dest   : Lang = Lang.from_str(self.combo_right.currentText())
-        self.right_input.clear()
-        self.right_input.setText("翻譯中 請稍後 ... ")
-        self.thread = TranslateThread( func = self.do_translate, text=raw_text)
+        self.pending_patches = None
+        if base_output is None:
+            self.incremental.reset()
+            self.right_input.clear()
+            self.right_input.setText("翻譯中 請稍後 ... ")
+        self.thread = TranslateThread( func = partial(self.do_translate_incremental, base_output = base_output), text=raw_text)
         self.thread.trans_signal.connect(self.update_right_text)
+        self.start_progress(self.thread)
         self.thread.start()
         self.this_end = dest.value
 
+    def start_progress(self, thread : ProgressThread):
+        self.active_thread = thread
+        thread.progress_signal.connect(self.show_progress)
+        # 還不知道總量前先顯示忙碌
+        self.trans_progress.setRange(0, 0)
+        self.trans_progress.show()
+        self.cancel_button.show()
+
+    def show_progress(self, progress : Progress):
+        if self.sender() is not self.active_thread:
+            return
+        self.trans_progress.setRange(0, max(progress.total, 1))
+        self.trans_progress.setValue(progress.done)
+        eta = "" if progress.eta is None else f"  剩餘 {progress.eta:.0f} 秒"
+        self.trans_progress.setFormat(f"{progress.stage}  %v / %m  {progress.rate:.1f} 塊/秒{eta}")
+
+    def end_progress(self, thread : ProgressThread) -> bool:
+        """
+        :return: True when the run was cancelled
+        """
+        if thread is self.active_thread:
+            self.active_thread = None
+            self.trans_progress.hide()
+            self.cancel_button.hide()
+        return thread.cancelled
+
     def update_right_text(self, text:str):
+        if self.end_progress(self.sender()):
+            # 沒翻到的行是原文, 下次轉換要整份重翻
+            self.incremental.reset()
+            self.label.setText("已取消 !\n已翻譯的部分保留, 其餘維持原文\n\n可以再按轉換重新翻譯\nor\n點擊這裡來選擇檔案")
+        patches, self.pending_patches = self.pending_patches, None
+        if patches is not None:
+            self.patch_right_text(patches)
+            return
         self.right_input.clear()
         self.right_input.setText(text)
 
+    def patch_right_text(self, patches : list[Patch]):
+        """
+        Replace only the changed lines of the right pane, last patch first so
+        the line numbers of the earlier ones stay valid.
+        """
+        document = self.right_input.document()
+        cursor   = QTextCursor(document)
+        cursor.beginEditBlock()
+        for start, end, lines in reversed(patches):
+            count = document.blockCount()
+            if end > start:
+                first = document.findBlockByNumber(start).position()
+                if lines:
+                    last = document.findBlockByNumber(end - 1)
+                    cursor.setPosition(first)
+                    cursor.setPosition(last.position() + last.length() - 1, QTextCursor.MoveMode.KeepAnchor)
+                    cursor.insertText("\n".join(lines))
+                elif end < count:
+                    cursor.setPosition(first)
+                    cursor.setPosition(document.findBlockByNumber(end).position(), QTextCursor.MoveMode.KeepAnchor)
+                    cursor.removeSelectedText()
+                else:
+                    # removing the last lines, also remove the newline before them
+                    cursor.setPosition(max(0, first - 1))
+                    cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+                    cursor.removeSelectedText()
+            elif lines:
+                if start < count:
+                    cursor.setPosition(document.findBlockByNumber(start).position())
+                    cursor.insertText("\n".join(lines) + "\n")
+                else:
+                    cursor.movePosition(QTextCursor.MoveOperation.End)
+                    cursor.insertText("\n" + "\n".join(lines))
+        cursor.endEditBlock()
+
+    def warm_up(self, *_):
+        """
+        Build the selected direction's translator in the background. Loading
+        the OpenCC dictionaries holds the GIL for about 0.1 s, better while
+        the window is idle than while a large file is shown.
+        """
+        source : Lang = Lang.from_str(self.combo_left.currentText())
+        dest   : Lang = Lang.from_str(self.combo_right.currentText())
+        threading.Thread(target = self.translators.for_langs, args = (source, dest), daemon = True).start()
+
     def process_convert(self, ):
+        if self.large_mode:
+            # 大檔案唯讀, 換了語言就整份重新翻譯
+            self.process_large(chunks = self.left_view.model().chunks())
+            return
         raw_text : str = self.left_input.toPlainText()
         if raw_text == "":
             return ""
-        self.register_do_translate(raw_text)
+        # 只重新翻譯有改過的行
+        self.register_do_translate(raw_text, base_output = self.right_input.toPlainText())
 
     def process_file(self, file_path : str, show_progress : bool = True):
         self.label.setText(f"處理 {file_path} 中 ...")
         self.final_filepath = file_path
         self.label.setStyleSheet(self.LABEL_SYTLE)
-        raw_text : str = self.mytrans_cn2tw.read_file(file_path)
+        if Path(file_path).stat().st_size > LARGE_FILE_SIZE:
+            self.process_large(path = str(file_path))
+            return
+        self.set_large_mode(False)
+        raw_text : str = MyTranslator.read_file(file_path)
         self.left_input.setText(raw_text)
         self.register_do_translate(raw_text)
         # translated_text = self.do_translate( raw_text )
@@ -286,6 +564,93 @@ class TranslateWidget(QWidget):
         # self.label.setText(f"處理 {file_path} 完成 !\n一共 {total_lines} 行\n\n請選擇保存文件的路徑")
         # self.save_file(content = translated_text, original_name = file_path)
 
+    def set_large_mode(self, enabled : bool):
+        self.large_mode = enabled
+        self.left_input.setVisible(not enabled)
+        self.right_input.setVisible(not enabled)
+        self.left_view.setVisible(enabled)
+        self.right_view.setVisible(enabled)
+        # 停掉上一次還沒餵完的內容
+        self.large_run += 1
+        for feeder in self.feeders:
+            feeder.stop()
+        self.feeders = []
+        self.left_view.model().clear()
+        self.right_view.model().clear()
+
+    def show_large(self, path : str, result : str):
+        self.set_large_mode(True)
+        self.start_large(lambda chunks, progress: [result], path = path)
+
+    def iter_translate(self, chunks : list[str], progress : ProgressTracker = None):
+        """
+        Translate in chunks for the large document mode, so the right pane
+        fills up while it runs: OpenCC chunk by chunk, online translators
+        through their streaming pipeline, each piece as soon as it is back.
+        After a cancel the chunks left come out untranslated.
+        """
+        source : Lang = Lang.from_str(self.combo_left.currentText())
+        dest   : Lang = Lang.from_str(self.combo_right.currentText())
+        translator = self.translators.for_langs(source, dest)
+        if translator is None:
+            yield from chunks
+        elif isinstance(translator, MyTranslator):
+            progress.add(len(chunks), stage = translator.mode)
+            for i, chunk in enumerate(chunks):
+                if progress.cancelled:
+                    yield from chunks[i:]
+                    return
+                yield "".join([translator.do_translate(each) for each in iter_line_chunks(chunk, CONVERT_SLICE)])
+                progress.advance()
+        else:
+            yield from translator.iter_translate(chunks, progress)
+
+    def process_large(self, chunks : list[str] = None, path : str = None):
+        """
+        Large document mode: read and translate in a thread, both panes
+        filled chunk by chunk through ChunkFeeder.
+        """
+        dest : Lang = Lang.from_str(self.combo_right.currentText())
+        self.this_end = dest.value
+        self.incremental.reset()
+        self.set_large_mode(True)
+        self.start_large(self.iter_translate, chunks = chunks, path = path)
+
+    def start_large(self, func, chunks : list[str] = None, path : str = None):
+        run   = self.large_run
+        left  = ChunkFeeder(self.left_view.model())
+        right = ChunkFeeder(self.right_view.model())
+        self.feeders = [left, right]
+
+        # 舊的執行緒可能還在跑, 叫它停下並留著參考直到結束
+        self.large_threads = [each for each in self.large_threads if each.isRunning()]
+        for each in self.large_threads:
+            each.cancel()
+        thread = LargeTranslateThread(func, chunks = chunks, path = path)
+        thread.loaded_signal.connect(partial(self.large_feed, run, left, True))
+        thread.chunk_signal.connect(partial(self.large_feed, run, right, False))
+        thread.done_signal.connect(partial(self.large_feed, run, right, True, []))
+        thread.done_signal.connect(partial(self.end_progress, thread))
+        right.finished.connect(partial(self.large_done, run, thread))
+        self.large_threads.append(thread)
+        self.start_progress(thread)
+        thread.start()
+
+    def large_feed(self, run : int, feeder : ChunkFeeder, last : bool, chunks : list[str]):
+        if run != self.large_run:
+            return
+        feeder.extend(chunks)
+        if last:
+            feeder.close()
+
+    def large_done(self, run : int, thread : LargeTranslateThread):
+        if run != self.large_run:
+            return
+        if thread.cancelled:
+            self.label.setText(f"已取消 {self.final_filepath} !\n已翻譯的部分保留, 其餘維持原文 (大檔案, 唯讀)\n\n可以保存文件\nor\n點擊這裡來選擇檔案")
+            return
+        self.label.setText(f"處理 {self.final_filepath} 完成 !\n一共 {self.right_view.model().rowCount()} 行 (大檔案, 唯讀)\n\n可以保存文件\nor\n點擊這裡來選擇檔案")
+
     def save_file(self, content : str, original_name : str = "translated.srt"):
         origin_file  = Path(original_name)
         org_suf      = origin_file.suffix
@@ -293,9 +658,9 @@ class TranslateWidget(QWidget):
         default_path = origin_file.parent / default_name
         file_name    = self.select_file(suffix = org_suf[1:] ,default_path = default_path)
         if file_name:
-            with open(file_name, 'w', encoding = "utf-8") as file:
-                file.write(content)
-                self.label.setText(f"文件已保存到: {file_name}\n\n你可以繼續拖放其他文件\nor\n點擊這裡來選擇檔案")
+            newline = sniff(original_name)[1] if Path(original_name).is_file() else "\n"
+            write_text(file_name, content, newline = newline)
+            self.label.setText(f"文件已保存到: {file_name}\n\n你可以繼續拖放其他文件\nor\n點擊這裡來選擇檔案")
 
     def select_file(self, suffix : str, default_path : Path):
         file_name, _ = QFileDialog.getSaveFileName(self, caption = "保存文件", directory = str(default_path), filter = f"{suffix} Files (*.{suffix});;All Files (*)")
@@ -1,15 +1,16 @@
 import asyncio
-import hashlib
 import os
 import sys
 import tempfile
+import threading
 
 from PyQt6.QtCore import QThread, Qt, pyqtSignal
-from PyQt6.QtCore import QUrl, QTimer
+from PyQt6.QtCore import QIODevice, QUrl, QTimer
 from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
 from PyQt6.QtWidgets import (
     QProgressBar,
     QApplication,
+    QCheckBox,
     QComboBox,
     QFileDialog,
     QHBoxLayout,
@@ -21,43 +22,128 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-import edge_tts
+
+from src.utils.audio_cache import AudioCache
+from src.utils.tts_segments import SegmentSynthesizer, segment_key
 
 # 語音合成執行緒
 class TTSThread(QThread):
     finished = pyqtSignal(str)
 
-    def __init__(self, text, voice, rate, pitch, output_path):
+    def __init__(self, text, voice, rate, pitch, cache: AudioCache):
         super().__init__()
         self.text = text
         self.voice = voice
         self.rate = rate
         self.pitch = pitch
-        self.output_path = output_path
+        self.cache = cache
 
     def run(self):
         asyncio.run(self._speak())
 
     async def _speak(self):
         try:
-            communicate = edge_tts.Communicate(
-                text=self.text,
-                voice=self.voice,
-                rate=f"{self.rate:+d}%" if self.rate != 1 else None,
-                pitch=f"{self.pitch:+d}Hz" if self.pitch != 1 else None,
-            )
-            await communicate.save(self.output_path)
-            self.finished.emit(self.output_path)
+            # 每一句分開快取, 只合成沒有快取的句子
+            synthesizer = SegmentSynthesizer(self.cache)
+            path = await synthesizer.save_to_cache(self.text, self.voice, self.rate, self.pitch)
+            self.finished.emit(path)
         except Exception as e:
             print(e)
 
 
+class GrowingBuffer(QIODevice):
+    """
+    Read-only sequential device that grows while audio arrives.
+    Reads never wait: they return what is there, and readyRead is emitted
+    (in the thread the buffer lives in) whenever more arrives, until
+    finish() is called.
+    """
+    # append() runs in the synthesis thread, readyRead must come from ours
+    _arrived = pyqtSignal()
+    _finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = bytearray()
+        self._pos = 0
+        self._done = False
+        self._lock = threading.Lock()
+        self._arrived.connect(self.readyRead, Qt.ConnectionType.QueuedConnection)
+        self._finished.connect(self.readyRead, Qt.ConnectionType.QueuedConnection)
+        self._finished.connect(self.readChannelFinished, Qt.ConnectionType.QueuedConnection)
+
+    def append(self, data: bytes):
+        with self._lock:
+            self._data.extend(data)
+        self._arrived.emit()
+
+    def finish(self):
+        with self._lock:
+            self._done = True
+        self._finished.emit()
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        with self._lock:
+            return len(self._data) - self._pos + super().bytesAvailable()
+
+    def atEnd(self):
+        with self._lock:
+            done = self._done and self._pos >= len(self._data)
+        # QIODevice may still hold read-ahead data in its own buffer
+        return done and super().bytesAvailable() == 0
+
+    def readData(self, maxlen):
+        with self._lock:
+            chunk = bytes(self._data[self._pos:self._pos + maxlen])
+            self._pos += len(chunk)
+            return chunk
+
+    def writeData(self, data):
+        return -1
+
+
+# 邊合成邊播放的執行緒
+class TTSStreamThread(QThread):
+    first_audio = pyqtSignal(float)
+
+    def __init__(self, text, voice, rate, pitch, cache: AudioCache, buffer: GrowingBuffer):
+        super().__init__()
+        self.text = text
+        self.voice = voice
+        self.rate = rate
+        self.pitch = pitch
+        self.cache = cache
+        self.buffer = buffer
+
+    def run(self):
+        asyncio.run(self._speak())
+
+    async def _speak(self):
+        # 每一句已各自寫入快取, 不再另存整段文字
+        synthesizer = SegmentSynthesizer(self.cache)
+        first = True
+        try:
+            async for chunk in synthesizer.iter_audio(self.text, self.voice, self.rate, self.pitch):
+                self.buffer.append(chunk)
+                if first:
+                    first = False
+                    self.first_audio.emit(synthesizer.report["first_audio_ms"])
+        except Exception as e:
+            print(e)
+        finally:
+            self.buffer.finish()
+
+
 class TTSWidget(QWidget):
     def __init__(self):
         super().__init__()
 
         self.cache_dir = os.path.join(tempfile.gettempdir(), "tts_cache")
-        os.makedirs(self.cache_dir, exist_ok=True)
+        # 有大小上限的快取, 超過時刪掉最久沒用的
+        self.cache = AudioCache(self.cache_dir)
 
         layout = QVBoxLayout()
 
@@ -135,6 +221,15 @@ class TTSWidget(QWidget):
         """)
         layout.addWidget(self.progress_bar)
 
+        status_layout = QHBoxLayout()
+        self.stream_check = QCheckBox("邊合成邊播放")
+        self.stream_check.setChecked(True)
+        status_layout.addWidget(self.stream_check)
+        status_layout.addStretch()
+        self.status_label = QLabel("")
+        status_layout.addWidget(self.status_label)
+        layout.addLayout(status_layout)
+
         # 播放控制與定時器
         self.audio_output = QAudioOutput()
         self.player = QMediaPlayer()
@@ -156,23 +251,26 @@ class TTSWidget(QWidget):
     def update_pitch_label(self, value):
         self.pitch_value.setText(f"{value:+d}%")
 
-    def get_current_cache_path(self):
+    def get_current_cache_key(self):
         text = self.text_edit.toPlainText()
         voice = self.voice_box.currentText()
         rate = self.rate_slider.value()
         pitch = self.pitch_slider.value()
+        return segment_key(voice, rate, pitch, text)
 
-        key = f"{voice}_{rate}_{pitch}_{text}".encode("utf-8")
-        hash_name = hashlib.md5(key).hexdigest()
-        return os.path.join(self.cache_dir, f"{hash_name}.mp3")
+    def get_current_cache_path(self):
+        """
+        :return: Path of the cached MP3 for the current settings, None if not cached
+        """
+        return self.cache.get(self.get_current_cache_key())
 
-    def generate_tts(self, path, callback=None):
+    def generate_tts(self, callback=None):
         text = self.text_edit.toPlainText()
         voice = self.voice_box.currentText()
         rate = self.rate_slider.value()
         pitch = self.pitch_slider.value()
 
-        self.thread = TTSThread(text, voice, rate, pitch, path)
+        self.thread = TTSThread(text, voice, rate, pitch, self.cache)
         if callback:
             self.thread.finished.connect(callback)
         self.thread.start()
@@ -187,11 +285,40 @@ class TTSWidget(QWidget):
 
         cache_path = self.get_current_cache_path()
 
-        if os.path.exists(cache_path):
+        if cache_path:
             self._start_playback(cache_path)
+        elif self.stream_check.isChecked():
+            self.play_button.setText("⏳ 產生中...")
+            self.stream_tts()
         else:
             self.play_button.setText("⏳ 產生中...")
-            self.generate_tts(cache_path, self.on_play_ready)
+            self.generate_tts(self.on_play_ready)
+
+    def stream_tts(self):
+        """
+        Start playing from a growing buffer as soon as the first audio
+        chunk arrives, the full file is written to the cache meanwhile.
+        """
+        self.stream_buffer = GrowingBuffer(self)
+        self.stream_buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        self.stream_thread = TTSStreamThread(
+            self.text_edit.toPlainText(),
+            self.voice_box.currentText(),
+            self.rate_slider.value(),
+            self.pitch_slider.value(),
+            self.cache,
+            self.stream_buffer,
+        )
+        self.stream_thread.first_audio.connect(self.on_first_audio)
+        self.stream_thread.start()
+
+    def on_first_audio(self, first_audio_ms):
+        self.status_label.setText(f"首段音訊 {first_audio_ms:.0f} ms")
+        self.player.setSourceDevice(self.stream_buffer, QUrl("stream.mp3"))
+        self.player.play()
+        self.play_button.setText("⏸ 暫停")
+        self.is_playing = True
+        self.timer.start()
 
     def _play(self, path):
         self.player.setSource(QUrl.fromLocalFile(path))
@@ -232,11 +359,11 @@ class TTSWidget(QWidget):
 
     def save_audio(self):
         cache_path = self.get_current_cache_path()
-        if os.path.exists(cache_path):
+        if cache_path:
             self._save_file(cache_path)
         else:
             self.save_button.setText("⏳ 產生中...")
-            self.generate_tts(cache_path, self._save_file)
+            self.generate_tts(self._save_file)
 
     def _save_file(self, path):
         self.save_button.setText("💾 儲存語音")
@@ -0,0 +1,264 @@
+"""
+Headless HTTP/JSON translation service for other tools.
+
+    cn2tw-serve --port 8765
+
+    POST /translate  {"source": "cn", "dest": "tw", "texts": ["...", ...], "format": "text"}
+                  -> {"direction": "s2twp", "results": ["...", ...], "elapsed_ms": 1.2}
+    GET  /directions, /health, /stats
+
+OpenCC directions run in a process pool whose workers load every
+dictionary at start; big batches are split across workers. Online
+directions share one translator per direction (and its translation
+memory) in a few threads. At most `max_pending` requests are worked on at
+once; above that the server answers 503 with Retry-After right away
+instead of queueing without bound. Plain asyncio streams, HTTP/1.1 with
+keep-alive, no extra dependency.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+from src.utils.batch import convert_texts, warm_up
+from src.utils.lang import DIRECTIONS, Lang, get_direction, is_local
+from src.utils.registry import TranslatorRegistry
+from src.utils.translator import MyTranslator2
+
+MAX_BODY   : int = 16 << 20     # bytes per request
+MAX_TEXTS  : int = 10000        # texts per request
+SPLIT_SIZE : int = 256 << 10    # characters per OpenCC job, bigger batches are split
+
+
+class RequestError(Exception):
+    def __init__(self, status : HTTPStatus, message : str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def translate_online(translator, texts : list[str], srt : bool) -> list[str]:
+    """
+    Plain texts of an online direction go through one translate_lines call,
+    so the whole batch is deduplicated and packed together.
+    """
+    if srt or not isinstance(translator, MyTranslator2):
+        return [translator.do_translate(each) for each in texts]
+    splited = [each.split("\n") for each in texts]
+    lines   = iter(translator.translate_lines([line for each in splited for line in each]))
+    return ["\n".join(next(lines) for _ in each) for each in splited]
+
+
+def split_batch(texts : list[str], size : int) -> list[list[str]]:
+    batches : list[list[str]] = [[]]
+    total   : int = 0
+    for each in texts:
+        if batches[-1] and total + len(each) > size:
+            batches.append([])
+            total = 0
+        batches[-1].append(each)
+        total += len(each)
+    return batches
+
+
+class TranslationServer:
+    def __init__(
+        self,
+        workers        : int = None,
+        online_workers : int = 2,
+        max_pending    : int = 64,
+        phrases        : str = None,
+        cache          : bool = True,
+    ) -> None:
+        """
+        :param workers: OpenCC worker processes, default one per core
+        :param max_pending: Requests worked on at once, more get 503
+        :param cache: Keep online results in the translation memory
+        """
+        from src.utils.translation_memory import TranslationMemory
+
+        self.workers     = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.phrases     = phrases
+        self.registry    = TranslatorRegistry(cache_factory = TranslationMemory if cache else None, phrases = phrases)
+        self.processes   = ProcessPoolExecutor(max_workers = self.workers, initializer = warm_up, initargs = (phrases,))
+        self.threads     = ThreadPoolExecutor(max_workers = online_workers)
+        self.pending     : int = 0
+        self.stats       : dict[str, int] = {"requests" : 0, "texts" : 0, "chars" : 0, "rejected" : 0, "errors" : 0}
+
+    async def start_workers(self) -> None:
+        """
+        Start every worker process now, so the first requests do not pay
+        for the dictionary loading.
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.processes, os.getpid) for _ in range(self.workers)))
+
+    def close(self) -> None:
+        self.threads.shutdown(wait = False, cancel_futures = True)
+        self.processes.shutdown(wait = True, cancel_futures = True)
+
+    async def translate(self, payload : dict) -> dict:
+        try:
+            source = Lang.from_str(payload.get("source", "cn"))
+            dest   = Lang.from_str(payload.get("dest", "tw"))
+        except Exception as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+        texts = payload.get("texts")
+        if texts is None and "text" in payload:
+            texts = [payload["text"]]
+        if not isinstance(texts, list) or not all(isinstance(each, str) for each in texts):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "texts must be a list of strings")
+        if len(texts) > MAX_TEXTS:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {MAX_TEXTS} texts per request")
+        srt = payload.get("format", "text") == "srt"
+
+        direction = get_direction(source, dest)
+        start = time.perf_counter()
+        loop  = asyncio.get_running_loop()
+        if direction is None:
+            results = texts
+        elif is_local(direction):
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(self.processes, convert_texts, direction, each, self.phrases)
+                for each in split_batch(texts, SPLIT_SIZE)
+            ))
+            results = [each for part in parts for each in part]
+        else:
+            translator = await loop.run_in_executor(self.threads, self.registry.get, direction)
+            results = await loop.run_in_executor(self.threads, translate_online, translator, texts, srt)
+        self.stats["texts"] += len(texts)
+        self.stats["chars"] += sum(map(len, texts))
+        return {
+            "direction"  : direction,
+            "results"    : results,
+            "elapsed_ms" : round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    async def dispatch(self, method : str, path : str, body : bytes) -> tuple[HTTPStatus, dict]:
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"status" : "ok", "pending" : self.pending, "workers" : self.workers}
+        if method == "GET" and path == "/stats":
+            return HTTPStatus.OK, {**self.stats, "pending" : self.pending, "max_pending" : self.max_pending}
+        if method == "GET" and path == "/directions":
+            return HTTPStatus.OK, {
+                "langs"      : [each.value for each in Lang],
+                "directions" : {name : {"online" : not is_local(name)} for name in DIRECTIONS},
+            }
+        if path != "/translate":
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no such path {path}")
+        if method != "POST":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "busy, retry later")
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+        self.pending += 1
+        self.stats["requests"] += 1
+        try:
+            return HTTPStatus.OK, await self.translate(payload)
+        finally:
+            self.pending -= 1
+
+    async def handle(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter) -> None:
+        """
+        One connection, any number of requests (keep-alive).
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request, *lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {
+                    name.strip().lower() : value.strip()
+                    for name, _, value in (line.partition(":") for line in lines)
+                }
+                try:
+                    method, target, version = request.split(" ", 2)
+                except ValueError:
+                    return
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                extra : dict[str, str] = {}
+                try:
+                    if "transfer-encoding" in headers:
+                        raise RequestError(HTTPStatus.LENGTH_REQUIRED, "send a Content-Length body")
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body over {MAX_BODY} bytes")
+                    body = await reader.readexactly(length)
+                    status, payload = await self.dispatch(method, target.split("?", 1)[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {"error" : str(e)}
+                    if e.status == HTTPStatus.SERVICE_UNAVAILABLE:
+                        extra["Retry-After"] = "1"
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error" : f"{type(e).__name__}: {e}"}
+                data = json.dumps(payload, ensure_ascii = False).encode("utf-8")
+                head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                        "Content-Type: application/json; charset=utf-8",
+                        f"Content-Length: {len(data)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            return
+        finally:
+            writer.close()
+
+    async def serve(self, host : str = "127.0.0.1", port : int = 8765) -> None:
+        await self.start_workers()
+        server = await asyncio.start_server(self.handle, host, port, limit = 1 << 16)
+        print(f"[*] listening on http://{host}:{port} ({self.workers} OpenCC workers, max {self.max_pending} pending)")
+        # stop cleanly on SIGTERM too, forked workers would outlive the server otherwise
+        stop = asyncio.Event()
+        for each in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(each, stop.set)
+            except NotImplementedError:
+                pass    # Windows, Ctrl+C still raises KeyboardInterrupt
+        async with server:
+            await stop.wait()
+
+
+def main(argv : list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog = "cn2tw-serve", description = "簡繁英翻譯 HTTP 服務")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765)
+    parser.add_argument("-j", "--jobs", type = int, default = os.cpu_count(), help = "OpenCC worker processes")
+    parser.add_argument("--online-jobs", type = int, default = 2, help = "threads for online directions")
+    parser.add_argument("--max-pending", type = int, default = 64, help = "requests worked on at once, more get 503")
+    parser.add_argument("-p", "--phrases", default = None, help = "phrase file (source<TAB>replacement per line) applied around OpenCC")
+    parser.add_argument("--no-cache", action = "store_true", help = "do not use the translation memory")
+    args = parser.parse_args(argv)
+
+    server = TranslationServer(args.jobs, args.online_jobs, args.max_pending, args.phrases, cache = not args.no_cache)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+from __future__ import annotations
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from src.utils import mp3
+
+
+def write_atomic(path : str, data : bytes) -> None:
+    """
+    Write to a temporary file next to path and rename it, so a crash never
+    leaves a truncated file under the final name.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir = directory, suffix = ".part")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class AudioCache:
+    """
+    MP3 files in one directory with a SQLite index (size, last access,
+    voice, duration). Least recently used files are evicted once max_bytes
+    or max_entries is exceeded. Files only become visible after an atomic
+    rename, so an interrupted write is never served as a hit. MP3 files
+    found without an index entry are indexed by a background thread.
+    """
+    INDEX_NAME  = "index.sqlite3"
+    ADOPT_BATCH = 32    # legacy files indexed per lock hold
+
+    def __init__(self, directory : str, max_bytes : int = 512 << 20, max_entries : int = 20_000) -> None:
+        self.directory   = directory
+        self.max_bytes   = max_bytes
+        self.max_entries = max_entries
+        self.hits        : int = 0
+        self.misses      : int = 0
+        self.evictions   : int = 0
+
+        os.makedirs(directory, exist_ok = True)
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(os.path.join(directory, self.INDEX_NAME), check_same_thread = False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS audio (
+                key         TEXT PRIMARY KEY,
+                size        INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                voice       TEXT NOT NULL DEFAULT '',
+                duration_ms INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS audio_last_access ON audio (last_access);
+        """)
+        self._legacy : set[str] = set()
+        self._closed = threading.Event()
+        self.recover()
+        self._adopter : threading.Thread | None = None
+        if self._legacy:
+            self._adopter = threading.Thread(target = self.adopt, daemon = True)
+            self._adopter.start()
+
+    def path_for(self, key : str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def recover(self) -> None:
+        """
+        Bring the index in line with the directory: drop leftover partial
+        writes and entries whose file is gone. Complete MP3 files that are
+        not indexed yet (e.g. from before the index existed) are only listed
+        here; reading and measuring them is left to adopt(), on lookup or
+        in the background in small batches.
+        """
+        with self._lock:
+            files = {}
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith(".part"):
+                    # an hour old: left by a crashed writer, not one still running
+                    if time.time() - os.path.getmtime(path) > 3600:
+                        os.remove(path)
+                elif name.endswith(".mp3"):
+                    files[name[:-4]] = path
+            indexed = {key for (key,) in self._db.execute("SELECT key FROM audio")}
+            self._db.executemany("DELETE FROM audio WHERE key = ?", [(key,) for key in indexed - files.keys()])
+            self._db.commit()
+            self._legacy = files.keys() - indexed
+            self._entries, self._bytes, self._duration = self._totals()
+
+    def _totals(self) -> tuple[int, int, int]:
+        """
+        Entries, bytes and duration of the index, by a full scan; kept as
+        running totals afterwards so a write does not scan the table.
+        """
+        return self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(duration_ms), 0) FROM audio"
+        ).fetchone()
+
+    def _adopt_one(self, key : str) -> None:
+        """
+        Index one legacy file, or remove it when truncated. Caller holds the lock.
+        """
+        self._legacy.discard(key)
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            return
+        if not mp3.is_complete(data):
+            os.remove(path)
+            return
+        duration = mp3.duration_ms(data)
+        cursor   = self._db.execute(
+            "INSERT OR IGNORE INTO audio VALUES (?, ?, ?, '', ?)",
+            (key, len(data), mtime, duration),
+        )
+        if cursor.rowcount:
+            self._entries  += 1
+            self._bytes    += len(data)
+            self._duration += duration
+
+    def adopt(self, limit : int = None) -> int:
+        """
+        Index up to `limit` (all when None) of the legacy files found by
+        recover(), a batch per lock hold so lookups are not kept waiting.
+
+        :return: Legacy files still waiting
+        """
+        done : int = 0
+        while not self._closed.is_set() and (limit is None or done < limit):
+            with self._lock:
+                batch = list(itertools.islice(self._legacy, self.ADOPT_BATCH if limit is None
+                                              else min(self.ADOPT_BATCH, limit - done)))
+                if not batch:
+                    break
+                for key in batch:
+                    self._adopt_one(key)
+                self._evict()
+                self._db.commit()
+            done += len(batch)
+        return len(self._legacy)
+
+    def get(self, key : str) -> str | None:
+        """
+        :return: Path of the cached file, None on a miss
+        """
+        with self._lock:
+            if key in self._legacy:
+                self._adopt_one(key)
+                self._evict(keep = key)
+            row  = self._db.execute("SELECT 1 FROM audio WHERE key = ?", (key,)).fetchone()
+            path = self.path_for(key)
+            if row is None or not os.path.exists(path):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE audio SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            return path
+
+    def read(self, key : str) -> bytes | None:
+        path = self.get(key)
+        if path is None:
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+
+    def put(self, key : str, data : bytes, voice : str = "") -> str:
+        path = self.path_for(key)
+        write_atomic(path, data)
+        self._index(key, len(data), voice, mp3.duration_ms(data))
+        return path
+
+    def _index(self, key : str, size : int, voice : str, duration : int) -> None:
+        with self._lock:
+            old = self._db.execute("SELECT size, duration_ms FROM audio WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO audio VALUES (?, ?, ?, ?, ?)",
+                (key, size, time.time(), voice, duration),
+            )
+            old_size, old_duration = old or (0, 0)
+            self._entries  += old is None
+            self._bytes    += size - old_size
+            self._duration += duration - old_duration
+            self._evict(keep = key)
+            self._db.commit()
+
+    def _evict(self, keep : str = None) -> None:
+        if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        # over a limit: recount, another process may share the directory
+        self._entries, self._bytes, self._duration = self._totals()
+        if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        victims : list[str] = []
+        for key, row_size, row_duration in self._db.execute("SELECT key, size, duration_ms FROM audio ORDER BY last_access"):
+            if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            victims.append(key)
+            self._entries  -= 1
+            self._bytes    -= row_size
+            self._duration -= row_duration
+        self._db.executemany("DELETE FROM audio WHERE key = ?", [(key,) for key in victims])
+        for key in victims:
+            if os.path.exists(self.path_for(key)):
+                os.remove(self.path_for(key))
+        self.evictions += len(victims)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits"        : self.hits,
+            "misses"      : self.misses,
+            "evictions"   : self.evictions,
+            "entries"     : self._entries,
+            "bytes"       : self._bytes,
+            "duration_ms" : self._duration,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            for (key,) in self._db.execute("SELECT key FROM audio").fetchall():
+                if os.path.exists(self.path_for(key)):
+                    os.remove(self.path_for(key))
+            for key in self._legacy:
+                if os.path.exists(self.path_for(key)):
+                    os.remove(self.path_for(key))
+            self._legacy.clear()
+            self._db.execute("DELETE FROM audio")
+            self._db.commit()
+            self._entries, self._bytes, self._duration = 0, 0, 0
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._adopter is not None:
+            self._adopter.join()
+        self._db.close()
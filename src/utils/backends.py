@@ -0,0 +1,199 @@
+"""
+Online translation backends behind one async interface, and a pool that
+picks between them by health and latency.
+"""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from abc import abstractmethod
+from typing import AsyncIterator
+from weakref import WeakKeyDictionary
+
+from src.utils.scheduler import is_rate_limited, run_coroutine
+from src.utils.translator import MyTranslateBase
+
+
+class TranslationBackend(MyTranslateBase):
+    """
+    One online service. Subclasses implement translate_async; do_translate
+    is the blocking form for callers without an event loop.
+    """
+    name       : str = "backend"
+    max_length : int = 1500    # characters accepted per request
+
+    @abstractmethod
+    async def translate_async(self, text : str) -> str:
+        ...
+
+    def do_translate(self, text : str) -> str:
+        return run_coroutine(self.translate_async(text))
+
+
+class DeepGoogleBackend(TranslationBackend):
+    """
+    deep_translator.GoogleTranslator, a blocking client run in a worker thread.
+    """
+    name       = "deep_translator"
+    max_length = 4900
+
+    def __init__(self, source : str, dest : str) -> None:
+        from deep_translator import GoogleTranslator
+        self.client = GoogleTranslator(source = source, target = dest)
+
+    async def translate_async(self, text : str) -> str:
+        return await asyncio.to_thread(self.client.translate, text)
+
+
+class GoogletransBackend(TranslationBackend):
+    """
+    googletrans, natively async. Its HTTP client belongs to the event loop
+    it is used on, so each loop gets its own, closed by that loop when it
+    shuts down. Several threads may share one instance, each with its loop.
+    """
+    name       = "googletrans"
+    max_length = 4900
+
+    def __init__(self, source : str, dest : str) -> None:
+        self.source = source.lower()
+        self.dest   = dest.lower()
+        # loop -> (session, task giving the client)
+        self._clients : WeakKeyDictionary[asyncio.AbstractEventLoop, tuple] = WeakKeyDictionary()
+        self._lock    = threading.Lock()
+
+    async def _open(self) -> AsyncIterator:
+        """
+        The client's lifetime, an async generator left suspended after its
+        first item: the loop closes it (and so the client) in
+        shutdown_asyncgens, or when it is dropped while the loop runs.
+        """
+        from googletrans import Translator
+        async with Translator() as client:
+            yield client
+
+    async def client(self):
+        """
+        The client of the running loop, opened on first use.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for each in [each for each in self._clients if each.is_closed()]:
+                del self._clients[each]
+            entry = self._clients.get(loop)
+            if entry is None or entry[1].done() and (entry[1].cancelled() or entry[1].exception()):
+                # first use on this loop, or opening failed: try again
+                session = self._open()
+                self._clients[loop] = (session, loop.create_task(session.__anext__()))
+            _, opening = self._clients[loop]
+        return await asyncio.shield(opening)
+
+    async def translate_async(self, text : str) -> str:
+        client = await self.client()
+        result = await client.translate(text = text, dest = self.dest, src = self.source)
+        return result.text
+
+
+class BackendHealth:
+    """
+    Latency and failures of one backend, with a circuit breaker: after
+    `threshold` failures in a row the backend is skipped for `cooldown`
+    seconds, then a single trial request decides whether it is back.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold : int = 3, cooldown : float = 30.0, smoothing : float = 0.3) -> None:
+        self.threshold  = threshold
+        self.cooldown   = cooldown
+        self.smoothing  = smoothing
+        self.state      : str = self.CLOSED
+        self.latency    : float | None = None    # moving average of successful requests, seconds
+        self.failures   : int = 0                # in a row
+        self.opened_at  : float = 0.0
+        self.successes  : int = 0
+        self.errors     : int = 0
+        self.skipped    : int = 0
+        self._trial     : bool = False
+
+    def available(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state, self._trial = self.HALF_OPEN, False
+        if self.state == self.HALF_OPEN:
+            return not self._trial
+        return self.state == self.CLOSED
+
+    def begin(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._trial = True
+
+    def on_success(self, elapsed : float) -> None:
+        self.successes += 1
+        self.failures   = 0
+        self.state      = self.CLOSED
+        self.latency    = elapsed if self.latency is None else (
+            self.smoothing * elapsed + (1 - self.smoothing) * self.latency
+        )
+
+    def on_failure(self) -> None:
+        self.errors   += 1
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.state, self.opened_at = self.OPEN, time.monotonic()
+
+
+class BackendPool:
+    """
+    Send each request to the fastest healthy backend and fail over to the
+    next one on error. Backends whose circuit is open are not tried at all,
+    unless every backend is open.
+    """
+    def __init__(self, backends : list[TranslationBackend], threshold : int = 3, cooldown : float = 30.0) -> None:
+        self.backends = backends
+        self.health   : dict[str, BackendHealth] = {
+            each.name : BackendHealth(threshold, cooldown) for each in backends
+        }
+        self.max_length : int = min(each.max_length for each in backends)
+
+    def candidates(self) -> list[TranslationBackend]:
+        """
+        Healthy backends, fastest first. Unmeasured ones come first (in the
+        given order) so every backend gets a latency sample.
+        """
+        order     = {id(each) : i for i, each in enumerate(self.backends)}
+        available = [each for each in self.backends if self.health[each.name].available()]
+        if not available:
+            # everything is open: try the one that failed longest ago first
+            return sorted(self.backends, key = lambda each: self.health[each.name].opened_at)
+        for each in self.backends:
+            if each not in available:
+                self.health[each.name].skipped += 1
+        return sorted(available, key = lambda each: (self.health[each.name].latency or 0.0, order[id(each)]))
+
+    async def translate_async(self, text : str) -> str:
+        error : Exception = None
+        for backend in self.candidates():
+            health = self.health[backend.name]
+            health.begin()
+            start = time.perf_counter()
+            try:
+                result = await backend.translate_async(text)
+            except Exception as e:
+                health.on_failure()
+                # keep a 429 if any backend gave one, the scheduler slows down on it
+                if error is None or not is_rate_limited(error):
+                    error = e
+                continue
+            health.on_success(time.perf_counter() - start)
+            return result
+        raise error
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            name : {
+                "state"      : each.state,
+                "latency_ms" : None if each.latency is None else round(each.latency * 1000, 1),
+                "successes"  : each.successes,
+                "errors"     : each.errors,
+                "skipped"    : each.skipped,
+            }
+            for name, each in self.health.items()
+        }
@@ -0,0 +1,58 @@
+"""
+Per-file jobs shared by the CLI and the GUI job queue. The functions are
+module level so a ProcessPoolExecutor can pickle them.
+"""
+from __future__ import annotations
+from src.utils.lang import DIRECTIONS, create_translator, is_local
+from src.utils.textio import read_text
+
+# one translator per direction (phrase file, reflow) and per worker process
+_translators : dict[tuple, object] = {}
+
+
+def get_translator(direction : str, phrases : str = None, reflow = None, **kwargs):
+    if (direction, phrases, reflow) not in _translators:
+        _translators[direction, phrases, reflow] = create_translator(direction, phrases = phrases, reflow = reflow, **kwargs)
+    return _translators[direction, phrases, reflow]
+
+
+def convert_local(
+    direction       : str,
+    src             : str,
+    dst             : str,
+    phrases         : str = None,
+    output_encoding : str = "utf-8",
+    reflow          = None,
+) -> tuple[str, int]:
+    """
+    Stream one file through OpenCC into dst, keeping its line endings.
+
+    :param phrases: Path of a phrase file applied around OpenCC
+    :param output_encoding: Encoding of dst, the input's when None
+    :param reflow: src.utils.reflow.Reflow for the output lines
+    """
+    return dst, get_translator(direction, phrases, reflow).convert_file(src, dst, output_encoding = output_encoding)
+
+
+def translate_file(direction : str, src : str, phrases : str = None) -> str:
+    """
+    Read one file and return its translation.
+    """
+    return get_translator(direction, phrases).do_translate(read_text(src).text)
+
+
+def convert_texts(direction : str, texts : list[str], phrases : str = None) -> list[str]:
+    """
+    Convert many short texts with one warm translator (server batches).
+    """
+    translator = get_translator(direction, phrases)
+    return [translator.do_translate(each) for each in texts]
+
+
+def warm_up(phrases : str = None) -> None:
+    """
+    Pool initializer: load every OpenCC dictionary before the first job.
+    """
+    for direction in DIRECTIONS:
+        if is_local(direction):
+            get_translator(direction, phrases)
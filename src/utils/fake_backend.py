@@ -0,0 +1,124 @@
+from __future__ import annotations
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from src.utils import mp3
+from src.utils.backends import TranslationBackend
+from src.utils.scheduler import RateLimitError
+
+
+class FakeTranslator:
+    """
+    Offline stand-in for GoogleTranslator. Every line is returned with a
+    `[dest]` prefix, so the line count is kept. Latency, 429 throttling
+    above `max_rps` and random failures can be injected.
+    """
+    def __init__(
+        self,
+        dest       : str = "zh-TW",
+        latency    : float = 0.0,
+        jitter     : float = 0.0,
+        max_rps    : float = None,
+        fail_rate  : float = 0.0,
+        seed       : int = 0,
+    ) -> None:
+        self.dest      = dest
+        self.latency   = latency
+        self.jitter    = jitter
+        self.max_rps   = max_rps
+        self.fail_rate = fail_rate
+        self.calls     : int = 0
+        self.throttled : int = 0
+        self.chars     : int = 0
+        self._rng      = random.Random(seed)
+        self._lock     = threading.Lock()
+        self._recent   : deque[float] = deque()
+
+    def _check(self, text : str) -> float:
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 1:
+                self._recent.popleft()
+            if self.max_rps is not None and len(self._recent) >= self.max_rps:
+                self.throttled += 1
+                raise RateLimitError("429 Too Many Requests")
+            self._recent.append(now)
+            if self._rng.random() < self.fail_rate:
+                raise ConnectionError("fake backend failure")
+            self.chars += len(text)
+            return self.latency + self._rng.random() * self.jitter
+
+    def _result(self, text : str) -> str:
+        return "\n".join(f"[{self.dest}]{line}" for line in text.split("\n"))
+
+    def translate(self, text : str) -> str:
+        time.sleep(self._check(text))
+        return self._result(text)
+
+    async def translate_async(self, text : str) -> str:
+        await asyncio.sleep(self._check(text))
+        return self._result(text)
+
+
+class MockBackend(TranslationBackend):
+    """
+    FakeTranslator as a TranslationBackend, for offline failover runs.
+    While `down` is set every request fails after `latency`, like a
+    backend that times out.
+    """
+    max_length = 4900
+
+    def __init__(self, name : str, dest : str = "zh-TW", down : bool = False, **kwargs) -> None:
+        self.name = name
+        self.down = down
+        self.fake = FakeTranslator(dest = dest, **kwargs)
+
+    async def translate_async(self, text : str) -> str:
+        if self.down:
+            self.fake.calls += 1
+            await asyncio.sleep(self.fake.latency)
+            raise ConnectionError(f"{self.name} is down")
+        return await self.fake.translate_async(text)
+
+
+class FakeTTS:
+    """
+    Offline stand-in for edge-tts: returns silent MP3 frames whose length is
+    `ms_per_char` per character (or a fixed `duration`), after `latency`.
+    Usable as the `synthesize` function of SegmentSynthesizer.
+    """
+    def __init__(self, latency : float = 0.0, ms_per_char : int = 100, duration : int = None) -> None:
+        self.latency     = latency
+        self.ms_per_char = ms_per_char
+        self.duration    = duration
+        self.calls       : int = 0
+        self.in_flight   : int = 0
+        self.max_in_flight : int = 0
+
+    def length_ms(self, text : str) -> int:
+        return self.duration if self.duration is not None else len(text) * self.ms_per_char
+
+    async def __call__(self, text : str, voice : str = "", rate : int = 0, pitch : int = 0) -> bytes:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return mp3.silence(self.length_ms(text))
+        finally:
+            self.in_flight -= 1
+
+    async def stream(self, text : str, voice : str = "", rate : int = 0, pitch : int = 0, chunks : int = 4):
+        """
+        Same audio as __call__, yielded in `chunks` pieces spread over the latency.
+        """
+        self.calls += 1
+        audio = mp3.silence(self.length_ms(text))
+        step  = -(-len(audio) // chunks) or 1
+        for start in range(0, len(audio), step):
+            await asyncio.sleep(self.latency / chunks)
+            yield audio[start:start + step]
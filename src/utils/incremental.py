@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import Callable, Hashable
+
+from src.utils.srt import is_structural
+
+# (start, end, new lines): replace output lines [start, end) with new lines
+Patch = tuple[int, int, list[str]]
+
+
+def _resync(old : list[str], new : list[str], i : int, j : int, window : int, run : int) -> tuple[int, int] | None:
+    """
+    Smallest (a, b), a + b first, such that `run` lines match again from
+    old[i + a] and new[j + b].
+    """
+    for distance in range(1, 2 * window + 1):
+        for a in range(max(0, distance - window), min(distance, window) + 1):
+            b = distance - a
+            head = old[i + a:i + a + run]
+            # equal and shorter than run only happens when both lists end here
+            if head and head == new[j + b:j + b + run]:
+                return a, b
+    return None
+
+
+def diff_lines(old : list[str], new : list[str], window : int = 200, run : int = 3) -> list[tuple[str, int, int, int, int]]:
+    """
+    Opcodes in the SequenceMatcher format. Walks both lists once and, on a
+    mismatch, looks at most `window` lines ahead for `run` matching lines.
+    Edits in the editor are local, so this stays linear, where
+    SequenceMatcher is slow on subtitles that repeat the same lines a lot.
+    """
+    opcodes : list[tuple[str, int, int, int, int]] = []
+    i, j = 0, 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            start_i, start_j = i, j
+            while i < len(old) and j < len(new) and old[i] == new[j]:
+                i += 1
+                j += 1
+            opcodes.append(("equal", start_i, i, start_j, j))
+            continue
+        found = _resync(old, new, i, j, window, run)
+        if found is None:
+            break
+        a, b = found
+        tag = "replace" if a and b else ("delete" if a else "insert")
+        opcodes.append((tag, i, i + a, j, j + b))
+        i += a
+        j += b
+    if i < len(old) or j < len(new):
+        tag = "replace" if i < len(old) and j < len(new) else ("delete" if i < len(old) else "insert")
+        opcodes.append((tag, i, len(old), j, len(new)))
+    return opcodes
+
+
+def _keep_edges(text : str, translate : Callable[[str], str]) -> str:
+    """
+    Translate text without its leading / trailing whitespace and put it
+    back: the online translators strip their input, which would change the
+    line count of any text ending in "\n".
+    """
+    core = text.strip()
+    if not core:
+        return text
+    start = text.index(core)
+    return text[:start] + translate(core) + text[start + len(core):]
+
+
+class IncrementalTranslator:
+    """
+    Remember the last input / output pair and, on the next call with the
+    same direction, only translate the lines that changed. Output lines
+    are kept aligned one to one with input lines, so a diff of the inputs
+    is also a diff of the outputs.
+    """
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.key          : Hashable  = None
+        self.input_lines  : list[str] = []
+        self.output_lines : list[str] = []
+
+    def _full(self, key : Hashable, lines : list[str], translate : Callable[[str], str]) -> tuple[str, None]:
+        output = _keep_edges("\n".join(lines), translate)
+        output_lines = output.split("\n")
+        if len(output_lines) == len(lines):
+            self.key, self.input_lines, self.output_lines = key, lines, output_lines
+        else:
+            self.reset()
+        return output, None
+
+    def translate(
+        self,
+        key         : Hashable,
+        text        : str,
+        translate   : Callable[[str], str],
+        base_output : str = None,
+    ) -> tuple[str, list[Patch] | None]:
+        """
+        :param key: Direction, a different key means a full translation
+        :param text: Current input
+        :param translate: Function translating a whole text
+        :param base_output: What the output pane shows now. When it still lines
+                            up with the last output (only words fixed by hand),
+                            unchanged lines keep those fixes.
+        :return: (full output, patches against base_output or None when the
+                 caller has to replace everything)
+        """
+        lines = text.split("\n")
+        if key != self.key or not self.input_lines:
+            return self._full(key, lines, translate)
+
+        old_output = self.output_lines
+        can_patch  = base_output is not None
+        if can_patch:
+            base_lines = base_output.split("\n")
+            if len(base_lines) == len(old_output):
+                old_output = base_lines
+            else:
+                can_patch = False
+
+        opcodes = diff_lines(self.input_lines, lines)
+        # changed lines that need the translator: not empty, not cue numbers / timings
+        wanted  : list[int] = [
+            j
+            for tag, i1, i2, j1, j2 in opcodes if tag != "equal"
+            for j in range(j1, j2)
+            if lines[j].strip() != "" and not is_structural(lines, j)
+        ]
+        new_output : list[str] = [""] * len(lines)
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                new_output[j1:j2] = old_output[i1:i2]
+            else:
+                new_output[j1:j2] = lines[j1:j2]
+
+        if wanted:
+            translated = _keep_edges("\n".join(lines[j] for j in wanted), translate).split("\n")
+            if len(translated) != len(wanted):
+                return self._full(key, lines, translate)
+            for j, each in zip(wanted, translated):
+                new_output[j] = each
+
+        patches : list[Patch] = [
+            (i1, i2, new_output[j1:j2]) for tag, i1, i2, j1, j2 in opcodes if tag != "equal"
+        ]
+        self.input_lines, self.output_lines = lines, new_output
+        return "\n".join(new_output), patches if can_patch else None
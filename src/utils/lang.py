@@ -0,0 +1,169 @@
+from __future__ import annotations
+from enum import Enum
+from pathlib import Path
+
+
+class Lang(Enum):
+    EN       = 'en'
+    TW       = 'zh-TW'          # 台灣正體, 含用詞轉換 (s2twp)
+    CN       = 'zh-CN'
+    HK       = 'zh-HK'          # 香港繁體
+    HANT     = 'zh-Hant'        # OpenCC 標準繁體
+    TW_CHARS = 'zh-TW-chars'    # 台灣字形, 不轉用詞 (s2tw)
+    JP       = 'ja-kanji'       # 日文新字體漢字
+
+    @classmethod
+    def from_str(cls, string : str) -> Lang:
+        if string in ("英文", "en"):
+            return Lang.EN
+
+        if string in ("繁體", "tw", "zh-TW"):
+            return Lang.TW
+
+        if string in ("簡體", "cn", "zh-CN"):
+            return Lang.CN
+
+        if string in ("香港繁體", "hk", "zh-HK"):
+            return Lang.HK
+
+        if string in ("標準繁體", "hant", "zh-Hant"):
+            return Lang.HANT
+
+        if string in ("繁體 (不轉用詞)", "tw-chars", "zh-TW-chars"):
+            return Lang.TW_CHARS
+
+        if string in ("日文漢字", "jp", "ja-kanji"):
+            return Lang.JP
+
+        raise Exception("Unsupport language")
+
+
+# OpenCC code of every Chinese script variant. Two variants without a
+# config of their own are chained through standard traditional ("t").
+OPENCC_CODES : dict[Lang, str] = {
+    Lang.CN       : "s",
+    Lang.HANT     : "t",
+    Lang.TW       : "tw",
+    Lang.TW_CHARS : "tw",
+    Lang.HK       : "hk",
+    Lang.JP       : "jp",
+}
+OPENCC_CONFIGS : set[str] = {
+    "s2t", "t2s", "s2tw", "tw2s", "s2twp", "tw2sp", "s2hk", "hk2s",
+    "t2tw", "tw2t", "t2hk", "hk2t", "t2jp", "jp2t",
+}
+# short names of the variants in the online direction names
+NAMES : dict[Lang, str] = {
+    Lang.CN       : "cn",
+    Lang.TW       : "tw",
+    Lang.HK       : "hk",
+    Lang.HANT     : "hant",
+    Lang.TW_CHARS : "tw-chars",
+    Lang.JP       : "jp",
+}
+
+
+def opencc_mode(source : Lang, dest : Lang) -> str | None:
+    """
+    OpenCC conversion between two Chinese variants, several configs joined
+    by "+" when OpenCC has no direct one (e.g. "jp2t+t2s").
+
+    :return: The mode for MyTranslator, None when nothing changes
+    """
+    if (source, dest) == (Lang.CN, Lang.TW):
+        return "s2twp"
+    first, second = OPENCC_CODES[source], OPENCC_CODES[dest]
+    if first == second:
+        return None
+    if f"{first}2{second}" in OPENCC_CONFIGS:
+        return f"{first}2{second}"
+    return "+".join(each for each in (
+        f"{first}2t" if first != "t" else None,
+        f"t2{second}" if second != "t" else None,
+    ) if each)
+
+
+def _direction(source : Lang, dest : Lang) -> tuple[str, str, dict] | None:
+    """
+    :return: (direction name, translator class name, constructor arguments)
+    """
+    # text in Taiwan characters is the same whether or not its phrases were converted
+    if source == Lang.TW_CHARS:
+        source = Lang.TW
+    if source == dest or (source, dest) == (Lang.TW, Lang.TW_CHARS):
+        return None
+    if dest == Lang.EN:
+        if source == Lang.CN:
+            return "2en", "MyTranslator2", {"source" : "zh-CN", "dest" : "en"}
+        if source == Lang.TW:
+            return "tw2en", "MyTranslator3", {"source" : "zh-TW", "dest" : "en"}
+        return f"{NAMES[source]}2en", "MyTranslator3", {"source" : source.value, "dest" : "en", "mode" : opencc_mode(source, Lang.CN)}
+    if source == Lang.EN:
+        if dest == Lang.CN:
+            return "2cn", "MyTranslator2", {"dest" : "zh-CN"}
+        if dest == Lang.TW:
+            return "en2tw", "MyTranslator3", {"source" : "en", "dest" : "zh-TW"}
+        return f"en2{NAMES[dest]}", "MyTranslator3", {"source" : "en", "dest" : dest.value, "mode" : opencc_mode(Lang.CN, dest)}
+    mode = opencc_mode(source, dest)
+    if mode is None:
+        return None
+    return mode, "MyTranslator", {"mode" : mode}
+
+
+# direction name -> (translator class name, constructor arguments)
+DIRECTIONS : dict[str, tuple[str, dict]] = {
+    "s2twp" : ("MyTranslator",  {"mode" : "s2twp"}),
+    "tw2s"  : ("MyTranslator",  {"mode" : "tw2s"}),
+    "2cn"   : ("MyTranslator2", {"dest" : "zh-CN"}),
+    "2en"   : ("MyTranslator2", {"source" : "zh-CN", "dest" : "en"}),
+    "en2tw" : ("MyTranslator3", {"source" : "en", "dest" : "zh-TW"}),
+    "tw2en" : ("MyTranslator3", {"source" : "zh-TW", "dest" : "en"}),
+}
+# (source, dest) of the first pair using each direction
+DIRECTION_LANGS : dict[str, tuple[Lang, Lang]] = {}
+for _source in Lang:
+    for _dest in Lang:
+        if (_found := _direction(_source, _dest)) is not None:
+            DIRECTIONS.setdefault(_found[0], _found[1:])
+            DIRECTION_LANGS.setdefault(_found[0], (_source, _dest))
+
+
+def get_direction(source : Lang, dest : Lang) -> str | None:
+    """
+    Pick the translator used for source -> dest, same rules as the GUI.
+
+    :return: A key of DIRECTIONS, or None when nothing changes
+    """
+    found = _direction(source, dest)
+    return found[0] if found else None
+
+
+def is_local(direction : str) -> bool:
+    return DIRECTIONS[direction][0] == "MyTranslator"
+
+
+def create_translator(direction : str, **kwargs):
+    """
+    Build the translator for a direction. The translator module is imported
+    lazily so that importing this module stays cheap.
+
+    :param kwargs: Extra arguments, cache and backends for online translators,
+                   phrases for the OpenCC steps and reflow for the output;
+                   each class takes what it uses
+    """
+    from src.utils import translator
+
+    class_name, arguments = DIRECTIONS[direction]
+    if class_name == "MyTranslator":
+        kwargs = {key : value for key, value in kwargs.items() if key in ("phrases", "reflow")}
+    elif class_name == "MyTranslator2":
+        kwargs.pop("phrases", None)
+    return getattr(translator, class_name)(**arguments, **kwargs)
+
+
+def output_path(original : Path, dest : Lang, directory : Path = None) -> Path:
+    """
+    `<stem><lang><suffix>`, next to the original unless a directory is given.
+    """
+    original = Path(original)
+    return Path(directory or original.parent) / f"{original.stem}{dest.value}{original.suffix}"
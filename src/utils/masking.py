@@ -0,0 +1,107 @@
+"""
+Keep markup, numbers and URLs out of online translation.
+
+Spans at the start and end of a line (`{\\an8}<i>` ... `</i>`) are cut off
+and never sent. Spans inside the line become `{n}` placeholders, which the
+translation services leave alone, and are put back afterwards.
+"""
+from __future__ import annotations
+import re
+
+PROTECTED_RE = re.compile(
+    r"\{\\[^}]*\}"                        # ASS override block, {\an8} {\i1}
+    r"|</?[A-Za-z][^<>]*>"                # HTML style tag, <i> <font color="...">
+    r"|\\[Nnh]"                           # ASS line break / hard space
+    r"|\{\s*\d+\s*\}"                     # placeholder-like text in the input, {0}
+    r"|(?:https?://|www\.)[^\s<>{}]+"     # URL
+    r"|\d+(?:[.,:/]\d+)*%?"               # number, time, date
+)
+# spans that must never reach the translator, whatever their length
+MARKUP_RE = re.compile(r"[{<\\]")
+PLACEHOLDER_RE = re.compile(r"\{\s*(\d+)\s*\}")
+# a line made of these only has nothing to translate
+NOTHING_RE = re.compile(r"[\s\W\d_]*")
+
+
+class MaskedLine:
+    """
+    A line split into what is sent (`text`) and what is kept: the leading
+    and trailing protected spans and the inner ones behind placeholders.
+    """
+    __slots__ = ("prefix", "text", "suffix", "spans")
+
+    def __init__(self, prefix : str, text : str, suffix : str, spans : list[str]) -> None:
+        self.prefix = prefix
+        self.text   = text
+        self.suffix = suffix
+        self.spans  = spans
+
+    def restore(self, translated : str) -> str:
+        """
+        Put the spans back into the translation of `text`. Placeholders the
+        translator dropped are appended, so no markup is ever lost.
+        """
+        used : set[int] = set()
+
+        def put_back(match : re.Match) -> str:
+            index = int(match.group(1))
+            if index >= len(self.spans) or index in used:
+                return match.group()
+            used.add(index)
+            return self.spans[index]
+
+        body    = PLACEHOLDER_RE.sub(put_back, translated) if self.spans else translated
+        missing = "".join(each for i, each in enumerate(self.spans) if i not in used)
+        return self.prefix + body + missing + self.suffix
+
+
+def is_markup(match : re.Match) -> bool:
+    return MARKUP_RE.match(match.group()) is not None
+
+
+def mask_line(line : str) -> MaskedLine:
+    """
+    :param line: One subtitle text line
+    :return: MaskedLine whose text is empty when there is nothing to translate
+    """
+    if NOTHING_RE.fullmatch(line):
+        return MaskedLine(line, "", "", [])
+    matches = list(PROTECTED_RE.finditer(line))
+    if not matches:
+        return MaskedLine("", line, "", [])
+
+    # leading and trailing markup, whitespace included; numbers at the edges
+    # stay in the text, the translator needs them as context
+    start, end = 0, len(line)
+    head = 0
+    while head < len(matches) and is_markup(matches[head]) and not line[start:matches[head].start()].strip():
+        start = matches[head].end()
+        head += 1
+    tail = len(matches)
+    while tail > head and is_markup(matches[tail - 1]) and not line[matches[tail - 1].end():end].strip():
+        end = matches[tail - 1].start()
+        tail -= 1
+    while start < end and line[start].isspace():
+        start += 1
+    while end > start and line[end - 1].isspace():
+        end -= 1
+
+    body = line[start:end]
+    if NOTHING_RE.fullmatch(body):
+        return MaskedLine(line, "", "", [])
+
+    parts : list[str] = []
+    spans : list[str] = []
+    position = start
+    for match in matches[head:tail]:
+        span = match.group()
+        placeholder = f"{{{len(spans)}}}"
+        # short numbers are cheaper sent as they are
+        if not is_markup(match) and len(span) <= len(placeholder):
+            continue
+        parts.append(line[position:match.start()])
+        parts.append(placeholder)
+        spans.append(span)
+        position = match.end()
+    parts.append(line[position:end])
+    return MaskedLine(line[:start], "".join(parts), line[end:], spans)
@@ -0,0 +1,115 @@
+"""
+Just enough MPEG audio (Layer III) frame handling to join, measure and pad
+the MP3 streams produced by edge-tts without re-encoding them.
+"""
+from __future__ import annotations
+from typing import Iterator
+
+# bitrate tables in kbps, Layer III, by MPEG version
+BITRATES : dict[int, list[int]] = {
+    1 : [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2 : [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+SAMPLE_RATES : dict[int, list[int]] = {
+    1  : [44100, 48000, 32000],
+    2  : [22050, 24000, 16000],
+    25 : [11025, 12000, 8000],
+}
+VERSIONS : dict[int, int] = {0b11 : 1, 0b10 : 2, 0b00 : 25}
+
+# edge-tts "audio-24khz-48kbitrate-mono-mp3": MPEG-2 Layer III, 24 kHz, 48 kbps, mono
+EDGE_TTS_HEADER : bytes = bytes([0xFF, 0xF3, 0x64, 0xC4])
+
+
+def strip_id3(data : bytes) -> bytes:
+    """
+    Remove a leading ID3v2 tag and a trailing ID3v1 tag.
+    """
+    start = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size  = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        start = 10 + size + (10 if data[5] & 0x10 else 0)
+    end = len(data)
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    return data[start:end]
+
+
+def parse_header(header : bytes) -> tuple[int, int, int] | None:
+    """
+    :return: (frame length in bytes, samples per frame, sample rate), None if not a Layer III header
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = VERSIONS.get((header[1] >> 3) & 0b11)
+    layer   = (header[1] >> 1) & 0b11
+    if version is None or layer != 0b01:
+        return None
+    bitrate_index = header[2] >> 4
+    rate_index    = (header[2] >> 2) & 0b11
+    if bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate     = BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding     = (header[2] >> 1) & 1
+    if version == 1:
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+def iter_frames(data : bytes) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Walk the frames, skipping junk between them.
+
+    :return: Iterator of (offset, length, samples, sample rate)
+    """
+    offset = 0
+    total  = len(data)
+    while offset + 4 <= total:
+        info = parse_header(data[offset:offset + 4])
+        if info is None or offset + info[0] > total:
+            offset = data.find(b"\xff", offset + 1)
+            if offset == -1:
+                return
+            continue
+        yield offset, *info
+        offset += info[0]
+
+
+def duration_ms(data : bytes) -> int:
+    return int(sum(samples * 1000 / rate for _, _, samples, rate in iter_frames(data)))
+
+
+def join(parts : list[bytes]) -> bytes:
+    """
+    Concatenate MP3 streams frame by frame, dropping their ID3 tags.
+    """
+    return b"".join(strip_id3(each) for each in parts)
+
+
+def silence(duration : int, header : bytes = EDGE_TTS_HEADER, round_up : bool = True) -> bytes:
+    """
+    Silent frames in the format of `header` covering at least (or with
+    round_up=False at most) `duration` ms.
+    An all zero side info and main data decodes to silence.
+    """
+    length, samples, rate = parse_header(header)
+    frame = header[:2] + bytes([header[2] & 0xFD]) + header[3:4] + bytes(length - 4)
+    if round_up:
+        count = -(-duration * rate // (samples * 1000))
+    else:
+        count = duration * rate // (samples * 1000)
+    return frame * max(0, count)
+
+
+def is_complete(data : bytes) -> bool:
+    """
+    True when the data holds at least one frame and the last frame is not cut off.
+    """
+    data  = strip_id3(data)
+    end   = 0
+    found = False
+    for offset, length, _, _ in iter_frames(data):
+        found = True
+        end   = offset + length
+    return found and end == len(data)
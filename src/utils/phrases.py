@@ -0,0 +1,146 @@
+"""
+User phrase dictionary applied around OpenCC.
+
+Entries are matched on the input (longest match first) by an OpenCC
+instance built from the dictionary itself, which turns every match into a
+private use area placeholder. The real conversion leaves the placeholders
+alone and they are swapped for the user's text afterwards, so an entry
+always wins over OpenCC and its replacement is kept exactly as written.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Callable
+
+from opencc import OpenCC
+
+from src.utils.audio_cache import write_atomic
+
+DEFAULT_PATH : str = "phrases.txt"
+CACHE_DIR    : str = os.path.join(tempfile.gettempdir(), "srt_phrases")
+
+# placeholder digits, base 256 in the private use area
+DIGIT_BASE  : int = 0xE100
+DIGIT_COUNT : int = 256
+FORMAT      : int = 2    # bump when the cached files change shape
+
+
+def default_path() -> str | None:
+    """
+    :return: phrases.txt in the working directory (next to the exe) if there is one
+    """
+    return DEFAULT_PATH if os.path.isfile(DEFAULT_PATH) else None
+
+
+def parse_entries(text : str, skipped : list[tuple[int, str]] = None) -> dict[str, str]:
+    """
+    One entry per line, `source<TAB>replacement`. Blank lines and lines
+    starting with # are skipped; a later entry for the same source wins.
+    Sources cannot hold spaces (OpenCC dictionaries split on them).
+
+    :param skipped: Gets (line number, line) of every malformed line
+    """
+    entries : dict[str, str] = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        source, sep, target = line.partition("\t")
+        if not sep or not source or any(each.isspace() for each in source):
+            if skipped is not None:
+                skipped.append((number, line))
+            continue
+        entries[source] = target
+    return entries
+
+
+class PhraseDictionary:
+    """
+    A phrase file compiled into an OpenCC matcher. The compiled form (marker
+    dictionary, config and replacements) is cached on disk by content hash,
+    so it is built once per version of the file. Malformed lines are left
+    out and listed in `skipped` as (line number, line) for the caller.
+    """
+    def __init__(self, path : str = DEFAULT_PATH, cache_dir : str = CACHE_DIR) -> None:
+        self.path = path
+        with open(path, "rb") as file:
+            content = file.read()
+        digest = hashlib.sha1(content + f"|{FORMAT}".encode()).hexdigest()
+        self.directory = os.path.join(cache_dir, digest)
+        config = os.path.join(self.directory, "config.json")
+        values  = os.path.join(self.directory, "values.json")
+        skipped = os.path.join(self.directory, "skipped.json")
+        if not (os.path.isfile(config) and os.path.isfile(values)):
+            lines : list[tuple[int, str]] = []
+            self._build(parse_entries(content.decode("utf-8-sig"), lines), lines, config, skipped, values)
+        with open(values, "r", encoding = "utf-8") as file:
+            self.values : list[str] = json.load(file)
+        with open(skipped, "r", encoding = "utf-8") as file:
+            self.skipped : list[tuple[int, str]] = [tuple(each) for each in json.load(file)]
+
+        self.width : int = self._width(len(self.values))
+        digits = f"[{chr(DIGIT_BASE)}-{chr(DIGIT_BASE + DIGIT_COUNT - 1)}]"
+        self.digit_re  = re.compile(digits)
+        self.marker_re = re.compile(f"({digits}{{{self.width}}})")
+        self.table     : dict[str, str] = {
+            self._marker(i, self.width) : value for i, value in enumerate(self.values)
+        }
+        self.matcher : OpenCC | None = OpenCC(config) if self.values else None
+        # texts converted with the entries, and without them because they
+        # held private use characters
+        self.report  : dict[str, int] = {"applied" : 0, "skipped" : 0}
+
+    @staticmethod
+    def _width(count : int) -> int:
+        width = 1
+        while DIGIT_COUNT ** width < count:
+            width += 1
+        return width
+
+    def _marker(self, index : int, width : int) -> str:
+        digits : list[str] = []
+        for _ in range(width):
+            index, digit = divmod(index, DIGIT_COUNT)
+            digits.append(chr(DIGIT_BASE + digit))
+        return "".join(reversed(digits))
+
+    def _build(self, entries : dict[str, str], lines : list[tuple[int, str]], config : str, skipped : str, values : str) -> None:
+        os.makedirs(self.directory, exist_ok = True)
+        width = self._width(len(entries))
+        table = os.path.join(self.directory, "markers.txt")
+        write_atomic(table, "".join(
+            f"{source}\t{self._marker(i, width)}\n" for i, source in enumerate(entries)
+        ).encode("utf-8"))
+        dictionary = {"type" : "text", "file" : table}
+        write_atomic(config, json.dumps({
+            "name"             : f"phrases {self.path}",
+            "segmentation"     : {"type" : "mmseg", "dict" : dictionary},
+            "conversion_chain" : [{"dict" : dictionary}],
+        }, ensure_ascii = False).encode("utf-8"))
+        write_atomic(skipped, json.dumps(lines, ensure_ascii = False).encode("utf-8"))
+        # written last, it marks the cache entry as complete
+        write_atomic(values, json.dumps(list(entries.values()), ensure_ascii = False).encode("utf-8"))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def apply(self, text : str, convert : Callable[[str], str]) -> str:
+        """
+        :param text: Input text
+        :param convert: The OpenCC conversion, e.g. OpenCC("s2twp").convert
+        :return: convert(text) with the dictionary entries replaced
+        """
+        if self.matcher is None:
+            return convert(text)
+        if self.digit_re.search(text):
+            # the text already holds our placeholder characters, leave it to OpenCC
+            self.report["skipped"] += 1
+            return convert(text)
+        self.report["applied"] += 1
+        # split keeps the markers at the odd positions, no per match callback
+        parts = self.marker_re.split(convert(self.matcher.convert(text)))
+        parts[1::2] = [self.table[each] for each in parts[1::2]]
+        return "".join(parts)
@@ -0,0 +1,105 @@
+"""
+Progress and cancellation for the translators.
+
+A ProgressTracker is handed to do_translate(text, progress = ...). The
+translator announces how many units (OpenCC chunks, online blocks) it is
+about to do and ticks them off; the tracker turns that into Progress
+snapshots (done, total, throughput, ETA) for a callback, and carries the
+CancelToken the translator checks between units. A cancelled translator
+returns what it has: finished units translated, the rest left as is.
+"""
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+class CancelToken:
+    """
+    Set from any thread (the GUI), read by the worker between units.
+    """
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+@dataclass
+class Progress:
+    stage   : str            # e.g. "s2twp", "zh-CN -> en"
+    done    : int
+    total   : int
+    elapsed : float          # seconds since the first unit was announced
+    rate    : float          # units per second
+    eta     : float | None   # seconds left, None until something is done
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+class ProgressTracker:
+    """
+    Count units done against units announced and report them to `callback`,
+    at most every `interval` seconds (and always for the last unit), so a
+    slow consumer such as a Qt signal is not flooded.
+    """
+    def __init__(
+        self,
+        callback : Callable[[Progress], None] = None,
+        cancel   : CancelToken = None,
+        interval : float = 0.1,
+    ) -> None:
+        self.callback = callback
+        self.cancel   = cancel or CancelToken()
+        self.interval = interval
+        self.stage    : str = ""
+        self.done     : int = 0
+        self.total    : int = 0
+        self.started  : float = None
+        self.reported : float = 0.0
+        self._lock    = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel.cancelled
+
+    def add(self, units : int, stage : str = None) -> None:
+        """
+        Announce more work. Chained translators each add their own units,
+        so the total can grow while the run goes on.
+        """
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+            if stage is not None:
+                self.stage = stage
+            self.total += units
+        self._report(force = True)
+
+    def advance(self, units : int = 1) -> None:
+        with self._lock:
+            self.done += units
+        self._report(force = self.done >= self.total)
+
+    def snapshot(self) -> Progress:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+            rate    = self.done / elapsed if elapsed > 0 else 0.0
+            eta     = (self.total - self.done) / rate if rate > 0 else None
+            return Progress(self.stage, self.done, self.total, elapsed, rate, eta)
+
+    def _report(self, force : bool = False) -> None:
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self.reported < self.interval:
+            return
+        self.reported = now
+        self.callback(self.snapshot())
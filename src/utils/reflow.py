@@ -0,0 +1,263 @@
+"""
+Subtitle line reflow, done while a translated document is written back.
+
+A cue whose lines are wider than `width` (CJK counts as two columns) or
+more than `max_lines` is rewrapped into balanced lines: between any two
+CJK characters (never before closing or after opening punctuation) and at
+spaces, never inside a word or a tag. With `split`, a cue that still has
+more than `max_lines` lines becomes several cues, its time divided by
+reading speed (each part gets its share of the characters). Cues that
+already fit are written back untouched.
+
+    reflow = Reflow(width = 32, max_lines = 2, split = True)
+    text, _ = reflow.apply(load_document(text))
+"""
+from __future__ import annotations
+import math
+import re
+from dataclasses import dataclass
+
+from src.utils.srt import SrtDocument, format_ms, load_document
+
+WIDE       : str = (
+    "\u1100-\u115f\u2e80-\u303e\u3041-\u33ff\u3400-\u4dbf\u4e00-\u9fff\ua000-\ua4cf"
+    "\uac00-\ud7a3\uf900-\ufaff\ufe30-\ufe4f\uff00-\uff60\uffe0-\uffe6\U00020000-\U0003fffd"
+)
+OPENING    : str = "「『（《〈【〔“‘(\\["
+CLOSING    : str = "，。、；：！？」』）》〉】〕”’…—,.!?;:)\\]"
+WIDE_RE    = re.compile(f"[{WIDE}]")
+WIDE_ONLY_RE = re.compile(f"[{WIDE}]+")
+TAG_RE     = re.compile(r"<[^>]*>|\{[^}]*\}")
+# opening tags and punctuation stick to what follows, closing ones to what precedes
+TOKEN_RE   = re.compile(
+    rf"(?:<(?!/)[^>]*>|\{{[^}}]*\}})*"
+    rf"(?:[ \t]+|[{OPENING}]*[{WIDE}][{CLOSING}]*|[{OPENING}]*[^\s{WIDE}]+)"
+    rf"(?:</[^>]*>)*|.",
+    re.DOTALL,
+)
+DIALOG_RE  = re.compile(r"^(?:<[^>]*>)*[-－–—]")
+NUMBER_RE  = re.compile(r"\d+")
+SOFT_BREAK : float = 0.6
+
+
+def display_width(text : str) -> int:
+    """
+    Columns on screen: CJK and full-width forms take two, tags none.
+    """
+    if text.isascii():
+        return len(TAG_RE.sub("", text)) if "<" in text or "{" in text else len(text)
+    if "<" in text or "{" in text:
+        text = TAG_RE.sub("", text)
+    # mostly CJK: what is left after removing it is short
+    return 2 * len(text) - len(WIDE_RE.sub("", text))
+
+
+def _join(lines : list[str]) -> str:
+    """
+    One paragraph of a cue's lines: CJK lines join directly, others with a space.
+    """
+    text = lines[0]
+    for line in lines[1:]:
+        if text and line and (WIDE_RE.match(line[0]) or WIDE_RE.match(text[-1])):
+            text += line
+        else:
+            text += " " + line
+    return text
+
+
+def _fill(tokens : list[tuple[str, int, int]], limit : int) -> list[str]:
+    """
+    Greedy fill, a line breaks before a token that would pass `limit`.
+    A line break is allowed at a space, or between two tokens when one of
+    them is CJK; after punctuation is preferred when that keeps the line
+    at least SOFT_BREAK of the limit.
+    """
+    lines   : list[str] = []
+    current : list[tuple[str, int, int]] = []
+    width   : int = 0
+    space   : bool = False
+    soft    : int = 0    # tokens in current up to the last punctuation
+    for token in tokens:
+        text, each, kind = token
+        if kind == 0:
+            space = bool(current)
+            continue
+        extra = space + each
+        breakable = space or kind == 2 or (current and current[-1][2] == 2)
+        if current and breakable and width + extra > limit:
+            keep = soft if sum(w for _, w, _ in current[:soft]) >= limit * SOFT_BREAK else len(current)
+            lines.append("".join(part for part, _, _ in current[:keep]))
+            # the rest moves to the next line, without the space it started with
+            current = current[keep + 1:] if keep < len(current) and current[keep][2] == 0 else current[keep:]
+            width   = sum(w for _, w, _ in current)
+            soft, space, extra = 0, False, each
+        if space:
+            current.append((" ", 1, 0))
+            space = False
+        current.append(token)
+        width += extra
+        if text[-1] in CLOSING:
+            soft = len(current)
+    if current:
+        lines.append("".join(part for part, _, _ in current))
+    return lines
+
+
+def _wrap_wide(text : str, width : int) -> list[str]:
+    """
+    wrap() for text of CJK characters only, two columns each: cut by
+    position, after punctuation when there is some near the cut.
+    """
+    most  = max(1, width // 2)
+    count = math.ceil(len(text) / most)
+    size  = math.ceil(len(text) / count)
+    lines : list[str] = []
+    start : int = 0
+    while len(text) - start > most:
+        low, high = start + max(1, int(size * SOFT_BREAK)), start + most
+        cut = next((i + 1 for i in range(min(start + size, high) - 1, low - 1, -1) if text[i] in CLOSING), None)
+        if cut is None:
+            cut = start + size
+            # no line starts with closing or ends with opening punctuation
+            while cut < high and text[cut] in CLOSING:
+                cut += 1
+            while cut - 1 > start and text[cut - 1] in OPENING:
+                cut -= 1
+        lines.append(text[start:cut])
+        start = cut
+    lines.append(text[start:])
+    return lines
+
+
+def _tokens(text : str) -> list[tuple[str, int, int]]:
+    """
+    :return: (text, width, 0 space / 1 word / 2 CJK) per token
+    """
+    tokens : list[tuple[str, int, int]] = []
+    if text.isascii() and "<" not in text and "{" not in text:
+        for word in text.split(" "):
+            if word:
+                if tokens:
+                    tokens.append((" ", 1, 0))
+                tokens.append((word, len(word), 1))
+        return tokens
+    for token in TOKEN_RE.findall(text):
+        if token.isspace():
+            tokens.append((" ", 1, 0))
+        elif token[0] in CLOSING and tokens and tokens[-1][2]:
+            # no line starts with closing punctuation
+            last = tokens[-1]
+            tokens[-1] = (last[0] + token, last[1] + display_width(token), max(last[2], 2 if WIDE_RE.search(token) else 1))
+        else:
+            tokens.append((token, display_width(token), 2 if WIDE_RE.search(token) else 1))
+    return tokens
+
+
+def wrap(text : str, width : int) -> list[str]:
+    """
+    Balanced wrap: as few lines as a greedy fill at `width` gives, filled to
+    about the same width when a narrower limit still gives that many.
+
+    :return: Lines, each at most `width` columns unless one word is wider
+    """
+    if WIDE_ONLY_RE.fullmatch(text):
+        return _wrap_wide(text, width)
+    tokens = _tokens(text)
+    lines  = _fill(tokens, width)
+    if len(lines) < 2:
+        return lines
+    # some room over the average for the token widths
+    limit    = math.ceil(sum(each[1] for each in tokens) / len(lines)) + 4
+    balanced = _fill(tokens, limit) if limit < width else lines
+    return balanced if len(balanced) == len(lines) else lines
+
+
+@dataclass(frozen = True)
+class Reflow:
+    width        : int  = 32      # columns per line, CJK characters count two
+    max_lines    : int  = 2
+    split        : bool = False   # cut cues with more lines into several cues
+    min_duration : int  = 800     # ms, parts shorter than this are not cut
+
+    def lines(self, text : str, newline : str = "\n") -> list[str] | None:
+        """
+        :return: The rewrapped lines of a cue text, None when it already fits
+        """
+        lines = text.split(newline)
+        if len(lines) <= self.max_lines and all(display_width(each) <= self.width for each in lines):
+            return None
+        # dialog lines ("- ...") stay apart, the rest is one paragraph
+        if any(DIALOG_RE.match(each) for each in lines[1:]):
+            return [part for each in lines for part in wrap(each, self.width)]
+        return wrap(_join([each.strip() for each in lines if each.strip()]), self.width)
+
+    def _parts(self, start_ms : int, end_ms : int, lines : list[str]) -> list[tuple[int, int, list[str]]]:
+        """
+        Cut lines into cues of at most max_lines, time shared out by characters.
+        """
+        count  = math.ceil(len(lines) / self.max_lines)
+        size   = math.ceil(len(lines) / count)
+        groups = [lines[i:i + size] for i in range(0, len(lines), size)]
+        weights = [sum(display_width(each) for each in group) or 1 for group in groups]
+        parts  : list[tuple[int, int, list[str]]] = []
+        done   : int = 0
+        begin  : int = start_ms
+        for group, weight in zip(groups, weights):
+            done += weight
+            end = start_ms + round((end_ms - start_ms) * done / sum(weights))
+            parts.append((begin, end, group))
+            begin = end
+        if any(end - begin < self.min_duration for begin, end, _ in parts):
+            return [(start_ms, end_ms, lines)]
+        return parts
+
+    def apply(self, document : SrtDocument, texts : dict[int, str] = None, offset : int = 0) -> tuple[str, int]:
+        """
+        Write the document back like SrtDocument.serialize, reflowing every
+        cue on the way. Cues after a split are renumbered.
+
+        :param texts: New cue texts {position: text}, the rest keep theirs
+        :param offset: Cues added by splits in earlier pieces of the same document
+        :return: (text, offset for the next piece)
+        """
+        source  = document.source
+        newline = document.newline
+        texts   = texts or {}
+        parts   : list[str] = []
+        last    : int = 0
+        for position, cue in enumerate(document.cues):
+            text  = texts.get(position)
+            lines = self.lines(document.text(cue) if text is None else text, newline)
+            if lines is None and text is None and offset == 0:
+                continue
+            if text is None:
+                text = document.text(cue)
+            if cue.head_start is None:
+                parts.append(source[last:cue.text_start])
+                parts.append(text if lines is None else newline.join(lines))
+                last = cue.text_end
+                continue
+            parts.append(source[last:cue.head_start])
+            split = (self.split and lines is not None and len(lines) > self.max_lines
+                     and self._parts(cue.start_ms, cue.end_ms, lines))
+            if split and len(split) > 1:
+                parts.append((newline * 2).join(
+                    f"{cue.index + offset + i}{newline}{format_ms(begin)} --> {format_ms(end)}{newline}{newline.join(group)}"
+                    for i, (begin, end, group) in enumerate(split)
+                ))
+                offset += len(split) - 1
+            else:
+                head = source[cue.head_start:cue.text_start]
+                if offset:
+                    head = NUMBER_RE.sub(str(cue.index + offset), head, count = 1)
+                parts.append(head)
+                parts.append(text if lines is None else newline.join(lines))
+            last = cue.text_end
+        parts.append(source[last:])
+        return "".join(parts), offset
+
+    def __call__(self, text : str, offset : int = 0) -> tuple[str, int]:
+        """
+        Reflow a whole text (or a piece cut at cue boundaries).
+        """
+        return self.apply(load_document(text), offset = offset)
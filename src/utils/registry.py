@@ -0,0 +1,45 @@
+from __future__ import annotations
+import threading
+from typing import Callable
+
+from src.utils.lang import Lang, create_translator, get_direction, is_local
+
+
+class TranslatorRegistry:
+    """
+    Build translators on first use instead of all of them up front.
+    Online translators share one cache, created the first time one of them
+    is needed. `phrases` (a phrase file path) goes to every OpenCC step.
+    """
+    def __init__(self, cache_factory : Callable[[], object] = None, phrases : str = None) -> None:
+        self.cache_factory = cache_factory
+        self.phrases       = phrases
+        self._cache        = None
+        self._translators  : dict[str, object] = {}
+        self._lock         = threading.Lock()
+
+    def _get_cache(self):
+        if self._cache is None and self.cache_factory is not None:
+            self._cache = self.cache_factory()
+        return self._cache
+
+    def get(self, direction : str):
+        with self._lock:
+            if direction not in self._translators:
+                kwargs = {"phrases" : self.phrases}
+                if not is_local(direction):
+                    kwargs["cache"] = self._get_cache()
+                self._translators[direction] = create_translator(direction, **kwargs)
+            return self._translators[direction]
+
+    def for_langs(self, source : Lang, dest : Lang):
+        """
+        :return: The translator for source -> dest, None when they are the same
+        """
+        direction = get_direction(source, dest)
+        if direction is None:
+            return None
+        return self.get(direction)
+
+    def loaded(self) -> list[str]:
+        return list(self._translators)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+
+
+class RateLimitError(Exception):
+    """
+    The backend answered 429 / too many requests.
+    """
+
+
+def is_rate_limited(error : BaseException) -> bool:
+    """
+    :param error: Exception raised by a backend
+    :return: True if it looks like a 429 from any of the backends we use
+    """
+    if isinstance(error, RateLimitError):
+        return True
+    if type(error).__name__ == "TooManyRequests":  # deep_translator
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+class TokenBucket:
+    """
+    Token bucket whose rate adapts to the backend: additive increase on
+    success, halved on 429, slightly reduced on other errors.
+    """
+    def __init__(self, rate : float, capacity : float = 1, min_rate : float = 0.1, max_rate : float = None) -> None:
+        self.rate     : float = rate
+        self.capacity : float = capacity
+        self.min_rate : float = min_rate
+        self.max_rate : float = max_rate or rate * 4
+        self.step     : float = rate / 10
+        self.tokens   : float = capacity
+        self.updated  : float = time.monotonic()
+        self.throttled: int   = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.step)
+
+    def on_throttle(self) -> None:
+        self.throttled += 1
+        self.rate   = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0)
+
+    def on_error(self) -> None:
+        self.rate = max(self.min_rate, self.rate * 0.8)
+
+
+class BlockScheduler:
+    """
+    Keep up to `concurrency` blocks in flight through `func`, paced by
+    `limiter`, and return the results in block order.
+    """
+    def __init__(
+        self,
+        func        : Callable[[str], Awaitable[str]],
+        concurrency : int = 4,
+        limiter     : TokenBucket = None,
+        retries     : int = 3,
+        backoff     : float = 1.0,
+    ) -> None:
+        self.func        = func
+        self.concurrency = max(1, concurrency)
+        self.limiter     = limiter or TokenBucket(rate = concurrency, capacity = concurrency)
+        self.retries     = retries
+        self.backoff     = backoff
+
+    async def run(
+        self,
+        blocks  : list[str],
+        on_done : Callable[[int, str], None] = None,
+        cancel  = None,
+    ) -> list[str | None]:
+        """
+        :param blocks: Texts to send, one request each
+        :param on_done: Called with (block index, result) as blocks finish
+        :param cancel: CancelToken (src.utils.progress); once set, blocks not
+                       yet sent are skipped and blocks in flight still finish
+        :return: Results in the same order as blocks, None for skipped ones
+        :raises: The first error of a block out of retries, after the
+                 other blocks are cancelled
+        """
+        results   : list[str | None] = [None] * len(blocks)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(index : int, block : str) -> None:
+            async with semaphore:
+                if cancel is not None and cancel.cancelled:
+                    return
+                results[index] = await self.send(block)
+            if on_done is not None:
+                on_done(index, results[index])
+
+        tasks = [asyncio.ensure_future(worker(i, each)) for i, each in enumerate(blocks)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # a block failed for good (or run was cancelled): stop the others
+            # instead of leaving them running unobserved
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions = True)
+            raise
+        return results
+
+    async def send(self, block : str) -> str:
+        """
+        One block through `func`, paced by the limiter and retried with
+        backoff; the concurrency limit is up to the caller (see run).
+        """
+        attempt : int = 0
+        while True:
+            await self.limiter.acquire()
+            try:
+                result = await self.func(block)
+            except Exception as e:
+                if attempt >= self.retries:
+                    raise
+                if is_rate_limited(e):
+                    self.limiter.on_throttle()
+                else:
+                    self.limiter.on_error()
+                attempt += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                continue
+            self.limiter.on_success()
+            return result
+
+
+def iter_async(agen : AsyncIterator) -> Iterator:
+    """
+    Iterate an async generator from a thread without an event loop (e.g. a
+    QThread): the loop runs only while the next item is awaited.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def run_coroutine(coro : Awaitable):
+    """
+    asyncio.run that also works when called from a thread that already runs
+    an event loop (the coroutine then runs on a helper thread).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    box : dict = {}
+
+    def target():
+        try:
+            box["result"] = asyncio.run(coro)
+        except BaseException as e:
+            box["error"] = e
+
+    thread = threading.Thread(target = target)
+    thread.start()
+    thread.join()
+    if "error" in box:
+        raise box["error"]
+    return box["result"]
@@ -0,0 +1,249 @@
+from __future__ import annotations
+import re
+from typing import Iterable, Iterator
+
+TIMING_RE = re.compile(
+    r"^[ \t\ufeff]*(\d+)[ \t]*\r?\n"    # a BOM left in text that did not come from a file
+    r"[ \t]*(\d+):(\d{2}):(\d{2})[,.](\d{3})[ \t]*-->[ \t]*(\d+):(\d{2}):(\d{2})[,.](\d{3})[^\n]*(?:\n|$)",
+    re.MULTILINE,
+)
+TIME_LINE_RE = re.compile(r"^[ \t]*\d+:\d{2}:\d{2}[,.]\d{3}[ \t]*-->[ \t]*\d+:\d{2}:\d{2}[,.]\d{3}")
+BLANK_LINE_RE = re.compile(r"\n[ \t\r]*\n")
+
+
+def to_ms(hours : str, minutes : str, seconds : str, millis : str) -> int:
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+
+def format_ms(ms : int) -> str:
+    hours, ms   = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+class Cue:
+    """
+    One subtitle cue. The text is not copied, only its span
+    [text_start, text_end) in the document buffer is kept; head_start is
+    where its number line starts (None for plain text).
+    """
+    __slots__ = ("index", "start_ms", "end_ms", "text_start", "text_end", "head_start")
+
+    def __init__(self, index : int, start_ms : int, end_ms : int, text_start : int, text_end : int, head_start : int = None) -> None:
+        self.index      = index
+        self.start_ms   = start_ms
+        self.end_ms     = end_ms
+        self.text_start = text_start
+        self.text_end   = text_end
+        self.head_start = head_start
+
+    def __repr__(self) -> str:
+        return f"Cue({self.index}, {format_ms(self.start_ms)} --> {format_ms(self.end_ms)}, [{self.text_start}:{self.text_end}])"
+
+
+class SrtDocument:
+    """
+    A parsed document: the original buffer plus a list of cues pointing into it.
+    Everything outside the cue texts (numbers, timing lines, blank lines) is
+    written back untouched by `serialize`.
+    """
+    def __init__(self, source : str, cues : list[Cue], is_srt : bool = True) -> None:
+        self.source  = source
+        self.cues    = cues
+        self.is_srt  = is_srt
+        self.newline = "\r\n" if "\r\n" in source else "\n"
+
+    def __len__(self) -> int:
+        return len(self.cues)
+
+    def __iter__(self) -> Iterator[Cue]:
+        return iter(self.cues)
+
+    def text(self, cue : Cue) -> str:
+        return self.source[cue.text_start:cue.text_end]
+
+    def texts(self) -> list[str]:
+        return [self.source[cue.text_start:cue.text_end] for cue in self.cues]
+
+    def lines(self) -> list[str]:
+        """
+        :return: All non empty text lines, in document order
+        """
+        return [line for text in self.texts() for line in text.split(self.newline) if line != ""]
+
+    def serialize(self, texts : dict[int, str] | Iterable[str] | None = None) -> str:
+        """
+        Write the document back, substituting cue texts.
+
+        :param texts: New texts, either a list in cue order or a {position: text} dict.
+                      Missing entries keep the original text.
+        :return: str
+        """
+        if texts is None:
+            return self.source
+        if not isinstance(texts, dict):
+            texts = dict(enumerate(texts))
+        parts : list[str] = []
+        last  : int       = 0
+        for position, cue in enumerate(self.cues):
+            new_text = texts.get(position)
+            if new_text is None:
+                continue
+            parts.append(self.source[last:cue.text_start])
+            parts.append(new_text)
+            last = cue.text_end
+        parts.append(self.source[last:])
+        return "".join(parts)
+
+    def fill_lines(self, lines : Iterable[str]) -> str:
+        """
+        Replace the non empty text lines, in order, with `lines`.
+        When `lines` runs out the remaining text is kept as is.
+
+        :param lines: Replacement lines, as returned by `lines()`
+        :return: str
+        """
+        return self.serialize(self.fill_texts(lines))
+
+    def fill_texts(self, lines : Iterable[str]) -> dict[int, str]:
+        """
+        The cue texts of `fill_lines`, for serialize or a Reflow.
+
+        :return: {position: text} of the changed cues
+        """
+        lines = iter(lines)
+        texts : dict[int, str] = {}
+        for position, text in enumerate(self.texts()):
+            splited = text.split(self.newline)
+            changed = False
+            for i, line in enumerate(splited):
+                if line == "":
+                    continue
+                new_line = next(lines, None)
+                if new_line is None:
+                    break
+                splited[i] = new_line
+                changed = True
+            if changed:
+                texts[position] = self.newline.join(splited)
+        return texts
+
+
+def parse_srt(source : str) -> SrtDocument:
+    """
+    Parse an SRT buffer in one pass. Cue numbers are read, not counted,
+    so renumbered or unordered files work.
+
+    :param source: SRT text
+    :return: SrtDocument
+    """
+    cues    : list[Cue] = []
+    pending : re.Match | None = None
+    for match in TIMING_RE.finditer(source):
+        if pending is not None:
+            cues.append(_make_cue(source, pending, match.start()))
+        pending = match
+    if pending is not None:
+        cues.append(_make_cue(source, pending, len(source)))
+    return SrtDocument(source, cues)
+
+
+def _make_cue(source : str, match : re.Match, limit : int) -> Cue:
+    text_start = match.end()
+    text_end   = limit
+    while text_end > text_start and source[text_end - 1] in "\r\n \t":
+        text_end -= 1
+    g = match.groups()
+    return Cue(int(g[0]), to_ms(*g[1:5]), to_ms(*g[5:9]), text_start, max(text_start, text_end), match.start())
+
+
+def parse_lines(source : str) -> SrtDocument:
+    """
+    Plain text fallback: every non empty line becomes a cue without timing.
+    """
+    cues  : list[Cue] = []
+    start : int       = 0
+    for number, line in enumerate(source.split("\n"), 1):
+        end = start + len(line)
+        if line.endswith("\r"):
+            end -= 1
+        if end > start:
+            cues.append(Cue(number, 0, 0, start, end))
+        start += len(line) + 1
+    return SrtDocument(source, cues, is_srt = False)
+
+
+def load_document(source : str) -> SrtDocument:
+    """
+    :param source: SRT or plain text
+    :return: SrtDocument, parsed as SRT when any cue is found
+    """
+    document = parse_srt(source)
+    if document.cues:
+        return document
+    return parse_lines(source)
+
+
+def iter_cue_chunks(source : str, chunk_size : int) -> Iterator[str]:
+    """
+    Cut a document into pieces of about chunk_size characters that parse on
+    their own: SRT at blank lines (between cues), plain text at any "\n".
+    Joining the pieces gives the source back.
+    """
+    if TIMING_RE.search(source) is None:
+        yield from _iter_cuts(source, chunk_size, re.compile("\n"))
+        return
+    yield from _iter_cuts(source, chunk_size, BLANK_LINE_RE)
+
+
+def iter_cue_pieces(chunks : Iterable[str], chunk_size : int) -> Iterator[str]:
+    """
+    iter_cue_chunks for a document that arrives in consecutive pieces cut
+    at any line boundary (e.g. read or shown chunk by chunk).
+    """
+    rest : str = ""
+    for chunk in chunks:
+        data = rest + chunk
+        cut  = last_cue_boundary(data)
+        rest = data[cut:]
+        if cut:
+            yield from iter_cue_chunks(data[:cut], chunk_size)
+    if rest:
+        yield from iter_cue_chunks(rest, chunk_size)
+
+
+def last_cue_boundary(text : str) -> int:
+    """
+    Where text can be cut without splitting a cue: after its last blank
+    line, or after its last "\n" when it has no blank line (plain text).
+
+    :return: Index of the cut, 0 when text holds no full line
+    """
+    end : int = len(text)
+    while (i := text.rfind("\n", 0, end)) != -1:
+        j = text.rfind("\n", 0, i)
+        if not text[j + 1:i].strip():
+            return i + 1
+        end = i
+    return text.rfind("\n") + 1
+
+
+def _iter_cuts(source : str, chunk_size : int, separator : re.Pattern) -> Iterator[str]:
+    start : int = 0
+    while len(source) - start > chunk_size:
+        match = separator.search(source, start + chunk_size)
+        if match is None:
+            break
+        yield source[start:match.end()]
+        start = match.end()
+    yield source[start:]
+
+
+def is_structural(lines : list[str], i : int) -> bool:
+    """
+    :return: True when lines[i] is a cue number or a timing line
+    """
+    if TIME_LINE_RE.match(lines[i]):
+        return True
+    return lines[i].strip().isdigit() and i + 1 < len(lines) and TIME_LINE_RE.match(lines[i + 1]) is not None
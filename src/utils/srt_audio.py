@@ -0,0 +1,77 @@
+"""
+Voice a whole SRT file: every cue is synthesized (through the segment
+cache, several at a time) and placed at its start time on one MP3 track.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+
+from src.utils import mp3
+from src.utils.srt import load_document
+from src.utils.tts_segments import SegmentSynthesizer
+
+
+@dataclass
+class CueAudio:
+    index       : int
+    start_ms    : int
+    end_ms      : int
+    placed_ms   : int    # where the audio really starts on the track
+    duration_ms : int
+
+    @property
+    def overflow_ms(self) -> int:
+        """
+        How much longer the speech is than the cue's time slot.
+        """
+        return max(0, self.duration_ms - (self.end_ms - self.start_ms))
+
+    @property
+    def delay_ms(self) -> int:
+        """
+        How late the audio starts because the previous cue overflowed.
+        """
+        return max(0, self.placed_ms - self.start_ms)
+
+
+async def render_srt(
+    text        : str,
+    synthesizer : SegmentSynthesizer,
+    voice       : str,
+    rate        : int = 0,
+    pitch       : int = 0,
+) -> tuple[bytes, list[CueAudio]]:
+    """
+    :param text: SRT content
+    :return: (MP3 track, one CueAudio per voiced cue)
+    """
+    document = load_document(text)
+    cues     = [cue for cue in document.cues if document.text(cue).strip()]
+    # one line per cue, so a cue is read in one go
+    texts    = [" ".join(document.text(cue).split()) for cue in cues]
+    audio    = await synthesizer.render(texts, voice, rate, pitch)
+
+    track    : list[bytes]    = []
+    report   : list[CueAudio] = []
+    position : float = 0
+    for cue, data in zip(cues, audio):
+        data = mp3.strip_id3(data)
+        if cue.start_ms > position:
+            gap = mp3.silence(int(cue.start_ms - position), round_up = False)
+            track.append(gap)
+            position += mp3.duration_ms(gap)
+        duration = mp3.duration_ms(data)
+        report.append(CueAudio(cue.index, cue.start_ms, cue.end_ms, int(position), duration))
+        track.append(data)
+        position += duration
+    return b"".join(track), report
+
+
+def format_report(report : list[CueAudio]) -> list[str]:
+    """
+    :return: One line per cue whose speech does not fit its time slot
+    """
+    return [
+        f"#{each.index} {each.start_ms / 1000:.2f}s: 語音 {each.duration_ms} ms 超出 {each.overflow_ms} ms"
+        + (f", 延後 {each.delay_ms} ms 開始" if each.delay_ms else "")
+        for each in report if each.overflow_ms or each.delay_ms
+    ]
@@ -0,0 +1,157 @@
+"""
+Reading and writing subtitle files in whatever encoding they come in.
+
+The encoding is taken from a BOM when there is one, otherwise guessed from
+a bounded prefix: UTF-16 without BOM by its zero bytes, then strict UTF-8,
+then GB18030 against Big5 (cp950) by how many very common characters each
+decoding yields. Files are decoded straight from an mmap, so the only
+extra copy is the prefix used for detection.
+"""
+from __future__ import annotations
+import codecs
+import mmap
+import os
+from dataclasses import dataclass
+from typing import Iterator
+
+SAMPLE_SIZE : int = 64 << 10
+
+# checked in order, UTF-32 LE starts like UTF-16 LE
+BOMS : list[tuple[bytes, str]] = [
+    (codecs.BOM_UTF8,     "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+# legacy Chinese encodings, the first wins a tie
+LEGACY : list[str] = ["gb18030", "cp950"]
+# the most frequent characters of written Chinese, simplified and traditional;
+# a wrong legacy decoding produces almost none of them
+COMMON : frozenset[str] = frozenset(
+    "的一是不了人我在有他这這个個们們中来來上大为為和国國地到以说說时時要就出会會"
+    "可也你对對生能而子那得于於着著下自之年过過发發后後作里裡用道行所然家种種事成方"
+    "多经經么麼去法学學如都同现現当當没沒动動面起看定天分还還进進好小部其些主样樣理心"
+    "她本前开開但因只从從想实實日者意无無力它与與长長把机機十民第公此已工使情明性知全"
+    "三又关關点點正业業外将將两兩高间間由问問很最重并物手应應向头頭文体體相见見被吗嗎"
+    "呢吧啊么嗯哦什谁誰再回话話走让讓给給"
+)
+
+
+@dataclass
+class DecodedText:
+    text     : str    # newlines normalised to "\n"
+    encoding : str
+    newline  : str    # "\r\n" or "\n", as found in the file
+
+
+def _decode_prefix(prefix : bytes, encoding : str) -> str | None:
+    """
+    Strict decoding that tolerates a character cut off at the end of the prefix.
+    """
+    try:
+        return codecs.getincrementaldecoder(encoding)().decode(prefix, final = False)
+    except UnicodeDecodeError:
+        return None
+
+
+def _score(text : str) -> float:
+    wide = [each for each in text if ord(each) > 0x7F]
+    if not wide:
+        return 0.0
+    return sum(each in COMMON for each in wide) / len(wide)
+
+
+def detect_encoding(prefix : bytes) -> str:
+    """
+    :param prefix: The first bytes of a file (SAMPLE_SIZE is plenty)
+    :return: Codec name usable with open() / bytes.decode()
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    if prefix:
+        # UTF-16 without BOM: ASCII and CJK punctuation leave a zero in every other byte
+        even = prefix[0::2].count(0)
+        odd  = prefix[1::2].count(0)
+        if max(even, odd) > len(prefix) // 8 and min(even, odd) < max(even, odd) // 4:
+            return "utf-16-be" if even > odd else "utf-16-le"
+    if _decode_prefix(prefix, "utf-8") is not None:
+        return "utf-8"
+    scores : dict[str, float] = {}
+    for encoding in LEGACY:
+        decoded = _decode_prefix(prefix, encoding)
+        if decoded is not None:
+            scores[encoding] = _score(decoded)
+    if not scores:
+        # gb18030 maps nearly every byte sequence; replacement characters beat a crash
+        return "gb18030"
+    return max(scores, key = lambda each: (scores[each], -LEGACY.index(each)))
+
+
+def detect_newline(text : str) -> str:
+    return "\r\n" if "\r\n" in text else "\n"
+
+
+def sniff(path : str, sample : int = SAMPLE_SIZE) -> tuple[str, str]:
+    """
+    Encoding and line ending of a file from its first `sample` bytes.
+
+    :return: (encoding, newline)
+    """
+    with open(path, "rb") as file:
+        prefix = file.read(sample)
+    encoding = detect_encoding(prefix)
+    decoded  = _decode_prefix(prefix, encoding) or ""
+    return encoding, detect_newline(decoded)
+
+
+def read_text(path : str, encoding : str = None, sample : int = SAMPLE_SIZE) -> DecodedText:
+    """
+    :param encoding: Skip detection and use this codec
+    :return: DecodedText with the text, its encoding and its line ending
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return DecodedText("", encoding or "utf-8", "\n")
+        with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+            encoding = encoding or detect_encoding(data[:sample])
+            view = memoryview(data)
+            try:
+                text = str(view, encoding, "replace")
+            finally:
+                view.release()
+    newline = detect_newline(text[:sample])
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    return DecodedText(text, encoding, newline)
+
+
+def iter_text(path : str, chunk_size : int, encoding : str = None) -> Iterator[str]:
+    """
+    read_text in pieces of about chunk_size characters, each ending at a
+    "\n" (except the last). Every step decodes a bounded slice, so a
+    worker thread reading a large file never holds the GIL for long.
+
+    :param encoding: Skip detection and use this codec
+    """
+    encoding = encoding or sniff(path)[0]
+    rest : str = ""
+    with open(path, "r", encoding = encoding, errors = "replace", newline = "") as file:
+        while data := file.read(chunk_size):
+            data = rest + data
+            # a "\r\n" cut in two stays in rest until its "\n" arrives
+            cut  = data.rfind("\n") + 1
+            rest = data[cut:]
+            if cut:
+                yield data[:cut].replace("\r\n", "\n")
+    if rest:
+        yield rest.replace("\r\n", "\n")
+
+
+def write_text(path : str, text : str, encoding : str = "utf-8", newline : str = "\n") -> int:
+    """
+    Write text whose lines end in "\n", using `newline` in the file.
+    """
+    with open(path, "w", encoding = encoding, newline = newline) as file:
+        return file.write(text)
@@ -0,0 +1,73 @@
+"""
+Optional per stage timing of the translators (parse, pack, network,
+reassemble, convert) and of speech synthesis (tts, tts first audio). Off by default, where a stage costs one attribute
+check; turn it on at runtime with `timings.enable()` or by setting
+SRT_TIMING=1 in the environment.
+
+    from src.utils.timing import timings
+    timings.enable()
+    translator.do_translate(text)
+    print(timings.report())
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+_NOTHING = nullcontext()
+
+
+class StageTimer:
+    """
+    Wall time and call count per stage name, summed over every translator
+    and thread of the process. Nested stages are counted in both.
+    """
+    def __init__(self, enabled : bool = False) -> None:
+        self.enabled = enabled
+        self._totals : dict[str, list] = {}    # name -> [seconds, calls]
+        self._lock   = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def stage(self, name : str):
+        """
+        Context manager timing one stage, a shared no-op while disabled.
+        """
+        return self._measure(name) if self.enabled else _NOTHING
+
+    @contextmanager
+    def _measure(self, name : str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name : str, seconds : float) -> None:
+        with self._lock:
+            total = self._totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def report(self) -> dict[str, dict]:
+        """
+        :return: {stage : {"seconds", "calls"}}
+        """
+        with self._lock:
+            return {
+                name : {"seconds" : round(seconds, 6), "calls" : calls}
+                for name, (seconds, calls) in self._totals.items()
+            }
+
+
+timings = StageTimer(enabled = os.environ.get("SRT_TIMING", "") not in ("", "0"))
@@ -0,0 +1,231 @@
+from __future__ import annotations
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from src.utils.masking import PLACEHOLDER_RE, MaskedLine, mask_line
+from src.utils.srt import load_document
+from src.utils.textio import read_text
+
+
+def warm_entry(original : MaskedLine, translated : MaskedLine) -> tuple[str, str] | None:
+    """
+    The memory entry for a line and its translation, both masked as the
+    lookup path masks them. The translation's placeholders are renumbered
+    to point at the same spans of the original.
+
+    :return: (text, result), None when there is nothing to store or the
+             protected spans of the two lines do not match
+    """
+    if not original.text or not translated.text or sorted(original.spans) != sorted(translated.spans):
+        return None
+    free = list(range(len(original.spans)))
+
+    def renumber(match : re.Match) -> str:
+        index = int(match.group(1))
+        if index >= len(translated.spans):
+            return match.group()
+        target = next(i for i in free if original.spans[i] == translated.spans[index])
+        free.remove(target)
+        return f"{{{target}}}"
+
+    return original.text, PLACEHOLDER_RE.sub(renumber, translated.text)
+
+
+class TranslationMemory:
+    """
+    On-disk translation memory keyed by (source, dest, text), stored in
+    SQLite with a small in-memory LRU in front of it. Old entries are
+    evicted by last use once max_entries or max_bytes is exceeded.
+    """
+    DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "translation_memory.sqlite3")
+
+    def __init__(
+        self,
+        path        : str = DEFAULT_PATH,
+        max_entries : int = 500_000,
+        max_bytes   : int = 256 << 20,
+        hot_entries : int = 20_000,
+    ) -> None:
+        self.path        = path
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self.hot_entries = hot_entries
+        self.hits        : int = 0
+        self.misses      : int = 0
+        self.evictions   : int = 0
+
+        self._hot  : OrderedDict[tuple[str, str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread = False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS memory (
+                source    TEXT NOT NULL,
+                dest      TEXT NOT NULL,
+                text      TEXT NOT NULL,
+                result    TEXT NOT NULL,
+                size      INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source, dest, text)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used);
+        """)
+        # running totals, so a write does not scan the table
+        self._entries, self._bytes = self._totals()
+
+    def _totals(self) -> tuple[int, int]:
+        return self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM memory").fetchone()
+
+    def _remember(self, key : tuple[str, str, str], result : str) -> None:
+        self._hot[key] = result
+        self._hot.move_to_end(key)
+        if len(self._hot) > self.hot_entries:
+            self._hot.popitem(last = False)
+
+    def get_many(self, source : str, dest : str, texts : Iterable[str]) -> dict[str, str]:
+        """
+        :return: {text: result} for the texts found, counting hits and misses
+        """
+        found : dict[str, str] = {}
+        cold  : list[str]      = []
+        with self._lock:
+            unique = dict.fromkeys(texts)
+            for text in unique:
+                key = (source, dest, text)
+                if key in self._hot:
+                    self._hot.move_to_end(key)
+                    found[text] = self._hot[key]
+                else:
+                    cold.append(text)
+            for start in range(0, len(cold), 500):
+                part = cold[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT text, result FROM memory WHERE source = ? AND dest = ? AND text IN ({','.join('?' * len(part))})",
+                    (source, dest, *part),
+                ).fetchall()
+                for text, result in rows:
+                    found[text] = result
+                    self._remember((source, dest, text), result)
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE memory SET last_used = ? WHERE source = ? AND dest = ? AND text = ?",
+                    [(now, source, dest, text) for text in found],
+                )
+                self._db.commit()
+            self.hits   += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def get(self, source : str, dest : str, text : str) -> str | None:
+        return self.get_many(source, dest, [text]).get(text)
+
+    def put_many(self, source : str, dest : str, pairs : Iterable[tuple[str, str]]) -> None:
+        now  = time.time()
+        rows = [
+            (source, dest, text, result, len(text.encode()) + len(result.encode()), now)
+            for text, result in dict(pairs).items()
+        ]
+        if not rows:
+            return
+        with self._lock:
+            # sizes of the rows about to be replaced, by primary key
+            replaced : list[int] = []
+            for start in range(0, len(rows), 500):
+                part = [row[2] for row in rows[start:start + 500]]
+                replaced += [size for size, in self._db.execute(
+                    f"SELECT size FROM memory WHERE source = ? AND dest = ? AND text IN ({','.join('?' * len(part))})",
+                    (source, dest, *part),
+                )]
+            self._db.executemany("INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._entries += len(rows) - len(replaced)
+            self._bytes   += sum(row[4] for row in rows) - sum(replaced)
+            for row in rows:
+                self._remember(row[:3], row[3])
+            self._evict()
+            self._db.commit()
+
+    def put(self, source : str, dest : str, text : str, result : str) -> None:
+        self.put_many(source, dest, [(text, result)])
+
+    def _evict(self) -> None:
+        if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        # over a limit: recount, another process may share the file
+        entries, size = self._entries, self._bytes = self._totals()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        # drop the least recently used tenth past the limit in one go
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes   = int(self.max_bytes * 0.9)
+        victims : list[tuple[str, str, str]] = []
+        for source, dest, text, row_size in self._db.execute("SELECT source, dest, text, size FROM memory ORDER BY last_used"):
+            if entries <= target_entries and size <= target_bytes:
+                break
+            victims.append((source, dest, text))
+            entries -= 1
+            size    -= row_size
+        self._db.executemany("DELETE FROM memory WHERE source = ? AND dest = ? AND text = ?", victims)
+        for key in victims:
+            self._hot.pop(key, None)
+        self.evictions += len(victims)
+        self._entries, self._bytes = entries, size
+
+    def warm_from_srt(self, source : str, dest : str, original : str, translated : str, mask : bool = True) -> int:
+        """
+        Fill the memory from an already translated pair of documents,
+        matching their text lines in order.
+
+        :param mask: Key the entries as MyTranslator2 with mask looks them up
+                     (see src.utils.masking); lines whose markup does not
+                     match their translation's are left out
+        :return: Number of entries added, 0 if the documents do not line up
+        """
+        original_lines   = load_document(original).lines()
+        translated_lines = load_document(translated).lines()
+        if len(original_lines) != len(translated_lines):
+            return 0
+        if mask:
+            entries = (warm_entry(mask_line(a), mask_line(b)) for a, b in zip(original_lines, translated_lines))
+            pairs   = dict(each for each in entries if each is not None)
+        else:
+            pairs = {a : b for a, b in zip(original_lines, translated_lines) if a}
+        self.put_many(source, dest, pairs.items())
+        return len(pairs)
+
+    def warm_from_files(self, source : str, dest : str, original_path : str, translated_path : str, encoding : str = None, mask : bool = True) -> int:
+        """
+        :param encoding: Skip detection (src.utils.textio) and use this codec
+        """
+        return self.warm_from_srt(
+            source, dest,
+            read_text(original_path, encoding).text,
+            read_text(translated_path, encoding).text,
+            mask,
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits"      : self.hits,
+            "misses"    : self.misses,
+            "evictions" : self.evictions,
+            "entries"   : self._entries,
+            "bytes"     : self._bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM memory")
+            self._db.commit()
+            self._hot.clear()
+            self._entries, self._bytes = 0, 0
+
+    def close(self) -> None:
+        self._db.close()
@@ -1,12 +1,20 @@
 from abc import ABC, abstractmethod
-from pathlib import Path
+from itertools import takewhile
+from typing import AsyncIterator, Iterable, Iterator
+import asyncio
 import time
 
-from googletrans import Translator
-from deep_translator import GoogleTranslator, PonsTranslator
 from opencc import OpenCC
 from tqdm import tqdm
-import asyncio
+import threading
+
+from src.utils.scheduler import BlockScheduler, TokenBucket, iter_async, run_coroutine
+from src.utils.masking import MaskedLine, mask_line
+from src.utils.progress import ProgressTracker
+from src.utils.srt import SrtDocument, iter_cue_chunks, iter_cue_pieces, last_cue_boundary, load_document
+from src.utils.textio import read_text, sniff
+from src.utils.timing import timings
+from src.utils.translation_memory import TranslationMemory
 
 class MyTranslateBase(ABC):
     @abstractmethod
@@ -14,156 +22,692 @@ class MyTranslateBase(ABC):
         ...
 
 
+def iter_line_chunks(content : str, chunk_size : int):
+    """
+    Cut content into pieces of about chunk_size characters, only at "\n".
+    Every piece except the last keeps its trailing "\n".
+
+    :param content: str
+    :param chunk_size: Target characters per piece
+    :return: Iterator of str
+    """
+    start : int = 0
+    total : int = len(content)
+    while total - start > chunk_size:
+        end = content.find("\n", start + chunk_size)
+        if end == -1:
+            break
+        yield content[start:end + 1]
+        start = end + 1
+    yield content[start:]
+
+
+def pack_lines(lines : list[str], max_length : int, separator : str = "\n") -> list[list[str]]:
+    """
+    Greedily pack lines into blocks whose joined length stays within
+    max_length. A line longer than max_length gets a block of its own.
+
+    :param lines: Lines to pack, none is dropped
+    :param max_length: Characters per block, separators included
+    :return: List of blocks, each a list of lines
+    """
+    blocks  : list[list[str]] = []
+    current : list[str]       = []
+    size    : int             = 0
+    for line in lines:
+        extra = len(line) + (len(separator) if current else 0)
+        if current and size + extra > max_length:
+            blocks.append(current)
+            current, size, extra = [], 0, len(line)
+        current.append(line)
+        size += extra
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+class OpenCCChain:
+    """
+    Several OpenCC configs applied one after the other, for the variant
+    pairs OpenCC has no single config for (e.g. "jp2t+t2s").
+    """
+    def __init__(self, converters : list[OpenCC]) -> None:
+        self.converters = converters
+
+    def convert(self, text : str) -> str:
+        for each in self.converters:
+            text = each.convert(text)
+        return text
+
+
+_opencc_pool : dict[str, OpenCC] = {}
+_opencc_lock = threading.Lock()
+
+
+def get_opencc(mode : str) -> OpenCC | OpenCCChain:
+    """
+    OpenCC instances are shared by config, loading a dictionary is the
+    expensive part of building a translator. Every config is built once
+    per process, under the lock; converting needs no lock, the converter
+    is not modified after loading and convert() holds the GIL.
+
+    :param mode: An OpenCC config, or several joined by "+"
+    """
+    if "+" in mode:
+        return OpenCCChain([get_opencc(each) for each in mode.split("+")])
+    with _opencc_lock:
+        if mode not in _opencc_pool:
+            _opencc_pool[mode] = OpenCC(mode)
+        return _opencc_pool[mode]
+
+
 class MyTranslator(MyTranslateBase):
-    def __init__(self, mode : str = "s2twp"):
-        self.cc = OpenCC(mode)
+    # chunk size when reporting progress, small enough for the bar to move
+    progress_chunk_size : int = 256 << 10
+
+    def __init__(self, mode : str = "s2twp", chunk_size : int = 1 << 20, phrases = None, reflow = None):
+        """
+        :param phrases: PhraseDictionary or path of a phrase file, its entries override OpenCC
+        :param reflow: src.utils.reflow.Reflow applied to every converted piece
+        """
+        self.mode = mode
+        self.cc = get_opencc(mode)
+        self.chunk_size = chunk_size
+        self.reflow = reflow
+        if isinstance(phrases, str):
+            from src.utils.phrases import PhraseDictionary
+            phrases = PhraseDictionary(phrases)
+        self.phrases = phrases
+
+    def _convert(self, text : str) -> str:
+        with timings.stage("convert"):
+            if self.phrases is not None:
+                return self.phrases.apply(text, self.cc.convert)
+            return self.cc.convert(text)
 
-    def do_translate(self , text : str) -> str:
+    def _convert_pieces(self, pieces : Iterable[str]) -> Iterator[str]:
+        """
+        Convert pieces cut at cue boundaries, each reflowed right after its
+        conversion (parsed and written back once) when self.reflow is set.
+        """
+        offset : int = 0
+        for piece in pieces:
+            if self.reflow is None:
+                yield self._convert(piece)
+            else:
+                converted, offset = self.reflow(self._convert(piece), offset)
+                yield converted
+
+    def do_translate(self , text : str, progress : ProgressTracker = None) -> str:
         """
         Do translate from CN to TW
         
         :param cn_texts: Texts in CN
+        :param progress: Report chunks done to it; once cancelled the
+                         chunks left are returned unconverted
         :return: Texts in TW
         """
-        return self.cc.convert(text)
+        if progress is None:
+            return "".join(self._convert_pieces([text]))
+        # a reflowed piece must hold whole cues
+        cut    = iter_line_chunks if self.reflow is None else iter_cue_chunks
+        chunks : list[str] = list(cut(text, min(self.chunk_size, self.progress_chunk_size)))
+        progress.add(len(chunks), stage = self.mode)
+        output : list[str] = []
+        for each in self._convert_pieces(takewhile(lambda _: not progress.cancelled, chunks)):
+            output.append(each)
+            progress.advance()
+        output.extend(chunks[len(output):])
+        return "".join(output)
 
-    def read_file(self, file_full_path: str) -> str:
-        this_file = Path(file_full_path)
-        all_text = this_file.read_text(encoding = "utf-8")
-        return all_text
+    @staticmethod
+    def read_file(file_full_path: str) -> str:
+        """
+        Read a file in any of the encodings we get (see src.utils.textio),
+        lines ending in "\n".
+        """
+        return read_text(file_full_path).text
 
 
     def translate(self, content: str, show_progress : bool = True) -> str:
         """
-        Read str
+        Read str, convert it in large chunks cut at line boundaries (at cue
+        boundaries when reflowing). The output is identical to converting
+        line by line.
+
         :param content: str
-        :return: List of lines in the srt file
+        :return: Converted text, every line terminated by "\n"
         """
-        new_text = ""
+        # a reflowed piece must hold whole cues
+        cut    = iter_line_chunks if self.reflow is None else iter_cue_chunks
+        chunks : list[str] = list(cut(content, self.chunk_size))
         if show_progress:
-            tasks = tqdm(content.split("\n"), desc="Processing")
+            chunks = tqdm(chunks, desc="Processing")
+        return "".join(self._convert_pieces(chunks)) + "\n"
+
 
-        else:
-            tasks = content.split("\n")
-        for each_line in tasks:
-            new_text += self.do_translate(each_line) + "\n"
-        return new_text
+    async def translate_stream(self, pieces : AsyncIterator[str], progress : ProgressTracker = None) -> AsyncIterator[str]:
+        """
+        Pipeline stage (see MyTranslator3). OpenCC is never the slow stage,
+        so it reports no progress and converts whatever reaches it, partial
+        results of a cancelled online stage included.
+        """
+        offset : int = 0
+        async for piece in pieces:
+            if self.reflow is None:
+                yield self._convert(piece)
+            else:
+                converted, offset = self.reflow(self._convert(piece), offset)
+                yield converted
+
+    def convert_file(
+        self,
+        src             : str,
+        dst             : str,
+        chunk_size      : int = None,
+        encoding        : str = None,
+        output_encoding : str = "utf-8",
+    ) -> int:
+        """
+        Stream src into dst, converting with OpenCC at line boundaries.
+        Memory stays around chunk_size whatever the file size, and the
+        content is written back as is (same line endings, no extra
+        trailing "\n").
+
+        :param src: Input file path
+        :param dst: Output file path
+        :param chunk_size: Characters read per step, default self.chunk_size
+        :param encoding: Input encoding, detected when None
+        :param output_encoding: Output encoding, the input's when None
+        :return: Number of characters written
+        """
+        chunk_size = chunk_size or self.chunk_size
+        encoding   = encoding or sniff(src)[0]
+        written : int = 0
+
+        def pieces(fin) -> Iterator[str]:
+            rest : str = ""
+            while True:
+                data = fin.read(chunk_size)
+                if not data:
+                    break
+                data = rest + data
+                # a reflowed piece must hold whole cues
+                cut  = data.rfind("\n") + 1 if self.reflow is None else last_cue_boundary(data)
+                if cut == 0:
+                    rest = data
+                    continue
+                rest = data[cut:]
+                yield data[:cut]
+            if rest:
+                yield rest
+
+        with open(src, "r", encoding = encoding, errors = "replace", newline = "") as fin, \
+             open(dst, "w", encoding = output_encoding or encoding, newline = "") as fout:
+            for each in self._convert_pieces(pieces(fin)):
+                written += fout.write(each)
+        return written
 
 
 class MyTranslator2(MyTranslateBase):
-    def __init__(self, dest : str, source = "auto") -> None:
+    def __init__(
+        self,
+        dest       : str,
+        source     = "auto",
+        cache      : TranslationMemory = None,
+        max_length : int = None,
+        backends   : list = None,
+        reflow     = None,
+    ) -> None:
+        """
+        :param backends: TranslationBackend list, tried fastest healthy first;
+                         default deep_translator then googletrans
+        :param reflow: src.utils.reflow.Reflow applied while the translation is written back
+        """
         self.dest = dest
         self.source = source
-        self.max_length : int = 1500
-
-        self._translator_api_list = [
-            GoogleTranslator(source=source, target= dest,),
-            Translator(),
-        ]
+        self.reflow = reflow
+        self.cache = cache
+        # online clients are imported here so OpenCC only users never load them
+        from src.utils.backends import BackendPool, DeepGoogleBackend, GoogletransBackend
+        if backends is None:
+            backends = [DeepGoogleBackend(source, dest), GoogletransBackend(source, dest)]
+        self.backends : BackendPool = BackendPool(backends)
+        self.max_length : int = max_length or self.backends.max_length
+        self.separator : str = "\n"
+        self.report : dict[str, int] = {}
+        self.concurrency : int = 4
+        self.mask : bool = True
+        self.limiter : TokenBucket = TokenBucket(rate = 2.0, capacity = self.concurrency)
 
     def get_plain_text_list_from_str(self, text) -> list[str]:
-        text_splited : list[str]     = text.split("\n")
-        this_index  : int            = 0
-        srt_index   : int            = 1
-        output_word_list : list[str] = []
-        while this_index < len(text_splited):
-            if text_splited[this_index] == f"{srt_index}":
-                srt_index  += 1
-                this_index += 2 # skip time line
-            else:
-                if text_splited[this_index] != "":
-                    output_word_list.append(text_splited[this_index])
-                this_index += 1
-        return output_word_list
-
-    def insert_back2text(self, text, translated_str) -> list[str]:
-        text_splited     : list[str] = text.split("\n")
-        tran_splited     : list[str] = translated_str.split("\n")
-        this_index       : int       = 0
-        tran_index       : int       = 0
-        srt_index        : int       = 1
-
-        while this_index < len(text_splited) and tran_index < len(tran_splited):
-            if text_splited[this_index] == f"{srt_index}":
-                srt_index  += 1
-                this_index += 2 # skip time line
-            else:
-                if text_splited[this_index] != "":
-                    text_splited[this_index] = tran_splited[tran_index]
-                    tran_index += 1
-                this_index += 1
-        return "\n".join(text_splited)
+        return load_document(text).lines()
+
+    def insert_back2text(self, text, translated_str) -> str:
+        return load_document(text).fill_lines(translated_str.split("\n"))
+
+    def cut_block(self, text : list[str]) -> list[str]:
+        return [self.separator.join(each) for each in pack_lines(text, self.max_length, self.separator)]
 
-    def _translate_each(self, text : str, index = 0) -> str:
+    async def _translate_each_async(self, text : str) -> str:
+        return await self.backends.translate_async(text)
+
+    async def _request(self, text : str) -> str:
+        self.report["requests"] = self.report.get("requests", 0) + 1
+        self.report["chars"]    = self.report.get("chars", 0) + len(text)
+        return await self._translate_each_async(text)
+
+    def _scheduler(self) -> BlockScheduler:
+        return BlockScheduler(self._request, concurrency = self.concurrency, limiter = self.limiter)
+
+    async def translate_block_async(self, block_text_list : list[str], progress : ProgressTracker = None) -> list[str | None]:
+        """
+        :param progress: Report blocks done to it instead of a console bar;
+                         once cancelled, unsent blocks come back as None
+        """
+        if progress is not None:
+            return await self._scheduler().run(
+                block_text_list, on_done = lambda index, result: progress.advance(), cancel = progress.cancel,
+            )
+        bar = tqdm(total = len(block_text_list))
         try:
-            return self._translator_api_list[index].translate(text)
-        except Exception as e:
-            # print(e)
-            # print(f"Google translated fail, use another api")
+            return await self._scheduler().run(block_text_list, on_done = lambda index, result: bar.update())
+        finally:
+            bar.close()
+
+    def translate_block(self, block_text_list : list[str]) -> str:
+        return "\n".join(run_coroutine(self.translate_block_async(block_text_list))).strip()
+
+    async def _split_back(self, block : list[str], result : str | None, cancel = None) -> list[str | None]:
+        """
+        Split a block result back into lines. When the backend merged or
+        split lines, translate each half again until the counts match.
+        A block skipped on cancel (None) gives None lines.
+        """
+        if result is None:
+            return [None] * len(block)
+        parts = result.split(self.separator)
+        if len(parts) == len(block):
+            return parts
+        if len(block) == 1:
+            return [result.replace(self.separator, " ")]
+        half    = len(block) // 2
+        halves  = [block[:half], block[half:]]
+        results = await self._scheduler().run([self.separator.join(each) for each in halves], cancel = cancel)
+        output  : list[str | None] = []
+        for each, each_result in zip(halves, results):
+            output.extend(await self._split_back(each, each_result, cancel))
+        return output
+
+    async def translate_packed_async(self, blocks : list[list[str]], progress : ProgressTracker = None) -> list[str | None]:
+        results = await self.translate_block_async([self.separator.join(each) for each in blocks], progress)
+        cancel  = progress.cancel if progress is not None else None
+        output  : list[str | None] = []
+        for block, result in zip(blocks, results):
+            output.extend(await self._split_back(block, result, cancel))
+        return output
+
+    async def translate_stream(
+        self,
+        pieces   : AsyncIterator[str],
+        progress : ProgressTracker = None,
+        depth    : int = 32,
+        linger   : float = 0.05,
+    ) -> AsyncIterator[str]:
+        """
+        Pipeline stage (see MyTranslator3): translate document pieces as they
+        arrive, up to `depth` of them at a time, and yield them in order.
+        Lines are deduplicated across pieces (a line already on its way
+        waits for that request). New lines go into an open block, sent
+        when it is full, or when a request slot is free and no more lines
+        are coming soon: the read-ahead queue is full, the input has ended,
+        or `linger` seconds went by. So blocks stay about as full as with
+        whole document packing. Network time is summed per request, so it
+        overlaps.
+        """
+        scheduler  = self._scheduler()
+        slots      = asyncio.Semaphore(self.concurrency)
+        results    : dict[str, asyncio.Future] = {}
+        remembered : set[str] = set()    # texts the translation memory had
+        sending    : set[asyncio.Task] = set()
+        queue      : asyncio.Queue = asyncio.Queue(maxsize = depth)
+        block      : list[str] = []    # open block, not sent yet
+        state      : dict = {"size" : 0, "in_flight" : 0, "ended" : False, "timer" : None}
+        self.report = dict.fromkeys(("lines", "cached", "masked", "blocks", "requests", "chars", "skipped"), 0)
+
+        def flush() -> None:
+            if state["timer"] is not None:
+                state["timer"].cancel()
+                state["timer"] = None
+            if not block:
+                return
+            lines = block.copy()
+            block.clear()
+            state["size"] = 0
+            state["in_flight"] += 1
+            self.report["blocks"] += 1
+            if progress is not None:
+                progress.add(1, stage = f"{self.source} -> {self.dest}")
+            task = asyncio.ensure_future(send(lines))
+            sending.add(task)
+            task.add_done_callback(sending.discard)
+
+        def flush_if_idle(waited : bool = False) -> None:
+            if waited:
+                # called by the timer, which is spent whatever happens next
+                state["timer"] = None
+            if not block or state["in_flight"] >= self.concurrency:
+                return
+            if waited or state["ended"] or queue.full():
+                flush()
+            elif state["timer"] is None:
+                state["timer"] = asyncio.get_running_loop().call_later(linger, flush_if_idle, True)
+
+        def add(line : str) -> None:
+            extra = len(line) + (len(self.separator) if block else 0)
+            if block and state["size"] + extra > self.max_length:
+                flush()
+                extra = len(line)
+            block.append(line)
+            state["size"] += extra
+
+        async def send(block : list[str]) -> None:
             try:
-                loop = asyncio.get_event_loop()
-            except:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            return loop.run_until_complete(self._translat_with_googletrans(text, index))
+                async with slots:
+                    if progress is not None and progress.cancelled:
+                        parts = [None] * len(block)
+                    else:
+                        start = time.perf_counter()
+                        result = await scheduler.send(self.separator.join(block))
+                        parts  = await self._split_back(block, result, progress.cancel if progress is not None else None)
+                        if timings.enabled:
+                            timings.add("network", time.perf_counter() - start)
+            except Exception as e:
+                for each in block:
+                    results[each].set_exception(e)
+                return
+            finally:
+                state["in_flight"] -= 1
+                flush_if_idle()
+            if progress is not None:
+                progress.advance()
+            fresh = {each : part for each, part in zip(block, parts) if part is not None}
+            self.report["skipped"] += len(block) - len(fresh)
+            if self.cache is not None and fresh:
+                with timings.stage("cache"):
+                    self.cache.put_many(self.source, self.dest, fresh.items())
+            for each, part in zip(block, parts):
+                results[each].set_result(part)
 
-    async def _translat_with_googletrans(self, text, index : int):
-        result = await self._translator_api_list[index+1].translate(text = text, dest = self.dest.lower(), src = self.source.lower())
-        return result.text
+        async def translate_piece(piece : str) -> tuple[SrtDocument, dict[int, str]]:
+            with timings.stage("parse"):
+                document : SrtDocument = load_document(piece)
+                lines  : list[str] = document.lines()
+                masked : list[MaskedLine] = [mask_line(each) for each in lines] if self.mask else []
+                texts  : list[str] = [each.text for each in masked] if self.mask else lines
+                new    : list[str] = [each for each in dict.fromkeys(texts) if each and each not in results]
+            loop = asyncio.get_running_loop()
+            for each in new:
+                results[each] = loop.create_future()
+            known : dict[str, str] = {}
+            if self.cache is not None and new:
+                with timings.stage("cache"):
+                    known = self.cache.get_many(self.source, self.dest, new)
+                for each, value in known.items():
+                    results[each].set_result(value)
+                remembered.update(known)
+            with timings.stage("pack"):
+                missing : list[str] = [each for each in new if each not in known]
+                for each in missing:
+                    add(each)
+                flush_if_idle()
+            self.report["lines"]  += len(lines)
+            self.report["cached"] += sum(each in remembered for each in texts)
+            self.report["masked"] += sum(len(line) - len(text) for line, text in zip(lines, texts))
 
-       # return "\n".join(["test" for _ in range(text.count("\n") + 2)])
+            waiting = {results[each] for each in texts if each and not results[each].done()}
+            if waiting:
+                await asyncio.wait(waiting)
+            translated : list[str] = []
+            for each in texts:
+                value = results[each].result() if each else None
+                # None: skipped after a cancel, kept as is
+                translated.append(each if value is None else value)
+            with timings.stage("reassemble"):
+                if self.mask:
+                    translated = [line.restore(each) for line, each in zip(masked, translated)]
+                return document, document.fill_texts(translated)
 
-    def cut_block(self, text : list[str]) -> list[str]:
-        total_text = "\n".join(text)
-        if len(total_text) < self.max_length:
-            return [total_text,]
+        async def produce() -> None:
+            async for piece in pieces:
+                await queue.put(asyncio.ensure_future(translate_piece(piece)))
+            # nothing else will fill the open block
+            state["ended"] = True
+            flush()
+            await queue.put(None)
 
-        output : list[str] = []
-        temp_text = ""
-        for each in text:
-            if (len(temp_text) + len(each)) < self.max_length:
-                temp_text = temp_text + each + "\n"
-            else:
-                output.append(temp_text.strip())
-                temp_text = ""
-        return output
+        producer = asyncio.ensure_future(produce())
+        try:
+            # pieces are written back in order, splits renumber the cues after them
+            offset : int = 0
+            while (task := await queue.get()) is not None:
+                document, texts = await task
+                with timings.stage("reassemble"):
+                    if self.reflow is None:
+                        text = document.serialize(texts)
+                    else:
+                        text, offset = self.reflow.apply(document, texts, offset)
+                yield text
+            await producer
+        finally:
+            producer.cancel()
+            if state["timer"] is not None:
+                state["timer"].cancel()
+            for task in sending:
+                task.cancel()
+            # on error, pieces read ahead and lines of failed requests are
+            # dropped; fetching their exceptions keeps asyncio from logging them
+            while not queue.empty():
+                task = queue.get_nowait()
+                if task is not None:
+                    task.cancel()
+                    if task.done() and not task.cancelled():
+                        task.exception()
+            for future in results.values():
+                if future.done() and not future.cancelled():
+                    future.exception()
 
-    def translate_block(self, block_text_list : str) -> str:
-        translated_str : str = ""
-        for each in tqdm(block_text_list):
-            this_result = self._translate_each(each)
-            print(this_result)
-            time.sleep(3)
-            translated_str = translated_str + this_result + "\n"
-        return translated_str.strip()
+    async def iter_translate_async(self, chunks : Iterable[str], progress : ProgressTracker = None) -> AsyncIterator[str]:
+        """
+        translate_stream over a document given in consecutive pieces cut at
+        line boundaries, re-cut into pieces of about two requests.
+        """
+        async def pieces() -> AsyncIterator[str]:
+            for piece in iter_cue_pieces(chunks, 2 * self.max_length):
+                yield piece
+
+        async for piece in self.translate_stream(pieces(), progress):
+            yield piece
+
+    def iter_translate(self, chunks : Iterable[str], progress : ProgressTracker = None) -> Iterator[str]:
+        """
+        iter_translate_async for a thread without an event loop.
+        """
+        return iter_async(self.iter_translate_async(chunks, progress))
 
-    def do_translate(self, text: str) -> str:
+    def translate_lines(self, lines : list[str], progress : ProgressTracker = None) -> list[str]:
+        """
+        Translate lines, asking the translation memory first so only
+        unknown lines (each sent once) go to the backend. With self.mask,
+        markup, URLs and long numbers are kept out of what is sent (see
+        src.utils.masking) and put back afterwards.
+        `self.report` holds the line / block / request counts afterwards.
+        Timed stages (src.utils.timing): parse, cache, pack, network, reassemble.
+
+        :param lines: Text lines
+        :param progress: ProgressTracker counting blocks; lines of the blocks
+                         skipped after a cancel are kept as is (and not cached)
+        :return: Translated lines, untranslated ones kept as is
+        """
+        with timings.stage("parse"):
+            masked : list[MaskedLine] = [mask_line(each) for each in lines] if self.mask else []
+            texts  : list[str] = [each.text for each in masked] if self.mask else lines
+            unique : list[str] = [each for each in dict.fromkeys(texts) if each]
+        known  : dict[str, str] = {}
+        if self.cache is not None:
+            with timings.stage("cache"):
+                known = self.cache.get_many(self.source, self.dest, unique)
+        with timings.stage("pack"):
+            missing : list[str] = [each for each in unique if each not in known]
+            blocks  : list[list[str]] = pack_lines(missing, self.max_length, self.separator)
+        self.report = {
+            "lines"    : len(lines),
+            # lines served by the translation memory, blank and masked-out ones are not
+            "cached"   : sum(each in known for each in texts),
+            "masked"   : sum(len(line) - len(text) for line, text in zip(lines, texts)),
+            "blocks"   : len(blocks),
+            "requests" : 0,
+            "chars"    : 0,
+        }
+        if progress is not None:
+            progress.add(len(blocks), stage = f"{self.source} -> {self.dest}")
+        if blocks:
+            with timings.stage("network"):
+                results = run_coroutine(self.translate_packed_async(blocks, progress))
+            fresh   = {each : result for each, result in zip(missing, results) if result is not None}
+            self.report["skipped"] = len(missing) - len(fresh)
+            if self.cache is not None:
+                with timings.stage("cache"):
+                    self.cache.put_many(self.source, self.dest, fresh.items())
+            known.update(fresh)
+        with timings.stage("reassemble"):
+            translated = [known.get(each, each) for each in texts]
+            if self.mask:
+                translated = [line.restore(each) for line, each in zip(masked, translated)]
+        return translated
+
+    def do_translate(self, text: str, progress : ProgressTracker = None) -> str:
         text = text.strip()
-        # block_text_list : list[str] = self.cut_block(text.split("\n"))
-        # translated_str : str = ""
-        #
-        # for each in tqdm(block_text_list):
-        #     this_result = self._translate_each(each)
-        #     time.sleep( random.random() * 2.5 + 0.5)
-        #     translated_str = translated_str + this_result + "\n"
-        #
-        # return translated_str
-
-        plain_text_list : list[str] = self.get_plain_text_list_from_str(text)
-        block_text_list : list[str] = self.cut_block(plain_text_list)
-        return self.insert_back2text(text, self.translate_block(block_text_list))
+        with timings.stage("parse"):
+            document : SrtDocument = load_document(text)
+            lines    : list[str] = document.lines()
+        translated_lines = self.translate_lines(lines, progress)
+        with timings.stage("reassemble"):
+            if self.reflow is None:
+                translated : str = document.fill_lines(translated_lines)
+            else:
+                translated, _ = self.reflow.apply(document, document.fill_texts(translated_lines))
+        return translated
 
 class MyTranslator3:
-    def __init__(self, source : str, dest : str) -> None:
-        if source == "zh-TW" and dest =='en':
-            self.t1 = MyTranslator(mode = "tw2s")
-            self.t2 = MyTranslator2(source='zh-CN', dest = 'en')
-        if dest == "zh-TW" and source == 'en':
-            self.t1 = MyTranslator2(source='en', dest = 'zh-CN')
-            self.t2 = MyTranslator(mode = "s2twp")
+    """
+    A chain of translators run as a pipeline. The document is cut into
+    pieces at cue boundaries and every piece flows through all the stages,
+    which are connected by bounded queues: OpenCC works on the pieces that
+    are back while later ones are still on the network, and the first
+    request goes out as soon as the first piece is converted. The total
+    time is close to the slowest stage instead of the sum.
+    """
+    def __init__(
+        self,
+        source     : str = None,
+        dest       : str = None,
+        cache      : TranslationMemory = None,
+        phrases    = None,
+        backends   : list = None,
+        stages     : list = None,
+        chunk_size : int = None,
+        depth      : int = 8,
+        mode       : str = None,
+        reflow     = None,
+    ) -> None:
+        """
+        :param backends: TranslationBackend list for the online step, see MyTranslator2
+        :param stages: Any number of translators with translate_stream, in
+                       order, e.g. [MyTranslator2(...), MyTranslator("s2hk")];
+                       default from source / dest
+        :param chunk_size: Characters per piece, default about two requests
+        :param depth: Pieces a queue holds between two stages
+        :param mode: OpenCC step between zh-CN and the Chinese side, default
+                     tw2s / s2twp (see src.utils.lang.opencc_mode)
+        :param reflow: src.utils.reflow.Reflow, done by the last stage as it
+                       writes its pieces
+        """
+        if stages is None:
+            if dest == 'en':
+                stages = [
+                    MyTranslator(mode = mode or "tw2s", phrases = phrases),
+                    MyTranslator2(source='zh-CN', dest = 'en', cache = cache, backends = backends),
+                ]
+            if source == 'en':
+                stages = [
+                    MyTranslator2(source='en', dest = 'zh-CN', cache = cache, backends = backends),
+                    MyTranslator(mode = mode or "s2twp", phrases = phrases),
+                ]
+        self.stages = stages
+        if reflow is not None:
+            stages[-1].reflow = reflow
+        limits = [each.max_length for each in stages if isinstance(each, MyTranslator2)]
+        # the timing lines and numbers of an SRT are not sent, a piece of
+        # twice max_length characters fills about one request
+        self.chunk_size : int = chunk_size or 2 * min(limits, default = 32 << 10)
+        self.depth      : int = depth
+        # the online stages' reports of the last run, by "source -> dest"
+        self.report     : dict[str, dict[str, int]] = {}
+
+    async def iter_translate_async(self, chunks : Iterable[str], progress : ProgressTracker = None) -> AsyncIterator[str]:
+        """
+        Run the pipeline over a document given in consecutive pieces cut at
+        line boundaries, yielding the output pieces in order as the last
+        stage writes them.
+        """
+        queues : list[asyncio.Queue] = [asyncio.Queue(maxsize = self.depth) for _ in self.stages]
+        # unbounded: a failed task puts its exception here without waiting
+        output : asyncio.Queue = asyncio.Queue()
+
+        async def feed() -> None:
+            for piece in iter_cue_pieces(chunks, self.chunk_size):
+                await queues[0].put(piece)
+            await queues[0].put(None)
+
+        async def drain(queue : asyncio.Queue) -> AsyncIterator[str]:
+            while (piece := await queue.get()) is not None:
+                yield piece
 
-    def do_translate(self, text):
-        return self.t2.do_translate(self.t1.do_translate(text))
+        async def run_stage(i : int) -> None:
+            target = queues[i + 1] if i + 1 < len(self.stages) else output
+            async for piece in self.stages[i].translate_stream(drain(queues[i]), progress):
+                await target.put(piece)
+            await target.put(None)
 
+        def on_done(task : asyncio.Task) -> None:
+            # a failed stage would leave its neighbours waiting on the queues
+            if not task.cancelled() and task.exception() is not None:
+                output.put_nowait(task.exception())
+
+        tasks = [asyncio.ensure_future(feed())] + [asyncio.ensure_future(run_stage(i)) for i in range(len(self.stages))]
+        for task in tasks:
+            task.add_done_callback(on_done)
+        try:
+            while (piece := await output.get()) is not None:
+                if isinstance(piece, BaseException):
+                    raise piece
+                yield piece
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.report = {
+            f"{stage.source} -> {stage.dest}" : stage.report for stage in self.stages if isinstance(stage, MyTranslator2)
+        }
+
+    def iter_translate(self, chunks : Iterable[str], progress : ProgressTracker = None) -> Iterator[str]:
+        """
+        iter_translate_async for a thread without an event loop.
+        """
+        return iter_async(self.iter_translate_async(chunks, progress))
 
+    async def do_translate_async(self, text : str, progress : ProgressTracker = None) -> str:
+        return "".join([piece async for piece in self.iter_translate_async([text.strip()], progress)])
 
+    def do_translate(self, text, progress : ProgressTracker = None):
+        return run_coroutine(self.do_translate_async(text, progress))
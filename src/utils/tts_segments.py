@@ -0,0 +1,189 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable
+
+from src.utils import mp3
+from src.utils.audio_cache import AudioCache, write_atomic
+from src.utils.timing import timings
+
+# text, voice, rate, pitch -> mp3 bytes
+Synthesize = Callable[[str, str, int, int], Awaitable[bytes]]
+# text, voice, rate, pitch -> mp3 chunks
+Stream     = Callable[[str, str, int, int], AsyncIterator[bytes]]
+
+SENTENCE_RE = re.compile(r"[^。！？!?；;\n]*(?:[。！？!?；;]+[」』”’)）]*|\n|$)")
+
+
+def split_segments(text : str, max_chars : int = 200) -> list[str]:
+    """
+    Split text into sentences, each cached and synthesized on its own.
+    Sentences longer than max_chars are cut at commas, then hard.
+
+    :param text: Text to read
+    :return: Non empty segments in reading order
+    """
+    segments : list[str] = []
+    for match in SENTENCE_RE.finditer(text):
+        sentence = match.group().strip()
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(each, 0, max_chars) for each in "，,、 ")
+            cut = cut + 1 if cut > 0 else max_chars
+            segments.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            segments.append(sentence)
+    return segments
+
+
+def format_rate(rate : int) -> str | None:
+    return f"{rate:+d}%" if rate != 1 else None
+
+
+def format_pitch(pitch : int) -> str | None:
+    return f"{pitch:+d}Hz" if pitch != 1 else None
+
+
+def segment_key(voice : str, rate : int, pitch : int, text : str) -> str:
+    return hashlib.md5(f"{voice}_{rate}_{pitch}_{text}".encode("utf-8")).hexdigest()
+
+
+async def edge_stream(text : str, voice : str, rate : int, pitch : int) -> AsyncIterator[bytes]:
+    """
+    Audio chunks from edge-tts as they arrive.
+    """
+    import edge_tts
+
+    communicate = edge_tts.Communicate(
+        text  = text,
+        voice = voice,
+        rate  = format_rate(rate),
+        pitch = format_pitch(pitch),
+    )
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            yield chunk["data"]
+
+
+async def edge_synthesize(text : str, voice : str, rate : int, pitch : int) -> bytes:
+    return b"".join([chunk async for chunk in edge_stream(text, voice, rate, pitch)])
+
+
+class SegmentSynthesizer:
+    """
+    Synthesize text segment by segment. Each segment is cached under the hash
+    of (voice, rate, pitch, segment), only missing ones are synthesized, at
+    most `concurrency` at a time, and the MP3 frames are joined as they are.
+
+    `stream` yields the audio of one segment in chunks; when only
+    `synthesize` is given each segment arrives as a single chunk.
+    """
+    def __init__(
+        self,
+        cache       : AudioCache | str,
+        synthesize  : Synthesize = None,
+        concurrency : int = 4,
+        stream      : Stream = None,
+    ) -> None:
+        self.cache       = AudioCache(cache) if isinstance(cache, str) else cache
+        self.concurrency = concurrency
+        self.report      : dict[str, float] = {}
+        if stream is None:
+            stream = _single_chunk(synthesize) if synthesize is not None else edge_stream
+        self.stream = stream
+
+    async def iter_audio(self, text : str, voice : str, rate : int, pitch : int) -> AsyncIterator[bytes]:
+        """
+        Yield the MP3 of the whole text in order, as soon as it is available:
+        cached segments at once, missing ones chunk by chunk while they are
+        synthesized. self.report gets the segment counts, the time to first
+        audio and the total time in ms.
+        """
+        async for _, chunk in self.iter_segments(split_segments(text), voice, rate, pitch):
+            yield chunk
+
+    async def render(self, segments : list[str], voice : str, rate : int, pitch : int) -> list[bytes]:
+        """
+        :return: MP3 of each segment, in order
+        """
+        output : list[bytearray] = [bytearray() for _ in segments]
+        async for index, chunk in self.iter_segments(segments, voice, rate, pitch):
+            output[index].extend(chunk)
+        return [bytes(each) for each in output]
+
+    async def iter_segments(self, segments : list[str], voice : str, rate : int, pitch : int) -> AsyncIterator[tuple[int, bytes]]:
+        """
+        Like iter_audio for already split segments, yielding (segment index, chunk).
+        """
+        start    = time.perf_counter()
+        keys     = [segment_key(voice, rate, pitch, each) for each in segments]
+        cached   : dict[int, bytes] = {}
+        for i, key in enumerate(keys):
+            data = self.cache.read(key)
+            if data is not None:
+                cached[i] = data
+        queues   : dict[int, asyncio.Queue] = {
+            i : asyncio.Queue() for i in range(len(keys)) if i not in cached
+        }
+        self.report = {"segments" : len(segments), "cached" : len(segments) - len(queues), "synthesized" : len(queues)}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(index : int) -> None:
+            queue = queues[index]
+            try:
+                async with semaphore:
+                    parts : list[bytes] = []
+                    async for chunk in self.stream(segments[index], voice, rate, pitch):
+                        parts.append(chunk)
+                        queue.put_nowait(chunk)
+                self.cache.put(keys[index], b"".join(parts), voice = voice)
+                queue.put_nowait(None)
+            except Exception as e:
+                queue.put_nowait(e)
+
+        # the semaphore is fair, so segments are synthesized in reading order
+        tasks = [asyncio.create_task(worker(index)) for index in queues]
+        try:
+            for index in range(len(keys)):
+                if index in queues:
+                    while (chunk := await queues[index].get()) is not None:
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        yield index, self._timed(chunk, start)
+                else:
+                    yield index, self._timed(mp3.strip_id3(cached[index]), start)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.report["total_ms"] = (time.perf_counter() - start) * 1000
+        if timings.enabled:
+            timings.add("tts", self.report["total_ms"] / 1000)
+
+    def _timed(self, chunk : bytes, start : float) -> bytes:
+        if "first_audio_ms" not in self.report:
+            self.report["first_audio_ms"] = (time.perf_counter() - start) * 1000
+            if timings.enabled:
+                timings.add("tts first audio", self.report["first_audio_ms"] / 1000)
+        return chunk
+
+    async def save(self, text : str, voice : str, rate : int, pitch : int, output_path : str) -> str:
+        audio = [chunk async for chunk in self.iter_audio(text, voice, rate, pitch)]
+        write_atomic(output_path, b"".join(audio))
+        return output_path
+
+    async def save_to_cache(self, text : str, voice : str, rate : int, pitch : int) -> str:
+        """
+        Synthesize the whole text into the cache under its full-text key.
+
+        :return: Path of the cached file
+        """
+        audio = [chunk async for chunk in self.iter_audio(text, voice, rate, pitch)]
+        return self.cache.put(segment_key(voice, rate, pitch, text), b"".join(audio), voice = voice)
+
+
+def _single_chunk(synthesize : Synthesize) -> Stream:
+    async def stream(text : str, voice : str, rate : int, pitch : int) -> AsyncIterator[bytes]:
+        yield await synthesize(text, voice, rate, pitch)
+    return stream
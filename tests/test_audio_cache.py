@@ -0,0 +1,61 @@
+import os
+
+from src.utils import mp3
+from src.utils.audio_cache import AudioCache
+
+# 10 frames of 144 bytes: MPEG-2 Layer III, 24 kHz, 48 kbps, mono
+AUDIO = (mp3.EDGE_TTS_HEADER + bytes(140)) * 10
+
+
+def write_legacy(directory : str, count : int) -> None:
+    for i in range(count):
+        with open(os.path.join(directory, f"legacy{i}.mp3"), "wb") as file:
+            file.write(AUDIO)
+    with open(os.path.join(directory, "truncated.mp3"), "wb") as file:
+        file.write(AUDIO[:-10])
+
+
+def test_legacy_files_are_not_read_on_open(tmp_path, monkeypatch):
+    write_legacy(tmp_path, 100)
+    monkeypatch.setattr(AudioCache, "adopt", lambda self, limit = None: len(self._legacy))
+    cache = AudioCache(str(tmp_path))
+    assert cache.stats()["entries"] == 0
+    assert len(cache._legacy) == 101
+
+    # a lookup adopts just the file asked for
+    assert cache.get("legacy7") == cache.path_for("legacy7")
+    assert cache.get("truncated") is None
+    assert not os.path.exists(cache.path_for("truncated"))
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["duration_ms"] == 240
+    cache.close()
+
+
+def test_legacy_files_are_adopted_in_the_background(tmp_path):
+    write_legacy(tmp_path, 100)
+    cache = AudioCache(str(tmp_path))
+    cache._adopter.join()
+    assert cache.stats()["entries"] == 100
+    assert cache.adopt() == 0
+    assert not os.path.exists(cache.path_for("truncated"))
+    cache.close()
+
+    # reopened: everything is indexed, nothing left to adopt
+    cache = AudioCache(str(tmp_path), max_entries = 50)
+    assert cache._adopter is None
+    assert cache.get("legacy3") is not None
+    cache.close()
+
+
+def test_running_totals_match_the_index(tmp_path):
+    cache = AudioCache(str(tmp_path), max_entries = 20)
+    for i in range(30):
+        cache.put(f"key{i}", AUDIO)
+    # replacing an entry does not count it twice
+    cache.put("key29", AUDIO * 2)
+    stats = cache.stats()
+    assert cache.evictions and stats["entries"] <= 20
+    assert (stats["entries"], stats["bytes"], stats["duration_ms"]) == cache._totals()
+    cache.clear()
+    assert cache.stats()["entries"] == 0 == cache._totals()[0]
+    cache.close()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("googletrans")
+
+from googletrans import Translator
+
+from src.utils.backends import GoogletransBackend
+
+
+def fake_translate(monkeypatch, delay : float = 0.0):
+    async def translate(self, text, dest, src):
+        assert not self.client.is_closed, "request on a closed client"
+        await asyncio.sleep(delay)
+        return SimpleNamespace(text = f"[{dest}]{text}")
+    monkeypatch.setattr(Translator, "translate", translate)
+
+
+def test_googletrans_clients_are_closed_with_their_loop(monkeypatch):
+    fake_translate(monkeypatch)
+    backend = GoogletransBackend("en", "zh-TW")
+
+    async def run():
+        assert await backend.translate_async("hello") == "[zh-tw]hello"
+        return await backend.client()
+
+    clients = [asyncio.run(run()) for _ in range(3)]
+    assert len({id(each) for each in clients}) == 3
+    assert all(each.client.is_closed for each in clients)
+
+
+def test_googletrans_client_is_reused_within_a_loop(monkeypatch):
+    fake_translate(monkeypatch)
+    backend = GoogletransBackend("en", "zh-TW")
+
+    async def run():
+        await backend.translate_async("a")
+        first = await backend.client()
+        await asyncio.gather(*(backend.translate_async(str(i)) for i in range(5)))
+        assert await backend.client() is first and not first.client.is_closed
+        return first
+
+    assert asyncio.run(run()).client.is_closed
+
+
+def test_googletrans_threads_do_not_close_each_others_client(monkeypatch):
+    # JobQueue and the server run online jobs on several threads through one translator
+    fake_translate(monkeypatch, delay = 0.001)
+    backend = GoogletransBackend("en", "zh-TW")
+    results : dict[int, list[str]] = {}
+    errors  : list[BaseException]  = []
+
+    async def requests(n : int) -> list[str]:
+        return [await backend.translate_async(f"{n}-{i}") for i in range(50)]
+
+    def worker(n : int):
+        try:
+            results[n] = asyncio.run(requests(n))
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target = worker, args = (n,)) for n in range(2)]
+    for each in threads:
+        each.start()
+    for each in threads:
+        each.join()
+    assert not errors
+    assert results == {n : [f"[zh-tw]{n}-{i}" for i in range(50)] for n in range(2)}
@@ -0,0 +1,37 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+pytest.importorskip("PyQt6.QtMultimedia", exc_type = ImportError)
+
+from PyQt6.QtCore import QCoreApplication, QIODevice, QThread
+
+from src.gui.tts import GrowingBuffer
+
+
+@pytest.fixture(scope = "module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_reads_do_not_wait_and_ready_read_comes_from_the_owner_thread(app):
+    buffer = GrowingBuffer()
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    threads : list[QThread] = []
+    buffer.readyRead.connect(lambda: threads.append(QThread.currentThread()))
+
+    start = time.perf_counter()
+    assert buffer.read(1024) == b""
+    assert time.perf_counter() - start < 0.1
+    assert not buffer.atEnd()
+
+    writer = threading.Thread(target = lambda: (buffer.append(b"abc"), buffer.append(b"def"), buffer.finish()))
+    writer.start()
+    writer.join()
+    app.processEvents()
+    assert threads and all(each is app.thread() for each in threads)
+    assert buffer.read(4) == b"abcd"
+    assert buffer.read(1024) == b"ef"
+    assert buffer.atEnd()
@@ -0,0 +1,37 @@
+from src.utils.fake_backend import MockBackend
+from src.utils.incremental import IncrementalTranslator
+from src.utils.translator import MyTranslator2
+
+SRT = "".join(
+    f"{i}\n00:00:0{i},000 --> 00:00:0{i},900\nline number {i}\n\n" for i in range(1, 6)
+)
+
+
+class RecordingBackend(MockBackend):
+    def __init__(self) -> None:
+        super().__init__("fake", dest = "zh-TW")
+        self.sent : list[str] = []
+
+    async def translate_async(self, text : str) -> str:
+        self.sent.append(text)
+        return await super().translate_async(text)
+
+
+def test_only_the_edited_cue_is_sent_again():
+    backend    = RecordingBackend()
+    translator = MyTranslator2(dest = "zh-TW", backends = [backend])
+    incremental = IncrementalTranslator()
+    assert SRT.endswith("\n")
+
+    first, patches = incremental.translate("en", SRT, translator.do_translate)
+    assert patches is None
+    assert first.count("\n") == SRT.count("\n")
+    assert incremental.input_lines, "the full translation was not kept"
+
+    backend.sent.clear()
+    edited = SRT.replace("line number 3", "an edited line")
+    second, patches = incremental.translate("en", edited, translator.do_translate, base_output = first)
+    assert patches is not None
+    assert [line for text in backend.sent for line in text.split("\n")] == ["an edited line"]
+    assert "[zh-TW]an edited line" in second
+    assert second.replace("[zh-TW]an edited line", "[zh-TW]line number 3") == first
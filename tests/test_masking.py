@@ -0,0 +1,35 @@
+from benchmarks.bench_masking import ManglingBackend, run
+from benchmarks.corpus import STYLED_LINES, make_srt
+from src.utils.masking import PLACEHOLDER_RE, mask_line
+
+# input that already looks like the placeholders masking inserts
+COLLIDING = [
+    "<b>用 {0} 代替</b>名字<i>好</i>",
+    "{1} 和 <i>我们</i> {0}",
+    "{0}<i>你好</i>{1}",
+    "{\\an8}替换 { 2 } 为 <font color=\"red\">{0}</font> 了",
+]
+
+
+def test_round_trip_without_translation():
+    for line in STYLED_LINES + COLLIDING:
+        masked = mask_line(line)
+        assert masked.restore(masked.text) == line
+        # no markup or input placeholder is sent as it is
+        assert "<" not in masked.text and "{\\" not in masked.text
+        assert [int(each) for each in PLACEHOLDER_RE.findall(masked.text)] == list(range(len(masked.spans)))
+
+
+def test_round_trip_through_a_mangling_backend():
+    for lines in (STYLED_LINES, COLLIDING):
+        content = make_srt(20_000, lines = lines)
+        _, intact, total = run(content, mask = True, max_length = 500)
+        assert intact == total
+    # without masking the mangled markup comes back broken
+    _, intact, total = run(make_srt(20_000, lines = STYLED_LINES), mask = False, max_length = 500)
+    assert intact < total
+
+
+def test_dropped_placeholders_are_appended():
+    masked = mask_line("我<i>今天</i>去了")
+    assert masked.restore(masked.text.replace("{0}", "").replace("{1}", "")) == "我今天去了<i></i>"
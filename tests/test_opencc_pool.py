@@ -0,0 +1,66 @@
+import threading
+
+from benchmarks.corpus import make_srt, unique_lines
+from src.utils import translator as translator_module
+from src.utils.translator import OpenCCChain, get_opencc
+
+MODES   = ["s2twp", "t2s", "jp2t+t2s", "s2t+t2jp"]
+THREADS = 8
+
+
+def run_threads(target, count : int = THREADS) -> list:
+    """
+    Start `count` threads at once (behind a barrier), return what each gave.
+    """
+    barrier = threading.Barrier(count)
+    results : list = [None] * count
+    errors  : list[BaseException] = []
+
+    def worker(i : int):
+        try:
+            barrier.wait()
+            results[i] = target(i)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target = worker, args = (i,)) for i in range(count)]
+    for each in threads:
+        each.start()
+    for each in threads:
+        each.join()
+    assert not errors, errors
+    return results
+
+
+def test_each_config_is_loaded_once_under_concurrency(monkeypatch):
+    monkeypatch.setattr(translator_module, "_opencc_pool", {})
+    built : list[str] = []
+    original = translator_module.OpenCC
+
+    def counting(mode):
+        built.append(mode)
+        return original(mode)
+    monkeypatch.setattr(translator_module, "OpenCC", counting)
+
+    converters = run_threads(lambda i: get_opencc(MODES[i % len(MODES)]))
+    assert sorted(built) == sorted({config for mode in MODES for config in mode.split("+")})
+    for i, each in enumerate(converters):
+        again = get_opencc(MODES[i % len(MODES)])
+        if isinstance(each, OpenCCChain):
+            assert [id(cc) for cc in each.converters] == [id(cc) for cc in again.converters]
+        else:
+            assert each is again
+
+
+def test_concurrent_conversions_match_single_threaded():
+    text     = make_srt(64 << 10, unique_lines(500))
+    expected = {mode : get_opencc(mode).convert(text) for mode in MODES}
+
+    def convert(i : int) -> list[tuple[str, str]]:
+        # several rounds per thread over every mode, so the conversions overlap
+        return [(mode, get_opencc(mode).convert(text)) for _ in range(3) for mode in MODES]
+
+    for results in run_threads(convert):
+        assert len(results) == 3 * len(MODES)
+        for mode, result in results:
+            assert result == expected[mode], f"{mode} differs under concurrency"
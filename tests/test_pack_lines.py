@@ -0,0 +1,44 @@
+import pytest
+
+from src.utils.translator import pack_lines
+
+
+def check(lines : list[str], max_length : int, separator : str = "\n") -> list[list[str]]:
+    blocks = pack_lines(lines, max_length, separator)
+    # nothing dropped, nothing reordered
+    assert [line for block in blocks for line in block] == lines
+    assert separator.join(separator.join(block) for block in blocks) == separator.join(lines)
+    for block in blocks:
+        assert block
+        assert len(block) == 1 or len(separator.join(block)) <= max_length
+    return blocks
+
+
+def test_line_longer_than_max_length_gets_its_own_block():
+    blocks = check(["short", "x" * 25, "tail"], 10)
+    assert blocks == [["short"], ["x" * 25], ["tail"]]
+
+
+def test_exact_boundary():
+    # 4 + 1 + 5 == 10 fits, one more character does not
+    assert check(["abcd", "efghi", "j"], 10) == [["abcd", "efghi"], ["j"]]
+    assert check(["abcd", "efghij"], 10) == [["abcd"], ["efghij"]]
+    assert check(["x" * 10, "y"], 10) == [["x" * 10], ["y"]]
+
+
+def test_empty_lines_are_kept():
+    blocks = check(["", "a", "", "", "b", ""], 3)
+    assert sum(len(block) for block in blocks) == 6
+    assert check([""], 5) == [[""]]
+    assert check([], 5) == []
+
+
+def test_trailing_partial_block():
+    blocks = check([f"line {i}" for i in range(7)], 20)
+    assert blocks[-1] == ["line 6"]
+
+
+@pytest.mark.parametrize("separator", ["\n", "\n\n", " ||| "])
+def test_join_round_trips(separator):
+    lines = [("word " * (i % 9)).strip() for i in range(200)]
+    check(lines, 37, separator)
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from src.utils.phrases import PhraseDictionary, parse_entries
+from src.utils.translator import MyTranslator
+
+PHRASES = "# user entries\n鼠标\t老鼠\n视频\t影音檔\nbad line without tab\n有 空格\tx\n\n"
+SRT     = "1\r\n00:00:01,000 --> 00:00:02,000\r\n鼠标和视频\r\n\r\n2\r\n00:00:03,000 --> 00:00:04,000\r\n网络软件\r\n"
+
+
+@pytest.fixture
+def phrases(tmp_path) -> PhraseDictionary:
+    path = os.path.join(tmp_path, "phrases.txt")
+    with open(path, "w", encoding = "utf-8") as file:
+        file.write(PHRASES)
+    return PhraseDictionary(path, cache_dir = os.path.join(tmp_path, "cache"))
+
+
+def test_malformed_lines_are_collected_not_printed(phrases, capsys):
+    skipped : list[tuple[int, str]] = []
+    assert parse_entries(PHRASES, skipped) == {"鼠标" : "老鼠", "视频" : "影音檔"}
+    assert skipped == [(4, "bad line without tab"), (5, "有 空格\tx")]
+    assert phrases.skipped == skipped and len(phrases) == 2
+    # loaded back from the on-disk cache
+    assert PhraseDictionary(phrases.path, cache_dir = os.path.dirname(phrases.directory)).skipped == skipped
+    assert capsys.readouterr().out == ""
+
+
+def test_phrases_override_opencc_in_translate(phrases):
+    plain  = MyTranslator("s2twp").translate(SRT, show_progress = False)
+    result = MyTranslator("s2twp", phrases = phrases).translate(SRT, show_progress = False)
+    assert "滑鼠和影片" in plain
+    assert "老鼠和影音檔" in result
+    # everything else is converted as without phrases
+    assert result.replace("老鼠和影音檔", "滑鼠和影片") == plain
+    assert phrases.report["applied"] > 0
+
+
+def test_phrases_override_opencc_in_convert_file(phrases, tmp_path):
+    src, dst = os.path.join(tmp_path, "in.srt"), os.path.join(tmp_path, "out.srt")
+    with open(src, "w", encoding = "utf-8", newline = "") as file:
+        file.write(SRT)
+    translator = MyTranslator("s2twp", phrases = phrases)
+    translator.convert_file(src, dst, chunk_size = 16)
+    with open(dst, "r", encoding = "utf-8", newline = "") as file:
+        result = file.read()
+    assert "老鼠和影音檔" in result and "網路軟體" in result
+    assert result == translator.translate(SRT, show_progress = False)[:-1]
@@ -0,0 +1,28 @@
+from src.utils.progress import ProgressTracker
+from src.utils.reflow import Reflow
+from src.utils.srt import format_ms, load_document
+from src.utils.translator import MyTranslator
+
+LONG = "我们今天晚上一起去看电影，然后再去吃宵夜好不好？我觉得这样安排非常完美，大家都会很开心的"
+SRT  = "".join(
+    f"{i}\n{format_ms(i * 6000)} --> {format_ms(i * 6000 + 5000)}\n{LONG if i % 2 else '短句'}\n\n"
+    for i in range(1, 30)
+)
+
+
+def test_chunked_translate_matches_whole_document():
+    reflow  = Reflow(width = 32, max_lines = 2, split = True)
+    whole   = MyTranslator("s2twp", reflow = reflow).do_translate(SRT)
+    chunked = MyTranslator("s2twp", reflow = reflow, chunk_size = 100).translate(SRT, show_progress = False)
+    assert chunked == whole + "\n"
+    cues = load_document(whole).cues
+    assert len(cues) > 29, "nothing was split"
+    assert [cue.index for cue in cues] == list(range(1, len(cues) + 1))
+
+
+def test_progress_chunks_match_whole_document():
+    reflow = Reflow(width = 32, max_lines = 2, split = True)
+    whole  = MyTranslator("s2twp", reflow = reflow).do_translate(SRT)
+    small  = MyTranslator("s2twp", reflow = reflow, chunk_size = 100)
+    small.progress_chunk_size = 100
+    assert small.do_translate(SRT, ProgressTracker()) == whole
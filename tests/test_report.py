@@ -0,0 +1,44 @@
+import asyncio
+import os
+
+from src.utils.fake_backend import MockBackend
+from src.utils.srt import iter_cue_chunks
+from src.utils.translation_memory import TranslationMemory
+from src.utils.translator import MyTranslator2
+
+# a blank line, a line masking leaves nothing of, a remembered line (twice) and a new one
+SRT = (
+    "1\n00:00:01,000 --> 00:00:01,900\n\n\n"
+    "2\n00:00:02,000 --> 00:00:02,900\n<i>♪ ♪</i>\n\n"
+    "3\n00:00:03,000 --> 00:00:03,900\nknown line\n\n"
+    "4\n00:00:04,000 --> 00:00:04,900\nknown line\n\n"
+    "5\n00:00:05,000 --> 00:00:05,900\nnew line\n\n"
+)
+
+
+def make_translator(tmp_path) -> MyTranslator2:
+    memory = TranslationMemory(os.path.join(tmp_path, "memory.sqlite3"))
+    memory.put("auto", "zh-TW", "known line", "已知")
+    return MyTranslator2(dest = "zh-TW", cache = memory, backends = [MockBackend("fake")])
+
+
+def test_cached_counts_only_translation_memory_hits(tmp_path):
+    translator = make_translator(tmp_path)
+    result = translator.do_translate(SRT)
+    assert result.count("已知") == 2 and "[zh-TW]new line" in result
+    assert translator.report["cached"] == 2
+
+
+def test_cached_counts_only_translation_memory_hits_when_streaming(tmp_path):
+    translator = make_translator(tmp_path)
+    pieces = list(iter_cue_chunks(SRT, 1))
+    assert len(pieces) > 1
+
+    async def run() -> str:
+        async def feed():
+            for piece in pieces:
+                yield piece
+        return "".join([each async for each in translator.translate_stream(feed())])
+
+    assert asyncio.run(run()).count("已知") == 2
+    assert translator.report["cached"] == 2
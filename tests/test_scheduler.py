@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from src.utils.fake_backend import FakeTranslator
+from src.utils.scheduler import BlockScheduler, TokenBucket
+
+
+def test_results_keep_block_order_under_jitter():
+    fake      = FakeTranslator(latency = 0.001, jitter = 0.02, seed = 1)
+    scheduler = BlockScheduler(fake.translate_async, concurrency = 8,
+                               limiter = TokenBucket(rate = 1000.0, capacity = 8))
+    blocks    = [f"block {i}\nline" for i in range(40)]
+    finished  : list[int] = []
+    results   = asyncio.run(scheduler.run(blocks, on_done = lambda i, _: finished.append(i)))
+    assert results == [f"[zh-TW]block {i}\n[zh-TW]line" for i in range(40)]
+    # they did finish out of order
+    assert sorted(finished) == list(range(40)) and finished != list(range(40))
+
+
+def test_rate_drops_after_429():
+    fake      = FakeTranslator(max_rps = 4)
+    limiter   = TokenBucket(rate = 50.0, capacity = 10)
+    scheduler = BlockScheduler(fake.translate_async, concurrency = 10, limiter = limiter,
+                               retries = 20, backoff = 0.01)
+    results   = asyncio.run(scheduler.run([str(i) for i in range(6)]))
+    assert results == [f"[zh-TW]{i}" for i in range(6)]
+    assert fake.throttled > 0 and limiter.throttled == fake.throttled
+    assert limiter.rate < 50.0
+
+
+def test_hard_error_cancels_the_other_blocks():
+    started   : list[str] = []
+    cancelled : list[str] = []
+
+    async def func(block : str) -> str:
+        started.append(block)
+        if block == "bad":
+            raise ValueError("hard error")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(block)
+            raise
+        return block
+
+    async def run() -> list[asyncio.Task]:
+        scheduler = BlockScheduler(func, concurrency = 4, retries = 0,
+                                   limiter = TokenBucket(rate = 1000.0, capacity = 4))
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(scheduler.run(["a", "b", "bad", "c", "d"]), 5)
+        return [each for each in asyncio.all_tasks() if each is not asyncio.current_task()]
+
+    left = asyncio.run(run())
+    assert not left
+    assert sorted(cancelled) == sorted(each for each in started if each != "bad")
+    # blocks still waiting for a slot were never sent
+    assert "d" not in started
@@ -0,0 +1,82 @@
+import pytest
+
+from src.utils.srt import load_document, parse_srt
+
+CUES = [
+    (1, 1000, 2000, "Hello"),
+    (2, 3000, 4500, "two\nlines"),
+    (3, 5000, 6000, "third"),
+]
+
+
+def make(newline : str = "\n", bom : str = "") -> str:
+    return bom + newline.join(
+        f"{index}{newline}00:00:0{start // 1000},{start % 1000:03d} --> 00:00:0{end // 1000},{end % 1000:03d}{newline}"
+        f"{text.replace(chr(10), newline)}{newline}"
+        for index, start, end, text in CUES
+    )
+
+
+def check_round_trip(source : str) -> None:
+    document = parse_srt(source)
+    assert document.serialize() == source
+    assert document.serialize(document.texts()) == source
+    assert document.fill_lines(document.lines()) == source
+    # every text line replaced, everything else written back untouched
+    upper = document.fill_lines([each.upper() for each in document.lines()])
+    assert upper.lower() == source.lower() and upper != source
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("bom", ["", "\ufeff"])
+def test_cues_and_round_trip(newline, bom):
+    source   = make(newline, bom)
+    document = parse_srt(source)
+    assert document.newline == newline
+    assert [(cue.index, cue.start_ms, cue.end_ms) for cue in document] == [each[:3] for each in CUES]
+    assert document.texts() == [each[3].replace("\n", newline) for each in CUES]
+    assert document.lines() == ["Hello", "two", "lines", "third"]
+    check_round_trip(source)
+
+
+def test_blank_lines_inside_and_around_cues():
+    source = (
+        "\n\n"
+        "1\n00:00:01,000 --> 00:00:02,000\nfirst\n\nstill first\n\n\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n\n\n"
+        "3\n00:00:05,000 --> 00:00:06,000\n  last  \n\n\n"
+    )
+    document = parse_srt(source)
+    assert document.texts() == ["first\n\nstill first", "", "  last"]
+    assert document.lines() == ["first", "still first", "  last"]
+    check_round_trip(source)
+
+
+def test_dot_and_long_hours_in_timestamps():
+    document = parse_srt("7\n100:00:01.500 --> 100:00:02,250 X1:0 Y1:0\ntext\n")
+    cue, = document.cues
+    assert (cue.index, cue.start_ms, cue.end_ms) == (7, 360_001_500, 360_002_250)
+    assert document.texts() == ["text"]
+
+
+def test_malformed_timestamps_are_not_cues():
+    source = (
+        "1\n00:00:01,000 --> 00:00:02,000\nkept\n\n"
+        "2\n00:00:3,000 --> 00:00:04,000\nbad seconds\n\n"
+        "3\n00:00:05,000 -> 00:00:06,000\nbad arrow\n\n"
+        "4\n00:00:07,000 --> 00:00:08,000\nlast\n"
+    )
+    document = parse_srt(source)
+    assert [cue.index for cue in document] == [1, 4]
+    # the broken blocks stay in the previous cue and are written back as they were
+    assert "bad seconds" in document.texts()[0] and "bad arrow" in document.texts()[0]
+    check_round_trip(source)
+
+
+def test_plain_text_fallback():
+    source   = "first line\r\n\r\nsecond line\r\n"
+    document = load_document(source)
+    assert not document.is_srt
+    assert document.lines() == ["first line", "second line"]
+    assert document.fill_lines(["a", "b"]) == "a\r\n\r\nb\r\n"
+    assert parse_srt("no cues here\n00:00:01 --> 00:00:02\n").cues == []
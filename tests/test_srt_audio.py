@@ -0,0 +1,39 @@
+import asyncio
+import os
+
+from src.utils import mp3
+from src.utils.fake_backend import FakeTTS
+from src.utils.srt_audio import format_report, render_srt
+from src.utils.tts_segments import SegmentSynthesizer
+
+# a blank cue is not voiced; the third cue's speech overflows into the fourth
+SRT = (
+    "1\n00:00:01,000 --> 00:00:02,000\nfirst\n\n"
+    "2\n00:00:02,000 --> 00:00:02,500\n\n\n"
+    "3\n00:00:03,000 --> 00:00:03,200\nsecond\nline\n\n"
+    "4\n00:00:03,300 --> 00:00:04,000\nthird\n"
+)
+SPEECH_MS = 480    # 20 frames of 24 ms
+
+
+def test_render_srt_places_cues_at_their_start(tmp_path):
+    tts         = FakeTTS(duration = SPEECH_MS)
+    synthesizer = SegmentSynthesizer(os.path.join(tmp_path, "cache"), synthesize = tts)
+    track, report = asyncio.run(render_srt(SRT, synthesizer, "voice"))
+
+    assert [each.index for each in report] == [1, 3, 4] and tts.calls == 3
+    assert all(each.duration_ms == SPEECH_MS for each in report)
+    frame_ms = mp3.duration_ms(mp3.silence(1))
+    # gaps are filled with whole silent frames, never past the cue start
+    for each in report[:2]:
+        assert 0 <= each.start_ms - each.placed_ms < frame_ms
+    # the fourth cue waits for the third to finish
+    assert report[1].overflow_ms == SPEECH_MS - 200
+    assert report[2].placed_ms == report[1].placed_ms + SPEECH_MS
+    assert report[2].delay_ms == report[2].placed_ms - 3300
+    assert mp3.duration_ms(track) == report[-1].placed_ms + SPEECH_MS
+    assert len(format_report(report)) == 2
+
+    # rendered again: every cue comes from the cache
+    again, _ = asyncio.run(render_srt(SRT, synthesizer, "voice"))
+    assert again == track and tts.calls == 3
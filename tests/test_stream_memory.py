@@ -0,0 +1,7 @@
+from benchmarks.bench_stream_memory import MAX_GROWTH_MB, measure
+
+
+def test_peak_rss_does_not_grow_with_the_input(tmp_path):
+    # the larger input alone is bigger than the allowed growth
+    (_, small, _), (_, large, _) = measure([2, 24], 1 << 20, str(tmp_path))
+    assert (large - small) / 1024 <= MAX_GROWTH_MB
@@ -0,0 +1,29 @@
+import os
+
+from benchmarks.corpus import EN_WORDS, make_srt, unique_lines
+from src.utils.fake_backend import MockBackend
+from src.utils.scheduler import TokenBucket
+from src.utils.textio import iter_text, read_text
+from src.utils.translator import MyTranslator3, iter_line_chunks
+
+
+def test_iter_text_matches_read_text(tmp_path):
+    path = os.path.join(tmp_path, "input.srt")
+    for encoding, text in [("utf-8", "一\r\n二三\r\n\r\nabc\r\n" * 500), ("utf-16", "x\r\ny" * 300), ("gb18030", "这个软件\n" * 900 + "末")]:
+        with open(path, "wb") as file:
+            file.write(text.encode(encoding))
+        for size in (1, 7, 4096):
+            pieces = list(iter_text(path, size))
+            assert "".join(pieces) == read_text(path).text
+            assert all(each.endswith("\n") for each in pieces[:-1])
+
+
+def test_pipeline_streams_the_same_output():
+    text = make_srt(200_000, unique_lines(2000, EN_WORDS)).strip()
+    translator = MyTranslator3(source = "en", dest = "zh-TW", backends = [MockBackend("fake", dest = "zh-CN")])
+    for stage in translator.stages[:1]:
+        stage.limiter = TokenBucket(rate = 1000.0, capacity = stage.concurrency)
+    pieces = list(translator.iter_translate(iter_line_chunks(text, 16 << 10)))
+    assert len(pieces) > 1
+    assert "".join(pieces) == translator.do_translate(text)
+    assert translator.report["en -> zh-CN"]["lines"] > 0
@@ -0,0 +1,71 @@
+import codecs
+
+import pytest
+from opencc import OpenCC
+
+from benchmarks.corpus import make_srt
+from src.utils.textio import detect_encoding, read_text, sniff
+
+SIMPLIFIED  = make_srt(16 << 10)
+TRADITIONAL = OpenCC("s2twp").convert(SIMPLIFIED)
+
+
+def write(tmp_path, data : bytes) -> str:
+    path = str(tmp_path / "input.srt")
+    with open(path, "wb") as file:
+        file.write(data)
+    return path
+
+
+def _decodes(data : bytes, encoding : str) -> bool:
+    try:
+        codecs.decode(data, encoding)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("text, encoding, expected", [
+    (SIMPLIFIED,  "gbk",       "gb18030"),
+    (SIMPLIFIED,  "gb18030",   "gb18030"),
+    (TRADITIONAL, "big5",      "cp950"),
+    (SIMPLIFIED,  "utf-8",     "utf-8"),
+    (SIMPLIFIED,  "utf-8-sig", "utf-8-sig"),
+    (TRADITIONAL, "utf-16",    "utf-16"),       # with BOM
+    (TRADITIONAL, "utf-16-le", "utf-16-le"),    # without BOM
+    (SIMPLIFIED,  "utf-16-be", "utf-16-be"),
+])
+def test_detect_encoding(tmp_path, text, encoding, expected):
+    data = text.encode(encoding)
+    assert detect_encoding(data) == expected
+    decoded = read_text(write(tmp_path, data))
+    assert decoded.encoding == expected and decoded.text == text
+
+
+def test_line_endings_are_detected_and_normalised(tmp_path):
+    decoded = read_text(write(tmp_path, TRADITIONAL.replace("\n", "\r\n").encode("big5")))
+    assert decoded.newline == "\r\n" and decoded.text == TRADITIONAL
+    assert sniff(write(tmp_path, SIMPLIFIED.encode("gbk"))) == ("gb18030", "\n")
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "gbk", "big5", "utf-16-le"])
+def test_sample_window_ending_mid_character(tmp_path, encoding):
+    text = (TRADITIONAL if encoding == "big5" else SIMPLIFIED)[:2000]
+    data = text.encode(encoding)
+    path = write(tmp_path, data)
+    expected = detect_encoding(data)
+    # windows ending inside a multibyte character, and one byte earlier
+    cuts = [n for n in range(600, 700) if not _decodes(data[:n], encoding)]
+    assert cuts
+    for sample in cuts + [cuts[0] - 1]:
+        assert detect_encoding(data[:sample]) == expected, sample
+        decoded = read_text(path, sample = sample)
+        assert decoded.encoding == expected and decoded.text == text
+        assert sniff(path, sample = sample)[0] == expected
+
+
+def test_undecodable_bytes_do_not_raise(tmp_path):
+    data = SIMPLIFIED.encode("gbk")[:1000] + bytes(range(0x80, 0x100)) * 4
+    decoded = read_text(write(tmp_path, data))
+    assert decoded.encoding in ("gb18030", "cp950")
+    assert decoded.text.startswith(SIMPLIFIED[:100])
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from src.utils.fake_backend import MockBackend
+from src.utils.scheduler import TokenBucket
+from src.utils.translator import MyTranslator2
+
+PIECES = [f"{i}\n00:00:0{i},000 --> 00:00:0{i},900\nline number {i}\n\n" for i in range(1, 5)]
+
+
+def test_slow_input_is_sent_after_linger():
+    translator = MyTranslator2(dest = "zh-TW", backends = [MockBackend("fake", latency = 0.01)])
+    translator.limiter = TokenBucket(rate = 1000.0, capacity = translator.concurrency)
+    fed   : list[float] = []
+    out   : list[float] = []
+
+    async def pieces():
+        for piece in PIECES:
+            fed.append(time.perf_counter())
+            yield piece
+            # slower than linger: every piece goes out in a block of its own
+            await asyncio.sleep(0.2)
+
+    async def run() -> str:
+        parts = []
+        async for each in translator.translate_stream(pieces(), linger = 0.02):
+            out.append(time.perf_counter())
+            parts.append(each)
+        return "".join(parts)
+
+    result = asyncio.run(run())
+    assert result == "".join(PIECES).replace("line number", "[zh-TW]line number")
+    assert translator.report["blocks"] == len(PIECES)
+    # each piece is back long before the next one arrives
+    assert all(done - start < 0.15 for start, done in zip(fed, out))
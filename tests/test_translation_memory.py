@@ -0,0 +1,53 @@
+import os
+
+from src.utils.fake_backend import MockBackend
+from src.utils.translation_memory import TranslationMemory
+from src.utils.translator import MyTranslator2
+
+ORIGINAL = (
+    "1\n00:00:01,000 --> 00:00:01,900\n<i>Hello there</i>\n\n"
+    "2\n00:00:02,000 --> 00:00:02,900\nSee https://example.com/a?b=1 for more\n\n"
+    "3\n00:00:03,000 --> 00:00:03,900\nplain line\n\n"
+)
+TRANSLATED = (
+    "1\n00:00:01,000 --> 00:00:01,900\n<i>你好</i>\n\n"
+    "2\n00:00:02,000 --> 00:00:02,900\n更多請看 https://example.com/a?b=1\n\n"
+    "3\n00:00:03,000 --> 00:00:03,900\n普通的一行\n\n"
+)
+
+
+def test_warmed_lines_with_markup_and_urls_hit(tmp_path):
+    memory = TranslationMemory(os.path.join(tmp_path, "memory.sqlite3"))
+    assert memory.warm_from_srt("auto", "zh-TW", ORIGINAL, TRANSLATED) == 3
+    backend    = MockBackend("fake")
+    translator = MyTranslator2(dest = "zh-TW", cache = memory, backends = [backend])
+    assert translator.do_translate(ORIGINAL) == TRANSLATED.strip()
+    assert translator.report["cached"] == 3 and translator.report["requests"] == 0
+
+
+def test_warm_from_files_detects_the_encoding(tmp_path):
+    original, translated = os.path.join(tmp_path, "en.srt"), os.path.join(tmp_path, "zh.srt")
+    with open(original, "w", encoding = "utf-16") as file:
+        file.write(ORIGINAL)
+    with open(translated, "w", encoding = "gbk") as file:
+        file.write(TRANSLATED.replace("普通的一行", "普通的一行，这是简体中文的译文"))
+    memory = TranslationMemory(os.path.join(tmp_path, "memory.sqlite3"))
+    assert memory.warm_from_files("auto", "zh-CN", original, translated) == 3
+    assert memory.get("auto", "zh-CN", "plain line") == "普通的一行，这是简体中文的译文"
+    assert memory.get("auto", "zh-CN", "Hello there") == "你好"
+
+
+def test_running_totals_match_the_table(tmp_path):
+    memory = TranslationMemory(os.path.join(tmp_path, "memory.sqlite3"), max_entries = 100)
+    memory.put_many("en", "zh", [(f"line {i}", f"行 {i}") for i in range(60)])
+    # replacing rows and duplicates in one batch do not count twice
+    memory.put_many("en", "zh", [("line 1", "第一行"), ("line 1", "第一行"), ("new", "新")])
+    assert (memory.stats()["entries"], memory.stats()["bytes"]) == memory._totals()
+    memory.put_many("en", "zh", [(f"more {i}", f"多 {i}") for i in range(60)])
+    stats = memory.stats()
+    assert memory.evictions and stats["entries"] <= 100
+    assert (stats["entries"], stats["bytes"]) == memory._totals()
+    memory.close()
+    # totals are loaded when the file is opened again
+    reopened = TranslationMemory(os.path.join(tmp_path, "memory.sqlite3"))
+    assert reopened.stats()["entries"] == stats["entries"]